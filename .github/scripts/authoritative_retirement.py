@@ -0,0 +1,391 @@
+"""
+Retire placeholder data once authoritative data exists.
+
+Placeholder data is published by one organisation on behalf of others (e.g.
+MHCLG's scraped conservation areas, one endpoint per LPA). Once an LPA
+provides an active endpoint of its own for the same dataset, the placeholder
+endpoint is retired by:
+- adding end-dates to its rows in collection/<collection>/endpoint.csv and source.csv
+- recording its resources in collection/<collection>/old-resource.csv with status 410
+
+Each dataset to retire is described by a RetirementTarget, and any number of
+targets are handled in one run:
+- endpoint history for every target is fetched in one query, projected to the
+  columns needed and grouped by (dataset, LPA code) as it streams in
+- placeholder endpoints are hash-joined to the set of LPA codes holding active
+  authoritative endpoints, and to ODP provision for the coverage report
+- resources are fetched only for the endpoints being retired, in chunks, and
+  cached for endpoints that have already ended on the platform
+- all file changes go through one RetirementWriter, which reads and writes each
+  collection file once however many targets touch it
+"""
+
+import csv
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from datasette import chunked, iter_datasette_query, sql_in_list
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+COLLECTION_DIR = REPO_ROOT / 'collection'
+RESOURCE_CACHE_PATH = REPO_ROOT / 'var' / 'cache' / 'retirement' / 'endpoint-resources.json'
+
+MHCLG_ORG = 'government-organisation:D1342'
+HISTORIC_ENGLAND_ORG = 'government-organisation:PB1164'
+ODP_PROJECT = 'open-digital-planning'
+
+# Endpoint hashes are 64 characters, so 50 per IN (...) keeps query URLs well
+# under the usual 8KB limit.
+ENDPOINT_CHUNK_SIZE = 50
+
+
+def url_lpa_code(row):
+    """LPA code from a placeholder endpoint URL, e.g. .../ADU-conservation-area.csv -> ADU."""
+    return (row.get('endpoint_url') or '').split('/')[-1].split('-')[0]
+
+
+def organisation_lpa_code(organisation):
+    """LPA code from an organisation CURIE, e.g. local-authority:ADU -> ADU."""
+    if ':' not in (organisation or ''):
+        return None
+    return organisation.split(':')[1]
+
+
+@dataclass
+class RetirementTarget:
+    """A dataset whose placeholder endpoints are retired in favour of authoritative ones."""
+    dataset: str
+    collection: str = None
+    placeholder_org: str = MHCLG_ORG
+    placeholder_lpa_code: object = url_lpa_code
+    protected_orgs: frozenset = field(default_factory=lambda: frozenset({HISTORIC_ENGLAND_ORG}))
+    notes: str = 'Remove scraped data as we have data from authoritative source'
+
+    def __post_init__(self):
+        self.collection = self.collection or self.dataset
+
+    def lpa_code(self, row):
+        org = row.get('organisation', '')
+        if org == self.placeholder_org:
+            return self.placeholder_lpa_code(row)
+        return organisation_lpa_code(org)
+
+
+def fetch_endpoint_history(datasets, query=iter_datasette_query):
+    """Stream endpoint history rows for every dataset in one query."""
+    sql = f"""
+        SELECT pipeline, endpoint, endpoint_url, organisation, endpoint_end_date
+        FROM reporting_historic_endpoints
+        WHERE pipeline IN ({sql_in_list(sorted(datasets))})
+        ORDER BY pipeline, endpoint, endpoint_url, organisation, endpoint_end_date
+    """
+    return query('performance', sql)
+
+
+def fetch_odp_lpa_codes(datasets, query=iter_datasette_query):
+    """Return {dataset: set of LPA codes} for organisations providing each dataset through ODP."""
+    sql = f"""
+        SELECT DISTINCT dataset, organisation
+        FROM provision
+        WHERE project = '{ODP_PROJECT}'
+        AND dataset IN ({sql_in_list(sorted(datasets))})
+        ORDER BY dataset, organisation
+    """
+    codes = {dataset: set() for dataset in datasets}
+    for row in query('digital-land', sql):
+        code = organisation_lpa_code(row.get('organisation'))
+        if code:
+            codes.setdefault(row['dataset'], set()).add(code)
+    return codes
+
+
+def index_endpoints(rows, targets):
+    """Group endpoint history rows by (dataset, LPA code).
+
+    Returns {dataset: {lpa_code: {'placeholder': [...], 'authoritative_active': [...],
+    'authoritative_retired': [...]}}}. Rows for protected organisations, or
+    whose LPA code can't be worked out, are dropped.
+    """
+    targets_by_dataset = {target.dataset: target for target in targets}
+    index = {target.dataset: {} for target in targets}
+
+    for row in rows:
+        target = targets_by_dataset.get(row.get('pipeline'))
+        if target is None:
+            continue
+        org = row.get('organisation', '')
+        if org in target.protected_orgs:
+            continue
+        lpa_code = target.lpa_code(row)
+        if not lpa_code:
+            continue
+
+        groups = index[target.dataset].setdefault(
+            lpa_code, {'placeholder': [], 'authoritative_active': [], 'authoritative_retired': []})
+        if org == target.placeholder_org:
+            groups['placeholder'].append(row)
+        elif row.get('endpoint_end_date'):
+            groups['authoritative_retired'].append(row)
+        else:
+            groups['authoritative_active'].append(row)
+
+    return index
+
+
+def select_endpoints_to_retire(endpoints_by_lpa):
+    """Join placeholder endpoints to LPAs holding active authoritative endpoints.
+
+    Returns (endpoints_to_retire, retired_lpas, summary).
+    """
+    active_lpas = {lpa for lpa, groups in endpoints_by_lpa.items() if groups['authoritative_active']}
+    placeholder_lpas = {lpa for lpa, groups in endpoints_by_lpa.items() if groups['placeholder']}
+    retired_lpas = placeholder_lpas & active_lpas
+
+    endpoints_to_retire = [
+        row for lpa in sorted(retired_lpas) for row in endpoints_by_lpa[lpa]['placeholder']
+    ]
+    summary = {
+        'both': len(retired_lpas),
+        'placeholder-only': len(placeholder_lpas - active_lpas),
+        'active-authoritative-only': len(active_lpas - placeholder_lpas),
+        'retired-authoritative-only': sum(
+            1 for lpa, groups in endpoints_by_lpa.items()
+            if lpa not in placeholder_lpas and lpa not in active_lpas and groups['authoritative_retired']
+        ),
+    }
+    return endpoints_to_retire, retired_lpas, summary
+
+
+def load_resource_cache(path=RESOURCE_CACHE_PATH):
+    """Load cached endpoint -> resources lists from an earlier run."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_resource_cache(cache, path=RESOURCE_CACHE_PATH):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+
+
+def get_endpoint_resources(endpoint_rows, cache=None, chunk_size=ENDPOINT_CHUNK_SIZE,
+                           query=iter_datasette_query):
+    """Return {endpoint: [resource, ...]} for the given endpoint rows.
+
+    Only endpoints missing from `cache` are queried, `chunk_size` at a time,
+    with the endpoint filter and column projection done by Datasette rather
+    than by downloading the whole historic-endpoint table.
+
+    Endpoints that have already ended on the platform can't gain resources, so
+    their lists are added to `cache` for later runs; lists for live endpoints
+    are only kept for this run.
+    """
+    cache = {} if cache is None else cache
+    ended = {row.get('endpoint') for row in endpoint_rows if row.get('endpoint_end_date')}
+    endpoints = sorted({row.get('endpoint') for row in endpoint_rows if row.get('endpoint')})
+
+    resources = {endpoint: cache[endpoint] for endpoint in endpoints if endpoint in cache}
+    to_fetch = [endpoint for endpoint in endpoints if endpoint not in cache]
+    print(f"Using cached resources for {len(resources)} endpoints, querying {len(to_fetch)}")
+
+    for chunk in chunked(to_fetch, chunk_size):
+        sql = f"""
+            SELECT DISTINCT endpoint, resource
+            FROM reporting_historic_endpoints
+            WHERE endpoint IN ({sql_in_list(chunk)})
+            AND resource != ''
+            ORDER BY endpoint, resource
+        """
+        fetched = {endpoint: [] for endpoint in chunk}
+        for row in query('performance', sql):
+            fetched[row['endpoint']].append(row['resource'])
+        resources.update(fetched)
+        cache.update((endpoint, fetched[endpoint]) for endpoint in chunk if endpoint in ended)
+
+    return resources
+
+
+class RetirementWriter:
+    """Collects end-dates and old-resource entries per collection and writes each file once."""
+
+    OLD_RESOURCE_FIELDS = ['old-resource', 'status', 'resource', 'notes']
+
+    def __init__(self, collection_dir=COLLECTION_DIR, today=None):
+        self.collection_dir = Path(collection_dir)
+        self.today = today or datetime.now().strftime('%Y-%m-%d')
+        self.endpoints = {}
+        self.resources = {}
+        self._retired_resources = {}
+
+    def retired_resources(self, collection):
+        """Resources already in old-resource.csv, plus any queued in this run."""
+        if collection not in self._retired_resources:
+            path = self.collection_dir / collection / 'old-resource.csv'
+            retired = set()
+            if path.exists():
+                with open(path, 'r', encoding='utf-8') as f:
+                    retired = {row.get('old-resource') for row in csv.DictReader(f)}
+            self._retired_resources[collection] = retired
+        return self._retired_resources[collection]
+
+    def retire_endpoints(self, collection, endpoints):
+        self.endpoints.setdefault(collection, set()).update(endpoints)
+
+    def retire_resources(self, collection, resources, notes):
+        """Queue resources not already retired; returns the ones queued."""
+        retired = self.retired_resources(collection)
+        queued = []
+        for resource in resources:
+            if resource and resource not in retired:
+                retired.add(resource)
+                queued.append(resource)
+        self.resources.setdefault(collection, []).extend((resource, notes) for resource in queued)
+        return queued
+
+    def _end_date_rows(self, path, endpoints):
+        with open(path, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            fieldnames = [f for f in reader.fieldnames if f is not None]
+            rows = list(reader)
+
+        updated_count = 0
+        for row in rows:
+            # Only update if endpoint matches AND it doesn't already have an end-date
+            if row.get('endpoint') in endpoints and not row.get('end-date'):
+                row['end-date'] = self.today
+                updated_count += 1
+
+        if updated_count:
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=fieldnames)
+                writer.writeheader()
+                # Remove None keys that can appear from malformed CSV rows
+                writer.writerows({k: v for k, v in row.items() if k is not None} for row in rows)
+        return updated_count
+
+    def _append_old_resources(self, path, entries):
+        exists = path.exists() and path.stat().st_size > 0
+        with open(path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=self.OLD_RESOURCE_FIELDS)
+            if not exists:
+                writer.writeheader()
+            writer.writerows(
+                {'old-resource': resource, 'status': '410', 'resource': '', 'notes': notes}
+                for resource, notes in entries
+            )
+
+    def flush(self):
+        """Write all queued changes; returns {collection: counts}."""
+        counts = {}
+        for collection in sorted(set(self.endpoints) | set(self.resources)):
+            directory = self.collection_dir / collection
+            endpoints = self.endpoints.get(collection, set())
+            entries = self.resources.get(collection, [])
+            counts[collection] = {
+                'source': self._end_date_rows(directory / 'source.csv', endpoints) if endpoints else 0,
+                'endpoint': self._end_date_rows(directory / 'endpoint.csv', endpoints) if endpoints else 0,
+                'old-resource': len(entries),
+            }
+            if entries:
+                self._append_old_resources(directory / 'old-resource.csv', entries)
+            print(f"{collection}: end-dated {counts[collection]['source']} source and "
+                  f"{counts[collection]['endpoint']} endpoint records, "
+                  f"added {len(entries)} old-resource records")
+        self.endpoints.clear()
+        self.resources.clear()
+        return counts
+
+
+class RepositoryRetirementWriter(RetirementWriter):
+    """RetirementWriter that makes its changes to ConfigRepository tables, written when the repository is flushed."""
+
+    def __init__(self, repo, today=None):
+        super().__init__(repo.root / 'collection', today)
+        self.repo = repo
+
+    def _table(self, path):
+        return self.repo.table('collection', path.parent.name, path.name)
+
+    def retired_resources(self, collection):
+        if collection not in self._retired_resources:
+            self._retired_resources[collection] = self.repo.old_resource(collection).values('old-resource')
+        return self._retired_resources[collection]
+
+    def _end_date_rows(self, path, endpoints):
+        table = self._table(path)
+        updated_count = 0
+        for row in table.rows:
+            if row.get('endpoint') in endpoints and not row.get('end-date'):
+                row['end-date'] = self.today
+                updated_count += 1
+        if updated_count:
+            table.mark_changed()
+        return updated_count
+
+    def _append_old_resources(self, path, entries):
+        self._table(path).extend(
+            {'old-resource': resource, 'status': '410', 'resource': '', 'notes': notes}
+            for resource, notes in entries
+        )
+
+
+def retire_placeholder_data(targets, writer=None, query=iter_datasette_query,
+                            resource_cache_path=RESOURCE_CACHE_PATH):
+    """Retire placeholder endpoints and resources for every target in one run.
+
+    Returns {dataset: {'endpoints': [...], 'resources': [...], 'lpas': set, 'summary': {...}}}.
+    """
+    writer = writer or RetirementWriter()
+    datasets = [target.dataset for target in targets]
+
+    index = index_endpoints(fetch_endpoint_history(datasets, query), targets)
+    resource_cache = load_resource_cache(resource_cache_path)
+
+    results = {}
+    for target in targets:
+        print(f"\nProcessing {target.dataset} dataset...")
+        endpoints_to_retire, retired_lpas, summary = select_endpoints_to_retire(index[target.dataset])
+        print(f"Found {summary['both']} LPAs with both placeholder and ACTIVE authoritative data")
+        print(f"  Placeholder-only LPAs: {summary['placeholder-only']}")
+        print(f"  Active authoritative-only LPAs: {summary['active-authoritative-only']}")
+        print(f"  Retired authoritative-only LPAs: {summary['retired-authoritative-only']}")
+        print(f"Retiring {len(endpoints_to_retire)} {target.placeholder_org} {target.dataset} endpoints")
+
+        resources = []
+        if endpoints_to_retire:
+            writer.retire_endpoints(target.collection, {row['endpoint'] for row in endpoints_to_retire})
+            resources_by_endpoint = get_endpoint_resources(endpoints_to_retire, resource_cache, query=query)
+            resources = writer.retire_resources(
+                target.collection,
+                [resource for endpoint in sorted(resources_by_endpoint) for resource in resources_by_endpoint[endpoint]],
+                target.notes,
+            )
+            print(f"Found {len(resources)} resources to retire")
+
+        results[target.dataset] = {
+            'endpoints': endpoints_to_retire,
+            'resources': resources,
+            'lpas': retired_lpas,
+            'summary': summary,
+        }
+
+    writer.flush()
+    save_resource_cache(resource_cache, resource_cache_path)
+    return results
+
+
+def report_odp_coverage(results, query=iter_datasette_query):
+    """Print how many LPAs whose placeholder data was retired are providing through ODP."""
+    retired_lpas = set().union(*(result['lpas'] for result in results.values()))
+    if not retired_lpas:
+        return
+    odp_codes = set().union(*fetch_odp_lpa_codes(results.keys(), query).values())
+    retired_in_odp = len(retired_lpas & odp_codes)
+    print(f"LPAs where placeholder data was retired: {len(retired_lpas)}")
+    print(f"  Of these, in ODP: {retired_in_odp}")
+    print(f"  Of these, NOT in ODP: {len(retired_lpas) - retired_in_odp}")
@@ -3,8 +3,6 @@ import math
 import sys
 from time import perf_counter
 import click
-import requests
-import pandas as pd
 import shutil
 import logging
 import traceback
@@ -14,14 +12,22 @@ import re
 from pathlib import Path
 from typing import Optional, Dict
 from io import StringIO
-from digital_land.commands import check_and_assign_entities
-from digital_land.specification import Specification
-
-from tqdm import tqdm
 from urllib.request import urlretrieve
 from urllib.parse import urlencode
 from concurrent.futures import ThreadPoolExecutor
 
+import tracing
+from assignment_session import AssignmentSession
+from fingerprint_store import STORE_FILENAME, FingerprintStore, ResourceFingerprints, fingerprint_hash
+from lazy_import import LazyImport
+
+# Imported on first use, so parsing options (and --help) doesn't wait for them
+pd = LazyImport('pandas')
+requests = LazyImport('requests')
+tqdm = LazyImport('tqdm', 'tqdm')
+check_and_assign_entities = LazyImport('digital_land.commands', 'check_and_assign_entities')
+Specification = LazyImport('digital_land.specification', 'Specification')
+
 logger = logging.getLogger(__name__)
 
 
@@ -180,28 +186,74 @@ def _make_fingerprints(df, except_fields=["reference", "entry-date"], only_field
         only_fields: if specified, only include these fields in the fingerprint (overrides except_fields)
     """
     
-    tmp = df[~df['field'].isin(except_fields)].copy()
-    if only_fields:
-        tmp = tmp[tmp['field'].isin(only_fields)]
-    tmp['f_field'] = tmp['field'].astype(str).str.strip().str.lower()
-    tmp['f_value'] = tmp['value'].fillna('').astype(str).str.strip().str.lower()
-    fp = (
-        tmp.groupby('entity')[['f_field', 'f_value']]
-        .apply(lambda g: '|'.join(sorted(g['f_field'] + '::' + g['f_value'])))
-        .reset_index()
-    )
-    fp = fp.rename(columns={0: 'fingerprint'})
-    # Extract actual field values as columns
-    field_values = df[df['field'].isin(['organisation', 'reference', 'prefix'])][['entity', 'field', 'value']].drop_duplicates()
-    field_pivot = field_values.pivot_table(index='entity', columns='field', values='value', aggfunc='first').reset_index()
-    fp = fp.merge(field_pivot, on='entity', how='left')
-    # ensure expected columns exist to avoid KeyError
-    for _col in ('organisation', 'reference', 'prefix'):
-        if _col not in fp.columns:
-            fp[_col] = ''
+    with tracing.span('fingerprint') as s:
+        s.count(rows=len(df))
+        tmp = df[~df['field'].isin(except_fields)].copy()
+        if only_fields:
+            tmp = tmp[tmp['field'].isin(only_fields)]
+        tmp['f_field'] = tmp['field'].astype(str).str.strip().str.lower()
+        tmp['f_value'] = tmp['value'].fillna('').astype(str).str.strip().str.lower()
+        fp = (
+            tmp.groupby('entity')[['f_field', 'f_value']]
+            .apply(lambda g: '|'.join(sorted(g['f_field'] + '::' + g['f_value'])))
+            .reset_index()
+        )
+        fp = fp.rename(columns={0: 'fingerprint'})
+        # Extract actual field values as columns
+        field_values = df[df['field'].isin(['organisation', 'reference', 'prefix'])][['entity', 'field', 'value']].drop_duplicates()
+        field_pivot = field_values.pivot_table(index='entity', columns='field', values='value', aggfunc='first').reset_index()
+        fp = fp.merge(field_pivot, on='entity', how='left')
+        # ensure expected columns exist to avoid KeyError
+        for _col in ('organisation', 'reference', 'prefix'):
+            if _col not in fp.columns:
+                fp[_col] = ''
+        return fp
+
+
+# The ways the duplicate checks fingerprint an entity: (except_fields, only_fields)
+FINGERPRINT_PROFILES = {
+    'all-fields': (["reference", "entry-date"], None),
+    'prefix-reference-organisation': ([], ['prefix', 'organisation', 'reference']),
+    'reference-organisation': ([], ['organisation', 'reference']),
+}
+
+
+def _hashed_fingerprints(df, profile):
+    """_make_fingerprints for one of FINGERPRINT_PROFILES, with each fingerprint's hash added."""
+    except_fields, only_fields = FINGERPRINT_PROFILES[profile]
+    fp = _make_fingerprints(df, except_fields=except_fields, only_fields=only_fields)
+    fp['fingerprint_hash'] = fp['fingerprint'].map(fingerprint_hash) if len(fp) else []
     return fp
 
 
+def _resource_fingerprints(df):
+    """The entities and hashed fingerprints of a transformed resource, as kept in the fingerprint store."""
+    entities = set(df['entity'])
+    if not len(df):
+        return ResourceFingerprints(entities, {profile: [] for profile in FINGERPRINT_PROFILES})
+    return ResourceFingerprints(entities, {
+        profile: list(_hashed_fingerprints(df, profile)[['entity', 'fingerprint_hash']].itertuples(index=False, name=None))
+        for profile in FINGERPRINT_PROFILES
+    })
+
+
+def _old_fingerprint_frame(old_fingerprints, profile):
+    return pd.DataFrame(old_fingerprints.profiles.get(profile, []), columns=['entity', 'fingerprint_hash'])
+
+
+def _store_fingerprints(store, endpoint, resource, resource_df, fingerprints=None):
+    """
+        Put a transformed resource's fingerprints (made from resource_df unless given) in the fingerprint store.
+
+        Failing to is logged rather than raised, as the store is only a cache.
+    """
+    try:
+        with tracing.span('store_fingerprints'):
+            store.put(endpoint, resource, _resource_fingerprints(resource_df) if fingerprints is None else fingerprints)
+    except Exception as e:
+        logger.error(f"Error storing fingerprints of resource {resource}: {e}")
+
+
 def _missing_metadata_frame(df):
     field_values = df[
         df['field'].isin(['organisation', 'reference', 'prefix'])
@@ -228,8 +280,8 @@ def _duplicate_error_rows(matches, dataset, resource, error_code, message_factor
         {
             'dataset': dataset,
             'resource': resource,
-            'organisation': match_row.get('organisation_new', ''),
-            'reference': match_row.get('reference_new', ''),
+            'organisation': match_row.get('organisation', ''),
+            'reference': match_row.get('reference', ''),
             'status': 'error',
             'error_code': error_code,
             'message': message_factory(match_row),
@@ -238,13 +290,24 @@ def _duplicate_error_rows(matches, dataset, resource, error_code, message_factor
     ]
 
 
+def _fingerprint_matches(old_df, new_df):
+    """
+        Pair each new entity with the old entities that have the same fingerprint, compared by hash.
+
+        old_df has the old entities' `entity` and `fingerprint_hash`, new_df is from _hashed_fingerprints.
+    """
+    return new_df.merge(
+        old_df[['entity', 'fingerprint_hash']], on='fingerprint_hash', how='inner', suffixes=('_new', '_old')
+    )
+
+
 def _duplicate_entities_error_rows(old_df, new_df, dataset, resource):
     """
         Check for duplicate entities based on all fields except reference and entry-date. 
         
         If a new entity has the same values for all other fields as an old entity, flag as a potential duplicate.
     """
-    matches = new_df.merge(old_df, on='fingerprint', how='inner', suffixes=('_new', '_old'))
+    matches = _fingerprint_matches(old_df, new_df)
     return _duplicate_error_rows(
         matches,
         dataset,
@@ -262,7 +325,7 @@ def _duplicate_prefix_reference_organisation_error_rows(old_df, new_df, dataset,
         Check for duplicate entities based on prefix, reference and organisation fields only.
     """
     
-    matches = new_df.merge(old_df, on='fingerprint', how='inner', suffixes=('_new', '_old'))
+    matches = _fingerprint_matches(old_df, new_df)
     return _duplicate_error_rows(
         matches,
         dataset,
@@ -276,7 +339,7 @@ def _duplicate_prefix_reference_organisation_error_rows(old_df, new_df, dataset,
 
 
 def _duplicate_reference_organisation_error_rows(old_df, new_df, dataset, resource):
-    matches = new_df.merge(old_df, on='fingerprint', how='inner', suffixes=('_new', '_old'))
+    matches = _fingerprint_matches(old_df, new_df)
     return _duplicate_error_rows(
         matches,
         dataset,
@@ -376,15 +439,24 @@ def _missing_reference_error_rows(df, dataset, resource):
     ]
 
 
-def _collect_validation_rows(current_resource_df, old_resource_df, dataset, resource, new_entity_threshold, old_resource_hash,organisation_name=''):
+def _collect_validation_rows(current_resource_df, old_resource_df, dataset, resource, new_entity_threshold, old_resource_hash,organisation_name='', old_fingerprints=None):
+    """
+        Check the current resource, and its new entities against the old resource.
+
+        The old resource is compared by its ResourceFingerprints, from the fingerprint store
+        or else made from old_resource_df; the previous resource is missing if neither is given.
+    """
     validation_rows = []
     current_entities = set(current_resource_df['entity'])
 
-    if old_resource_df is None:
+    if old_fingerprints is None and old_resource_df is not None:
+        old_fingerprints = _resource_fingerprints(old_resource_df)
+
+    if old_fingerprints is None:
         old_entities = set()
         new_entity_ids = current_entities
     else:
-        old_entities = set(old_resource_df['entity'])
+        old_entities = old_fingerprints.entities
         new_entity_ids = current_entities - old_entities
     
     print(f"Old entities count: {len(old_entities)}, current entities count: {len(current_entities)}, New entities count: {len(new_entity_ids)}")
@@ -392,7 +464,7 @@ def _collect_validation_rows(current_resource_df, old_resource_df, dataset, reso
     print(f"Last 5 current entities IDs: {sorted(current_entities)[-5:] if current_entities else 'N/A'}")
     print(f"Last 5 new entities IDs: {sorted(new_entity_ids)[-5:] if new_entity_ids else 'N/A'}")
 
-    if old_resource_df is None:
+    if old_fingerprints is None:
         validation_rows.append(
             {
                 'dataset': dataset,
@@ -455,8 +527,8 @@ def _collect_validation_rows(current_resource_df, old_resource_df, dataset, reso
         # Check for duplicate entities (all fields except reference and entry-date) between the new resource and old resource
         validation_rows.extend(
             _duplicate_entities_error_rows(
-                _make_fingerprints(old_resource_df),
-                _make_fingerprints(new_resource_only_df),
+                _old_fingerprint_frame(old_fingerprints, 'all-fields'),
+                _hashed_fingerprints(new_resource_only_df, 'all-fields'),
                 dataset,
                 resource,
             )
@@ -465,8 +537,8 @@ def _collect_validation_rows(current_resource_df, old_resource_df, dataset, reso
         # Check for duplicate entities based on prefix, reference and organisation fields only between the new resource and old resource
         validation_rows.extend(
             _duplicate_prefix_reference_organisation_error_rows(
-                _make_fingerprints(old_resource_df, except_fields=[], only_fields=['prefix', 'organisation', 'reference']),
-                _make_fingerprints(new_resource_only_df, except_fields=[], only_fields=['prefix', 'organisation', 'reference']),
+                _old_fingerprint_frame(old_fingerprints, 'prefix-reference-organisation'),
+                _hashed_fingerprints(new_resource_only_df, 'prefix-reference-organisation'),
                 dataset,
                 resource,
             )
@@ -475,8 +547,8 @@ def _collect_validation_rows(current_resource_df, old_resource_df, dataset, reso
         # Check for duplicate entities based on reference and organisation fields only between the new resource and old resource
         validation_rows.extend(
             _duplicate_reference_organisation_error_rows(
-                _make_fingerprints(old_resource_df, except_fields=[], only_fields=['organisation', 'reference']),
-                _make_fingerprints(new_resource_only_df, except_fields=[], only_fields=['organisation', 'reference']),
+                _old_fingerprint_frame(old_fingerprints, 'reference-organisation'),
+                _hashed_fingerprints(new_resource_only_df, 'reference-organisation'),
                 dataset,
                 resource,
             )
@@ -515,9 +587,16 @@ def process_csv(scope, resource_dir, issue_summary_df, cache_dir, new_entity_thr
     # Batch fetch all old resource hashes at once to reduce API calls
     unique_endpoints = issue_summary_df['endpoint'].unique().tolist()
     print(f"Fetching old resource hashes for {len(unique_endpoints)} unique endpoints...")
-    endpoint_resource_map = get_old_resource_hashes_batch(unique_endpoints)
+    with tracing.span('fetch_old_resource_hashes') as s:
+        endpoint_resource_map = get_old_resource_hashes_batch(unique_endpoints)
+        s.count(endpoints=len(unique_endpoints), hashes=len(endpoint_resource_map))
     print(f"Successfully retrieved {len(endpoint_resource_map)} old resource hashes")
-    
+
+    # Keeps the specification, organisations and unchanged pipeline config loaded between resources
+    session = AssignmentSession()
+    # Fingerprints of earlier resources, so the old resource only needs downloading if they're missing
+    fingerprint_store = FingerprintStore(cache_dir / STORE_FILENAME)
+
     try:
         pbar = tqdm(issue_summary_df.iterrows(), total=issue_summary_df.shape[0], desc="Processing resources")
         for row_number, row in pbar:
@@ -539,16 +618,19 @@ def process_csv(scope, resource_dir, issue_summary_df, cache_dir, new_entity_thr
             print(f"Resource path > {resource_path}")
 
             if not resource_path.is_file():
-                try:
-                    print(f"Resource  file not found locally, attempting to download from {download_link}")
-                    response = requests.get(download_link)
-                    response.raise_for_status()
-                    resource_path.write_bytes(response.content)
-                    print(f"Downloaded: {resource}")
-                except requests.RequestException as e:
-                    print(f"Failed to download: {resource}")
-                    print(f"Error: {e}")
-                    failed_downloads.append((resource, str(e)))
+                with tracing.span('download', resource=resource) as s:
+                    try:
+                        print(f"Resource  file not found locally, attempting to download from {download_link}")
+                        response = requests.get(download_link)
+                        response.raise_for_status()
+                        resource_path.write_bytes(response.content)
+                        s.count(bytes=len(response.content))
+                        print(f"Downloaded: {resource}")
+                    except requests.RequestException as e:
+                        print(f"Failed to download: {resource}")
+                        print(f"Error: {e}")
+                        failed_downloads.append((resource, str(e)))
+                        tracing.count(failed_downloads=1)
                 continue
 
             print(f"Processing resource: {resource}")
@@ -556,167 +638,193 @@ def process_csv(scope, resource_dir, issue_summary_df, cache_dir, new_entity_thr
 
             input_path = cache_dir / "assign_entities" / "transformed" / f"{resource}.csv"
             lookup_path = Path("pipeline") / collection_name / "lookup.csv"
-            try:
-                # Snapshot existing entities for this dataset before assignment
-                pre_lookup_df = pd.read_csv(lookup_path,dtype=str)
-                pre_dataset_entities = set(
-                    pre_lookup_df[
-                        pre_lookup_df["prefix"] == dataset
-                    ]["entity"].dropna().astype(int)
-                )
-                check_and_assign_entities(
-                    [resource_path],
-                    [endpoint],
-                    collection_name,
-                    dataset,
-                    [organisation_name],
-                    collection_path,
-                    cache_dir.joinpath("organisation.csv"),
-                    Path("specification"),
-                    Path(f"pipeline/{collection_name}"),
-                    input_path,
-                    prompt_user=False,
-                )
-
-                output_rows = []
-
-                def add_output_log(rows):
-                    if rows:
-                        output_rows.extend(rows)
-
-                # get old transformed resource using pre-fetched resource hash when checks are enabled
-                old_resource_df = None
-                old_resource_hash = None
-                if not skip_checks and endpoint in endpoint_resource_map:
-                    old_resource_hash = endpoint_resource_map[endpoint]
-
-                    print(f"=====")
-                    print(f" collection || dataset || old_resource_hash || endpoint")
-                    print(f" {collection_name} || {dataset} || {old_resource_hash} || {endpoint}")
-                    old_resource_df = get_old_resource_df_from_hash(old_resource_hash, collection_name, dataset)
+            with tracing.span('resource', resource=resource, dataset=dataset, collection=collection_name):
+                try:
+                    # Snapshot existing entities for this dataset before assignment
+                    with tracing.span('lookup_read') as s:
+                        pre_lookup_df = pd.read_csv(lookup_path,dtype=str)
+                        pre_dataset_entities = set(
+                            pre_lookup_df[
+                                pre_lookup_df["prefix"] == dataset
+                            ]["entity"].dropna().astype(int)
+                        )
+                        s.count(rows=len(pre_lookup_df))
+                    with tracing.span('check_and_assign_entities'), session.installed(check_and_assign_entities):
+                        check_and_assign_entities(
+                            [resource_path],
+                            [endpoint],
+                            collection_name,
+                            dataset,
+                            [organisation_name],
+                            collection_path,
+                            cache_dir.joinpath("organisation.csv"),
+                            Path("specification"),
+                            Path(f"pipeline/{collection_name}"),
+                            input_path,
+                            prompt_user=False,
+                        )
+
+                    output_rows = []
+
+                    def add_output_log(rows):
+                        if rows:
+                            output_rows.extend(rows)
+
+                    # get old transformed resource's fingerprints using pre-fetched resource hash when checks are enabled,
+                    # from the fingerprint store or else by downloading the resource
+                    old_fingerprints = None
+                    old_resource_hash = None
+                    if not skip_checks and endpoint in endpoint_resource_map:
+                        old_resource_hash = endpoint_resource_map[endpoint]
+
+                        print(f"=====")
+                        print(f" collection || dataset || old_resource_hash || endpoint")
+                        print(f" {collection_name} || {dataset} || {old_resource_hash} || {endpoint}")
+                        old_fingerprints = fingerprint_store.get(endpoint, old_resource_hash)
+                        if old_fingerprints is None:
+                            with tracing.span('fetch_old_resource') as s:
+                                old_resource_df = get_old_resource_df_from_hash(old_resource_hash, collection_name, dataset)
+                                s.count(rows=0 if old_resource_df is None else len(old_resource_df))
+                            if old_resource_df is not None:
+                                old_fingerprints = _resource_fingerprints(old_resource_df)
+                                _store_fingerprints(fingerprint_store, endpoint, old_resource_hash, old_resource_df, old_fingerprints)
+                        else:
+                            tracing.count(stored_fingerprints=1)
                 
-                # get current transformed resource
-                current_resource_df = pd.read_csv(cache_dir / "assign_entities" / "transformed" / f"{resource}.csv",dtype=str)
-
-                if not skip_checks and len(current_resource_df) == 0:
-                    add_output_log([
-                        {
-                            "dataset": dataset,
-                            "resource": resource,
-                            "organisation": organisation_name,
-                            "reference": "",
-                            "status": "error",
-                            "error_code": "current_resource_empty",
-                            "message": "Current resource has no entities for assignment.",
-                        }
-                    ])
-                    output_df = pd.concat(
-                        [output_df, pd.DataFrame(output_rows)],
-                        ignore_index=True,
-                    )
-                    continue
-
-                if skip_checks:
-                    old_entities = set()
-                    new_entities = set(current_resource_df['entity'])
-                    validation_rows = []
-                else:
-                    validation_rows, old_entities, new_entities = _collect_validation_rows(
-                        current_resource_df,
-                        old_resource_df,
-                        dataset,
-                        resource,
-                        new_entity_threshold,
-                        old_resource_hash,
-                        organisation_name=organisation_name
-                    )
-                    add_output_log(validation_rows)
+                    # get current transformed resource
+                    with tracing.span('read_current_resource') as s:
+                        current_resource_df = pd.read_csv(cache_dir / "assign_entities" / "transformed" / f"{resource}.csv",dtype=str)
+                        s.count(rows=len(current_resource_df))
+
+                    if not skip_checks and len(current_resource_df) == 0:
+                        add_output_log([
+                            {
+                                "dataset": dataset,
+                                "resource": resource,
+                                "organisation": organisation_name,
+                                "reference": "",
+                                "status": "error",
+                                "error_code": "current_resource_empty",
+                                "message": "Current resource has no entities for assignment.",
+                            }
+                        ])
+                        output_df = pd.concat(
+                            [output_df, pd.DataFrame(output_rows)],
+                            ignore_index=True,
+                        )
+                        continue
+
+                    if skip_checks:
+                        old_entities = set()
+                        new_entities = set(current_resource_df['entity'])
+                        validation_rows = []
+                    else:
+                        with tracing.span('validation') as s:
+                            validation_rows, old_entities, new_entities = _collect_validation_rows(
+                                current_resource_df,
+                                None,
+                                dataset,
+                                resource,
+                                new_entity_threshold,
+                                old_resource_hash,
+                                organisation_name=organisation_name,
+                                old_fingerprints=old_fingerprints,
+                            )
+                            s.count(errors=len(validation_rows))
+                        add_output_log(validation_rows)
                     
-                    if len(output_rows) == 0:
-                        iui = invalid_uri_issues[
-                                    (invalid_uri_issues["resource"] == resource)
-                                    & (invalid_uri_issues["dataset"] == dataset)
-                                ]
-                        if len(iui) > 0:
-                            add_output_log([
-                                {
-                                    "dataset": dataset,
-                                    "resource": resource,
-                                    "organisation": organisation_name,
-                                    "reference": "",
-                                    "status": "error",
-                                    "error_code": "invalid_uri_issue",
-                                    "message": f"Resource has known issues with invalid URIs that require manual review.",
-                                }
-                            ])
-
-                if output_rows:
+                        if len(output_rows) == 0:
+                            iui = invalid_uri_issues[
+                                        (invalid_uri_issues["resource"] == resource)
+                                        & (invalid_uri_issues["dataset"] == dataset)
+                                    ]
+                            if len(iui) > 0:
+                                add_output_log([
+                                    {
+                                        "dataset": dataset,
+                                        "resource": resource,
+                                        "organisation": organisation_name,
+                                        "reference": "",
+                                        "status": "error",
+                                        "error_code": "invalid_uri_issue",
+                                        "message": f"Resource has known issues with invalid URIs that require manual review.",
+                                    }
+                                ])
+
+                    if output_rows:
+                        output_df = pd.concat(
+                            [output_df, pd.DataFrame(output_rows)],
+                            ignore_index=True,
+                        )
+                        continue
+
+                    add_output_log(
+                        [
+                            {
+                                "dataset": dataset,
+                                "resource": resource,
+                                "organisation": organisation_name,
+                                "reference": "",
+                                "status": "success",
+                                "entities_created": len(new_entities),
+                                "error_code": "",
+                                "message": f"Entities assigned successfully. [{sorted(new_entities)[-5:]}]",
+                            }
+                        ]
+                    )
                     output_df = pd.concat(
                         [output_df, pd.DataFrame(output_rows)],
                         ignore_index=True,
                     )
-                    continue
-
-                add_output_log(
-                    [
-                        {
-                            "dataset": dataset,
-                            "resource": resource,
-                            "organisation": organisation_name,
-                            "reference": "",
-                            "status": "success",
-                            "entities_created": len(new_entities),
-                            "error_code": "",
-                            "message": f"Entities assigned successfully. [{sorted(new_entities)[-5:]}]",
-                        }
-                    ]
-                )
-                output_df = pd.concat(
-                    [output_df, pd.DataFrame(output_rows)],
-                    ignore_index=True,
-                )
-                shutil.copy(cache_dir / "assign_entities" / collection_name / "pipeline" / "lookup.csv", Path("pipeline") / collection_name / "lookup.csv")
-                print(f"\nEntities assigned successfully for resource: {resource}. ")
-                successful_resources.append(resource_path)
-
-                # After successful entity assignment and duplicate checks append entity range(s) to entity-organisation.csv.
-                # A single resource can carry rows for more than one organisation (e.g. a
-                # multi-authority endpoint), so entities must be grouped by their *actual*
-                # organisation rather than assumed to all belong to `organisation_name` -
-                # otherwise entities for other organisations end up with no registered range.
-                post_lookup_df = pd.read_csv(lookup_path, dtype=str)
-                post_dataset_df = post_lookup_df[post_lookup_df["prefix"] == dataset].dropna(subset=["entity"])
-                post_entity_org = (
-                    post_dataset_df.assign(entity=post_dataset_df["entity"].astype(int))
-                    .drop_duplicates("entity")
-                    .set_index("entity")["organisation"]
-                    .to_dict()
-                )
-                new_dataset_entities = set(post_entity_org) - pre_dataset_entities
-                if new_dataset_entities:
-                    entity_org_file = Path("pipeline") / collection_name / "entity-organisation.csv"
-                    for org_value, min_entity, max_entity in _contiguous_ranges_by_org(new_dataset_entities, post_entity_org):
-                        # Hard code single exception for conservation-area dataset org HE
-                        if dataset == "conservation-area" and org_value == "government-organisation:PB1164":
-                            continue
-                        with open(entity_org_file, "a", newline="") as f:
-                            writer = csv.writer(f)
-                            writer.writerow([dataset, min_entity, max_entity, org_value])
-                            print(f"\033[95mAppended entity range {min_entity}-{max_entity} for {org_value} to {entity_org_file}\033[0m")
-
-            except Exception as e:
-                print(f"Failed to assign entities for resource: {resource}")
-                logging.error(f"Error: {str(e)}", exc_info=True)
-                output_df = pd.concat([output_df, pd.DataFrame([{
-                    "dataset": dataset,
-                    "resource": resource,
-                    "status": "error",
-                    "error_code": type(e).__name__,
-                    "message": str(e)
-                }])], ignore_index=True)
-            finally:
-                print(f"\nCompleted processing for resource: {resource} in {perf_counter() - start_time:.2f} seconds.")
+                    shutil.copy(cache_dir / "assign_entities" / collection_name / "pipeline" / "lookup.csv", Path("pipeline") / collection_name / "lookup.csv")
+                    print(f"\nEntities assigned successfully for resource: {resource}. ")
+                    successful_resources.append(resource_path)
+                    # This resource is the endpoint's previous one next time
+                    _store_fingerprints(fingerprint_store, endpoint, resource, current_resource_df)
+
+                    # After successful entity assignment and duplicate checks append entity range(s) to entity-organisation.csv.
+                    # A single resource can carry rows for more than one organisation (e.g. a
+                    # multi-authority endpoint), so entities must be grouped by their *actual*
+                    # organisation rather than assumed to all belong to `organisation_name` -
+                    # otherwise entities for other organisations end up with no registered range.
+                    with tracing.span('lookup_reparse') as s:
+                        post_lookup_df = pd.read_csv(lookup_path, dtype=str)
+                        post_dataset_df = post_lookup_df[post_lookup_df["prefix"] == dataset].dropna(subset=["entity"])
+                        post_entity_org = (
+                            post_dataset_df.assign(entity=post_dataset_df["entity"].astype(int))
+                            .drop_duplicates("entity")
+                            .set_index("entity")["organisation"]
+                            .to_dict()
+                        )
+                        new_dataset_entities = set(post_entity_org) - pre_dataset_entities
+                        s.count(rows=len(post_lookup_df), new_entities=len(new_dataset_entities))
+                    if new_dataset_entities:
+                        entity_org_file = Path("pipeline") / collection_name / "entity-organisation.csv"
+                        with tracing.span('entity_organisation_append') as s:
+                            for org_value, min_entity, max_entity in _contiguous_ranges_by_org(new_dataset_entities, post_entity_org):
+                                # Hard code single exception for conservation-area dataset org HE
+                                if dataset == "conservation-area" and org_value == "government-organisation:PB1164":
+                                    continue
+                                with open(entity_org_file, "a", newline="") as f:
+                                    writer = csv.writer(f)
+                                    writer.writerow([dataset, min_entity, max_entity, org_value])
+                                    s.count(ranges=1)
+                                    print(f"\033[95mAppended entity range {min_entity}-{max_entity} for {org_value} to {entity_org_file}\033[0m")
+
+                except Exception as e:
+                    print(f"Failed to assign entities for resource: {resource}")
+                    logging.error(f"Error: {str(e)}", exc_info=True)
+                    output_df = pd.concat([output_df, pd.DataFrame([{
+                        "dataset": dataset,
+                        "resource": resource,
+                        "status": "error",
+                        "error_code": type(e).__name__,
+                        "message": str(e)
+                    }])], ignore_index=True)
+                finally:
+                    print(f"\nCompleted processing for resource: {resource} in {perf_counter() - start_time:.2f} seconds.")
     finally:
+        fingerprint_store.close()
         summary_filename = (
             f"batch_assign_summary_{scope}_batch_{start_batch}.csv"
             if batch_size > 0
@@ -747,6 +855,11 @@ def process_csv(scope, resource_dir, issue_summary_df, cache_dir, new_entity_thr
             print(f"Resource: {resource} - Error: {error}")
     if not failed_downloads and output_df.empty:
         print("All operations completed successfully.")
+
+    print("\n--- Timing Report ---")
+    print(tracing.summary())
+    print(session.summary())
+    print(fingerprint_store.summary())
     return failed_downloads, output_df
 
 
@@ -772,7 +885,9 @@ def run_batch_assign_entities(
     commit: bool = True,
     batch_size: int = 0,
     start_batch: int = 1,
+    trace_file: Optional[str] = None,
 ):
+    tracing.configure(trace_file)
     endpoint_issue_summary_path = "https://datasette.planning.data.gov.uk/performance/endpoint_dataset_issue_type_summary.csv?_sort=rowid&issue_type__exact=unknown+entity&_size=max"
 
     response = requests.get(endpoint_issue_summary_path)
@@ -813,6 +928,7 @@ def run_batch_assign_entities(
     issue_summary_df=issue_summary_df.loc[
         (issue_summary_df["issue_type"].str.lower() == "unknown entity") &
         (issue_summary_df["scope"].str.lower() == scope) &
+        # title-boundary's lookup lives in s3 until it is migrated to pipeline/title-boundary/lookup/ shards
         (issue_summary_df["dataset"].str.lower() != "title-boundary")
     ]
 
@@ -857,7 +973,9 @@ def run_batch_assign_entities(
     cache_dir_path.mkdir(parents=True, exist_ok=True)
     url_map["https://files.planning.data.gov.uk/organisation-collection/dataset/organisation.csv"] = str(cache_dir_path / "organisation.csv")
     
-    download_urls(url_map, max_threads=4)
+    with tracing.span('download_urls') as s:
+        download_urls(url_map, max_threads=4)
+        s.count(files=len(url_map))
 
     try:
         failed_downloads, output_df = process_csv(
@@ -948,6 +1066,12 @@ def run_batch_assign_entities(
     show_default=True,
     help="1-indexed batch number to start from. Use with --batch-size to resume a failed run.",
 )
+@click.option(
+    "--trace-file",
+    default=None,
+    type=click.Path(dir_okay=False),
+    help="Append per-stage timings and row counts to this JSONL file.",
+)
 
 def main(
     scope: str = 'odp',
@@ -959,6 +1083,7 @@ def main(
     commit: bool = True,
     batch_size: int = 0,
     start_batch: int = 1,
+    trace_file: Optional[str] = None,
 ) -> None:
     # Print input options so the command and options used are visible
     print("Input options:")
@@ -971,19 +1096,24 @@ def main(
     print(f"  commit={commit}")
     print(f"  batch_size={batch_size}")
     print(f"  start_batch={start_batch}")
+    print(f"  trace_file={trace_file}")
 
     cache_dir = Path(cache_dir)
-    run_batch_assign_entities(
-        scope=scope,
-        cache_dir=cache_dir,
-        new_entity_threshold=new_entity_threshold,
-        resources=resources,
-        skip_checks=skip_checks,
-        triggered_by=triggered_by,
-        commit=commit,
-        batch_size=batch_size,
-        start_batch=start_batch,
-    )
+    try:
+        run_batch_assign_entities(
+            scope=scope,
+            cache_dir=cache_dir,
+            new_entity_threshold=new_entity_threshold,
+            resources=resources,
+            skip_checks=skip_checks,
+            triggered_by=triggered_by,
+            commit=commit,
+            batch_size=batch_size,
+            start_batch=start_batch,
+            trace_file=trace_file,
+        )
+    finally:
+        tracing.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
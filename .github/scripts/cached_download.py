@@ -0,0 +1,215 @@
+"""
+Resumable, cached downloads for large reporting feeds.
+
+Files are kept in a local cache directory alongside a small JSON sidecar
+recording the ETag and Last-Modified headers they were served with:
+
+- a cached file is revalidated with If-None-Match / If-Modified-Since, so an
+  unchanged feed costs one 304 response rather than a full transfer
+- an interrupted transfer leaves a `.part` file that the next attempt resumes
+  with a Range request (guarded by If-Range, so a feed that changed mid-way is
+  restarted rather than spliced)
+- a completed transfer is checked against the expected length and, where the
+  ETag is a plain MD5 (single-part S3 uploads), against the content hash
+"""
+
+import hashlib
+import http.client
+import json
+import re
+import socket
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+MAX_RETRIES = 3
+TIMEOUT_SECONDS = 120
+INITIAL_BACKOFF = 2  # seconds
+CHUNK_SIZE = 8 * 1024 * 1024  # 8MB reads
+LOG_EVERY_BYTES = 500 * 1024 * 1024
+
+MD5_ETAG_RE = re.compile(r'^"?([0-9a-f]{32})"?$')
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+|\*)$')
+
+
+class DownloadIntegrityError(Exception):
+    """A completed download did not match the size or hash the server advertised."""
+
+
+class IncompleteDownload(Exception):
+    """The connection closed before the advertised length arrived; the partial file is kept."""
+
+
+RETRYABLE_ERRORS = (
+    IncompleteDownload,
+    urllib.error.URLError,
+    http.client.IncompleteRead,
+    ConnectionError,
+    socket.timeout,
+)
+
+
+def _read_json(path):
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _write_json(path, data):
+    path.write_text(json.dumps(data, indent=2), encoding='utf-8')
+
+
+def _validators(headers):
+    return {
+        'etag': headers.get('ETag', ''),
+        'last-modified': headers.get('Last-Modified', ''),
+    }
+
+
+def _expected_md5(etag):
+    match = MD5_ETAG_RE.match(etag or '')
+    return match.group(1) if match else None
+
+
+def _file_md5(path):
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_paths(url, cache_dir, filename):
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    path = cache_dir / (filename or url.rstrip('/').split('/')[-1])
+    return (
+        path,
+        path.with_name(path.name + '.json'),
+        path.with_name(path.name + '.part'),
+        path.with_name(path.name + '.part.json'),
+    )
+
+
+def _build_request(url, meta, part_path, part_meta):
+    headers = {}
+    offset = 0
+    if part_path.exists() and part_meta.get('url') == url:
+        offset = part_path.stat().st_size
+        validator = part_meta.get('etag') or part_meta.get('last-modified')
+        if offset and validator:
+            headers['Range'] = f'bytes={offset}-'
+            headers['If-Range'] = validator
+        else:
+            offset = 0
+    elif meta.get('url') == url:
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last-modified'):
+            headers['If-Modified-Since'] = meta['last-modified']
+    return urllib.request.Request(url, headers=headers), offset
+
+
+def _transfer(response, part_path, offset):
+    """Write the response body to the partial file, appending when resuming at `offset`.
+
+    Returns the total number of bytes the complete file should have, or None if
+    the server did not say.
+    """
+    if response.status == 206:
+        match = CONTENT_RANGE_RE.match(response.headers.get('Content-Range', ''))
+        if not match or int(match.group(1)) != offset:
+            raise DownloadIntegrityError(
+                f"Unexpected Content-Range {response.headers.get('Content-Range')!r} for offset {offset}"
+            )
+        total = None if match.group(3) == '*' else int(match.group(3))
+        mode = 'ab'
+        print(f"  Resuming download at {offset / 1024 / 1024:.1f} MB...")
+    else:
+        length = response.headers.get('Content-Length')
+        total = int(length) if length else None
+        mode = 'wb'
+        offset = 0
+
+    written = offset
+    next_log = written + LOG_EVERY_BYTES
+    with open(part_path, mode) as f:
+        while True:
+            chunk = response.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            f.write(chunk)
+            written += len(chunk)
+            if written >= next_log:
+                print(f"  Downloaded {written / 1024 / 1024:.1f} MB...")
+                next_log += LOG_EVERY_BYTES
+    return total
+
+
+def _verify(part_path, total, etag):
+    size = part_path.stat().st_size
+    if total is not None and size < total:
+        raise IncompleteDownload(f"Connection closed after {size} of {total} bytes")
+    if total is not None and size != total:
+        raise DownloadIntegrityError(f"Downloaded {size} bytes, expected {total}")
+    expected = _expected_md5(etag)
+    if expected and _file_md5(part_path) != expected:
+        raise DownloadIntegrityError(f"MD5 of downloaded file does not match ETag {etag}")
+
+
+def download_with_cache(url, cache_dir, filename=None, max_retries=MAX_RETRIES,
+                        timeout=TIMEOUT_SECONDS, initial_backoff=INITIAL_BACKOFF):
+    """Return a local path holding the current contents of `url`.
+
+    Uses the cached copy when the server reports it unchanged, and resumes any
+    partial transfer left by an earlier failure.
+    """
+    path, meta_path, part_path, part_meta_path = _cache_paths(url, cache_dir, filename)
+
+    for attempt in range(1, max_retries + 1):
+        meta = _read_json(meta_path) if path.exists() else {}
+        part_meta = _read_json(part_meta_path)
+        request, offset = _build_request(url, meta, part_path, part_meta)
+        try:
+            print(f"Attempt {attempt}/{max_retries} to download {url}...")
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                validators = _validators(response.headers)
+                if response.status == 200 or not part_meta:
+                    # A fresh transfer: remember what we're downloading so it can be resumed
+                    _write_json(part_meta_path, {'url': url, **validators})
+                total = _transfer(response, part_path, offset)
+
+            _verify(part_path, total, validators['etag'])
+            part_path.replace(path)
+            part_meta_path.unlink(missing_ok=True)
+            _write_json(meta_path, {'url': url, **validators, 'size': path.stat().st_size})
+            print(f"Downloaded {path.stat().st_size / 1024 / 1024:.1f} MB to {path}")
+            return path
+
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                print(f"{url} unchanged since last download, using cached copy at {path}")
+                return path
+            if e.code == 416:
+                # The partial file no longer lines up with the remote one; start again
+                part_path.unlink(missing_ok=True)
+                part_meta_path.unlink(missing_ok=True)
+            elif e.code < 500 and e.code != 429:
+                raise
+            error = e
+        except DownloadIntegrityError as e:
+            part_path.unlink(missing_ok=True)
+            part_meta_path.unlink(missing_ok=True)
+            error = e
+        except RETRYABLE_ERRORS as e:
+            error = e
+
+        if attempt == max_retries:
+            print(f"Error: Failed to download after {max_retries} attempts: {error}")
+            raise error
+        backoff = initial_backoff * (2 ** (attempt - 1))
+        print(f"Download error (attempt {attempt}): {error}")
+        print(f"Retrying in {backoff} seconds...")
+        time.sleep(backoff)
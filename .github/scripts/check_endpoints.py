@@ -1,37 +1,64 @@
 import requests
 import csv
+import json
+import threading
 from datetime import datetime, timedelta, timezone
-from io import StringIO
-import urllib.parse
+from pathlib import Path
+from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
 
+import datasette
+from datasette import chunked, sql_in_list
+
 NUMBER_OF_DAYS_BACK_TO_CHECK = 7
 
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+COLLECTION_DIR = REPO_ROOT / "collection"
+DATASETTE_URL = f"{datasette.DATASETTE_URL}/digital-land.json"
+REPORT_PATH = Path("endpoint_check_report.json")
 
-def csv_to_json(csv_text):
-    reader = csv.DictReader(StringIO(csv_text))
-    return list(reader)
+# Endpoint hashes are 64 characters, so 50 per query keeps the URL well under
+# the usual 8KB limit while still replacing 50 round trips with one.
+CHUNK_SIZE = 50
+MAX_WORKERS = 4
+REQUESTS_PER_SECOND = 4
+REQUEST_TIMEOUT = 30
 
 
-def get_dataset_names():
-    url = "https://api.github.com/repos/digital-land/config/contents/collection"
-    response = requests.get(url)
-    response.raise_for_status()
-    data = response.json()
-    return [item['name'] for item in data if item['type'] == 'dir']
+class RateLimiter:
+    """Spaces calls out so no more than `rate` start in any one second, across threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self.lock = threading.Lock()
+        self.next_slot = 0.0
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
 
+def read_csv_rows(path):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return list(csv.DictReader(f))
 
-def get_filtered_endpoints(dataset_name, days_ago=NUMBER_OF_DAYS_BACK_TO_CHECK):
-    csv_url = (
-        f"https://raw.githubusercontent.com/digital-land/config/refs/heads/main/"
-        f"collection/{dataset_name}/endpoint.csv"
-    )
-    response = requests.get(csv_url)
-    if response.status_code != 200:
+
+def get_dataset_names(collection_dir=COLLECTION_DIR):
+    return sorted(p.name for p in Path(collection_dir).iterdir() if p.is_dir())
+
+
+def get_filtered_endpoints(dataset_name, days_ago=NUMBER_OF_DAYS_BACK_TO_CHECK, collection_dir=COLLECTION_DIR):
+    endpoint_path = Path(collection_dir) / dataset_name / "endpoint.csv"
+    if not endpoint_path.exists():
         print(f"{dataset_name} - ⚠️ No endpoint.csv found")
         return []
 
-    rows = csv_to_json(response.text)
+    rows = read_csv_rows(endpoint_path)
     cutoff_date = datetime.now(timezone.utc) - timedelta(days=days_ago)
     filtered = []
     for row in rows:
@@ -40,7 +67,7 @@ def get_filtered_endpoints(dataset_name, days_ago=NUMBER_OF_DAYS_BACK_TO_CHECK):
         if not endpoint or not entry_date:
             continue
         try:
-            dt = datetime.fromisoformat(entry_date)
+            dt = datetime.fromisoformat(entry_date.replace("Z", "+00:00"))
         except ValueError:
             print(f"{dataset_name} - ⚠️ Invalid date format for endpoint {endpoint}: {entry_date}")
             continue
@@ -55,22 +82,18 @@ def get_filtered_endpoints(dataset_name, days_ago=NUMBER_OF_DAYS_BACK_TO_CHECK):
     return filtered
 
 
-def get_sources(dataset_name):
-    csv_url = (
-        f"https://raw.githubusercontent.com/digital-land/config/refs/heads/main/"
-        f"collection/{dataset_name}/source.csv"
-    )
-    response = requests.get(csv_url)
-    if response.status_code != 200:
+def get_sources(dataset_name, collection_dir=COLLECTION_DIR):
+    source_path = Path(collection_dir) / dataset_name / "source.csv"
+    if not source_path.exists():
         print(f"{dataset_name} - ⚠️ No source.csv found")
         return {}
 
-    rows = csv_to_json(response.text)
+    rows = read_csv_rows(source_path)
     sources = {}
     for row in rows:
         endpoint = row.get('endpoint')
-        organisation = row.get('organisation', '').strip()
-        pipeline = row.get('pipeline', '').strip()
+        organisation = (row.get('organisation') or '').strip()
+        pipeline = (row.get('pipelines') or row.get('pipeline') or '').strip()
         if not endpoint:
             continue
         if endpoint not in sources:
@@ -82,54 +105,123 @@ def get_sources(dataset_name):
     return sources
 
 
-def check_endpoints(dataset_name):
-    base_api = (
-        "https://datasette.planning.data.gov.uk/digital-land/endpoint.json"
-        "?_sort=endpoint&endpoint__exact="
-    )
-    endpoints = get_filtered_endpoints(dataset_name)
-    failed = []
-    sources = get_sources(dataset_name)
-
-    for row in endpoints:
-        endpoint = row['endpoint']
-        encoded = urllib.parse.quote(endpoint)
-        url = base_api + encoded
-        entry = sources.get(endpoint, {})
-        org_label = ', '.join(sorted(entry.get('organisations', set()))) or 'Unknown org'
-        pipe_label = ', '.join(sorted(entry.get('pipelines', set()))) or ''
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json().get('rows', [])
-            if data:
-                print(f"{dataset_name} - {org_label} [{pipe_label}] - {endpoint}: ✅ found")
-            else:
-                print(f"{dataset_name} - {org_label} [{pipe_label}] - {endpoint}: ⚠️ not found")
-                failed.append(endpoint)
-        except Exception as e:
-            print(f"{dataset_name} - {org_label} [{pipe_label}] - {endpoint}: ❗ Error {e}")
-            failed.append(endpoint)
-    return failed
+def query_known_endpoints(endpoints, session=None, limiter=None):
+    """Return the subset of `endpoints` present in the platform's endpoint table, in one query."""
+    session = session or requests
+    if limiter:
+        limiter.wait()
+    sql = f"SELECT endpoint FROM endpoint WHERE endpoint IN ({sql_in_list(endpoints)})"
+    url = f"{DATASETTE_URL}?{urlencode({'sql': sql, '_shape': 'array'})}"
+    response = session.get(url, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return {row['endpoint'] for row in response.json()}
+
+
+def collect_new_endpoints(dataset_names, days_ago=NUMBER_OF_DAYS_BACK_TO_CHECK, collection_dir=COLLECTION_DIR):
+    """Gather recently added endpoints from the local collection tree, with their source labels."""
+    entries = []
+    for dataset_name in dataset_names:
+        endpoints = get_filtered_endpoints(dataset_name, days_ago, collection_dir)
+        if not endpoints:
+            continue
+        sources = get_sources(dataset_name, collection_dir)
+        for row in endpoints:
+            endpoint = row['endpoint']
+            entry = sources.get(endpoint, {})
+            entries.append({
+                'dataset': dataset_name,
+                'endpoint': endpoint,
+                'organisations': sorted(entry.get('organisations', set())),
+                'pipelines': sorted(entry.get('pipelines', set())),
+            })
+    return entries
+
+
+def check_endpoints(entries, session=None, chunk_size=CHUNK_SIZE, max_workers=MAX_WORKERS,
+                    requests_per_second=REQUESTS_PER_SECOND):
+    """Check every entry against Datasette, one batched query per chunk, run concurrently.
+
+    Returns the entries annotated with `status` ('found', 'not-found' or 'error')
+    and, for errors, the `error` message.
+    """
+    limiter = RateLimiter(requests_per_second)
+    unique_endpoints = sorted({entry['endpoint'] for entry in entries})
+    status = {}
+    errors = {}
+
+    with ThreadPoolExecutor(max_workers) as executor:
+        futures = {
+            executor.submit(query_known_endpoints, chunk, session, limiter): chunk
+            for chunk in chunked(unique_endpoints, chunk_size)
+        }
+        for future in as_completed(futures):
+            chunk = futures[future]
+            try:
+                found = future.result()
+            except Exception as e:
+                for endpoint in chunk:
+                    status[endpoint] = 'error'
+                    errors[endpoint] = str(e)
+                continue
+            for endpoint in chunk:
+                status[endpoint] = 'found' if endpoint in found else 'not-found'
+
+    results = []
+    for entry in entries:
+        result = dict(entry, status=status[entry['endpoint']])
+        if entry['endpoint'] in errors:
+            result['error'] = errors[entry['endpoint']]
+        results.append(result)
+    return results
+
+
+def print_results(results):
+    icons = {'found': '✅ found', 'not-found': '⚠️ not found'}
+    for result in results:
+        org_label = ', '.join(result['organisations']) or 'Unknown org'
+        pipe_label = ', '.join(result['pipelines'])
+        outcome = icons.get(result['status']) or f"❗ Error {result.get('error')}"
+        print(f"{result['dataset']} - {org_label} [{pipe_label}] - {result['endpoint']}: {outcome}")
+
+
+def build_report(results, days_ago=NUMBER_OF_DAYS_BACK_TO_CHECK):
+    failed = [r for r in results if r['status'] != 'found']
+    return {
+        'checked-at': datetime.now(timezone.utc).isoformat(),
+        'days-back': days_ago,
+        'checked': len(results),
+        'found': len(results) - len(failed),
+        'failed': len(failed),
+        'endpoints': results,
+    }
 
 
 def main():
     print(f"Checking endpoints for {NUMBER_OF_DAYS_BACK_TO_CHECK} days back...")
-    failedEndpoints = []
-    dataset_names = get_dataset_names()
+    start = time.perf_counter()
 
-    for dataset_name in dataset_names:
-        failures = check_endpoints(dataset_name)
-        if failures:
-            failedEndpoints.extend(failures)
-            print(f"{dataset_name} - Failed endpoints: {', '.join(failures)}")
-        time.sleep(1)
+    entries = collect_new_endpoints(get_dataset_names())
+    with requests.Session() as session:
+        results = check_endpoints(entries, session=session)
+    print_results(results)
+
+    report = build_report(results)
+    REPORT_PATH.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Checked {report['checked']} endpoint(s) in {time.perf_counter() - start:.2f} seconds, "
+          f"report written to {REPORT_PATH}")
+
+    failed_by_dataset = {}
+    for result in results:
+        if result['status'] != 'found':
+            failed_by_dataset.setdefault(result['dataset'], []).append(result['endpoint'])
+    for dataset_name, failures in failed_by_dataset.items():
+        print(f"{dataset_name} - Failed endpoints: {', '.join(failures)}")
 
-    if failedEndpoints:
-        raise Exception(f"Failed endpoints: {len(failedEndpoints)}")
+    if report['failed']:
+        raise Exception(f"Failed endpoints: {report['failed']}")
 
     print("Done")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,321 @@
+"""
+Shared in-memory view of the collection/ and pipeline/ configuration CSVs.
+
+    repo = ConfigRepository()
+    lookup = repo.lookup('local-plan')
+    for row in lookup.find('organisation', 'local-authority:ABC'):
+        ...
+    repo.old_entity('local-plan').append({'old-entity': '123', 'status': '410'})
+    repo.flush()
+
+Each table is read on first access and re-read if the file changes on disk,
+unless it has unsaved changes. Indexes on any column are built on demand.
+Changes are held in memory until `flush`, which writes every modified table
+in one go: tables with only new rows are appended to, and tables whose
+existing rows changed are rewritten. A table that changed on disk after it
+was loaded is never overwritten; flush raises ConfigConflictError instead.
+
+Each table has its own lock, held while it is loaded, changed or written, so
+stages running in threads (see evening_pipeline) can share one repository.
+
+A table whose file doesn't exist yet takes its columns from `column_mappings`
+({kind: {filename: 'comma,separated,columns'}}, as create_collection's
+COLUMN_MAPPINGS), if the repository was given one:
+
+    repo = ConfigRepository(REPO_ROOT, COLUMN_MAPPINGS)
+"""
+
+import csv
+import os
+import threading
+from contextlib import ExitStack
+from pathlib import Path
+
+from lookup_index import INDEX_DIR, LookupIndex
+from lookup_table import LookupTable
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+
+
+class ConfigConflictError(Exception):
+    """A table was modified on disk after it was loaded, so saving it would lose changes."""
+
+
+class Table:
+    """One configuration CSV, loaded lazily and indexed on demand."""
+
+    def __init__(self, path, fieldnames=None):
+        self.path = Path(path)
+        self.default_fieldnames = list(fieldnames or [])
+        self._rows = None
+        self._fieldnames = None
+        self._stamp = None
+        self._indexes = {}
+        self._appended = []
+        self._rewrite = False
+        # Re-entrant, as changing a table reads its rows and fieldnames
+        self.lock = threading.RLock()
+
+    def _disk_stamp(self):
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _load(self):
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8', newline='') as f:
+                reader = csv.DictReader(f)
+                self._rows = list(reader)
+                self._fieldnames = list(reader.fieldnames or self.default_fieldnames)
+        else:
+            self._rows = []
+            self._fieldnames = list(self.default_fieldnames)
+        self._stamp = self._disk_stamp()
+        self._indexes = {}
+
+    @property
+    def modified(self):
+        return self._rewrite or bool(self._appended)
+
+    @property
+    def rows(self):
+        """All rows as dicts; reloaded if the file has changed and there are no unsaved changes."""
+        with self.lock:
+            if self._rows is None or (not self.modified and self._disk_stamp() != self._stamp):
+                self._load()
+            return self._rows
+
+    @property
+    def fieldnames(self):
+        self.rows
+        return self._fieldnames
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def index(self, column):
+        """{value: [rows]} for a column, built on first use and kept up to date by append."""
+        with self.lock:
+            rows = self.rows
+            if column not in self._indexes:
+                index = {}
+                for row in rows:
+                    index.setdefault(row.get(column, ''), []).append(row)
+                self._indexes[column] = index
+            return self._indexes[column]
+
+    def find(self, column, value):
+        return self.index(column).get(value, [])
+
+    def get(self, column, value):
+        """First row with `column` equal to `value`, or None."""
+        rows = self.find(column, value)
+        return rows[0] if rows else None
+
+    def values(self, column):
+        """The set of distinct values in a column."""
+        return set(self.index(column))
+
+    def append(self, row):
+        with self.lock:
+            if not self.fieldnames:
+                raise ValueError(f"{self.path} doesn't exist and its columns aren't known")
+            row = {field: '' if row.get(field) is None else str(row.get(field)) for field in self.fieldnames}
+            self.rows.append(row)
+            self._appended.append(row)
+            for column, index in self._indexes.items():
+                index.setdefault(row.get(column, ''), []).append(row)
+            return row
+
+    def extend(self, rows):
+        with self.lock:
+            return [self.append(row) for row in rows]
+
+    def replace(self, rows, fieldnames=None):
+        """Replace every row, and optionally the columns; the file is rewritten on flush."""
+        with self.lock:
+            self.rows
+            self._rows = [dict(row) for row in rows]
+            if fieldnames is not None:
+                self._fieldnames = list(fieldnames)
+            self._indexes = {}
+            self._appended = []
+            self._rewrite = True
+
+    def discard(self):
+        """Drop unsaved changes; the table is reloaded from disk on next use."""
+        with self.lock:
+            self._rows = None
+            self._indexes = {}
+            self._appended = []
+            self._rewrite = False
+
+    def snapshot(self):
+        """The unsaved state, to roll back to with restore()."""
+        with self.lock:
+            if not self.modified:
+                return None
+            # Appended rows are always the last rows, so they're kept as a count
+            return [dict(row) for row in self._rows], list(self._fieldnames), len(self._appended), self._rewrite
+
+    def restore(self, snapshot):
+        """Roll back to a snapshot() (None meaning no unsaved changes)."""
+        with self.lock:
+            if snapshot is None:
+                self.discard()
+                return
+            rows, fieldnames, appended, rewrite = snapshot
+            self._rows = [dict(row) for row in rows]
+            self._fieldnames = list(fieldnames)
+            self._appended = self._rows[len(self._rows) - appended:] if appended else []
+            self._rewrite = rewrite
+            self._indexes = {}
+
+    def mark_changed(self):
+        """Record that rows were edited in place, so the file is rewritten on flush."""
+        with self.lock:
+            self._indexes = {}
+            self._rewrite = True
+
+    def check_unchanged_on_disk(self):
+        if self.modified and self._disk_stamp() != self._stamp:
+            raise ConfigConflictError(f"{self.path} changed on disk since it was loaded")
+
+    def _ends_with_newline(self):
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) in (b'\n', b'\r')
+
+    def flush(self):
+        """Write pending changes; returns True if the file was written."""
+        with self.lock:
+            return self._flush()
+
+    def _flush(self):
+        if not self.modified:
+            return False
+        self.check_unchanged_on_disk()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self._rewrite or self._stamp is None or self._stamp[1] == 0:
+            mode, rows, header = 'w', self._rows, True
+        else:
+            mode, rows, header = 'a', self._appended, False
+            if not self._ends_with_newline():
+                with open(self.path, 'a', encoding='utf-8', newline='') as f:
+                    f.write('\r\n')
+
+        with open(self.path, mode, encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=self._fieldnames, restval='',
+                                    extrasaction='ignore', lineterminator='\r\n')
+            if header:
+                writer.writeheader()
+            # Remove None keys that can appear from malformed CSV rows
+            writer.writerows({k: v for k, v in row.items() if k is not None} for row in rows)
+
+        self._appended = []
+        self._rewrite = False
+        self._stamp = self._disk_stamp()
+        return True
+
+
+class ConfigRepository:
+    """Lazily loaded tables for every collection/<name>/ and pipeline/<name>/ directory."""
+
+    def __init__(self, root=REPO_ROOT, column_mappings=None):
+        self.root = Path(root)
+        self.column_mappings = column_mappings or {}
+        self._tables = {}
+        self._lookup_tables = {}
+        # Stages run in threads by evening_pipeline share one repository
+        self._lock = threading.Lock()
+
+    def datasets(self, kind='pipeline'):
+        """Names of the collection or pipeline directories."""
+        directory = self.root / kind
+        if not directory.exists():
+            return []
+        return sorted(p.name for p in directory.iterdir() if p.is_dir())
+
+    def table(self, kind, name, filename):
+        """The table for `<kind>/<name>/<filename>`, e.g. ('pipeline', 'local-plan', 'lookup.csv')."""
+        key = (kind, name, filename)
+        with self._lock:
+            if key not in self._tables:
+                columns = self.column_mappings.get(kind, {}).get(filename, '')
+                self._tables[key] = Table(self.root / kind / name / filename, columns.split(',') if columns else None)
+            return self._tables[key]
+
+    def endpoint(self, collection):
+        return self.table('collection', collection, 'endpoint.csv')
+
+    def source(self, collection):
+        return self.table('collection', collection, 'source.csv')
+
+    def old_resource(self, collection):
+        return self.table('collection', collection, 'old-resource.csv')
+
+    def lookup(self, pipeline):
+        return self.table('pipeline', pipeline, 'lookup.csv')
+
+    def lookup_table(self, pipeline):
+        """Read-only, compact LookupTable of the pipeline's lookup.csv.
+
+        Loaded straight from disk (and reloaded when the file changes) unless the
+        lookup table has unsaved rows, in which case it is built from those.
+        """
+        table = self.lookup(pipeline)
+        if table.modified:
+            return LookupTable.from_rows(table.rows, table.fieldnames)
+        stamp = table._disk_stamp()
+        cached = self._lookup_tables.get(pipeline)
+        if cached is None or cached[0] != stamp:
+            compact = LookupTable.from_csv(table.path) if stamp else LookupTable(table.default_fieldnames)
+            self._lookup_tables[pipeline] = cached = (stamp, compact)
+        return cached[1]
+
+    def lookup_prefix(self, pipeline, prefix):
+        """Rows of one prefix of the pipeline's lookup.csv, without parsing the other prefixes.
+
+        Read through the on-disk prefix index unless the lookup table is already
+        loaded (or has unsaved rows), in which case its rows are filtered.
+        """
+        table = self.lookup(pipeline)
+        if table._rows is not None or not table.path.exists():
+            return [row for row in table.rows if row.get('prefix') == prefix]
+        with LookupIndex(table.path, self.root / INDEX_DIR.relative_to(REPO_ROOT)) as index:
+            return index.rows(prefix)
+
+    def old_entity(self, pipeline):
+        return self.table('pipeline', pipeline, 'old-entity.csv')
+
+    def entity_organisation(self, pipeline):
+        return self.table('pipeline', pipeline, 'entity-organisation.csv')
+
+    def column(self, pipeline):
+        return self.table('pipeline', pipeline, 'column.csv')
+
+    def modified_tables(self):
+        with self._lock:
+            tables = list(self._tables.values())
+        return [table for table in tables if table.modified]
+
+    def flush(self):
+        """Write every modified table; returns the paths written.
+
+        All tables are checked for on-disk changes before any is written, so a
+        conflict leaves every file untouched. Every modified table is locked,
+        in path order, until all are written.
+        """
+        tables = sorted(self.modified_tables(), key=lambda table: str(table.path))
+        with ExitStack() as stack:
+            for table in tables:
+                stack.enter_context(table.lock)
+            for table in tables:
+                table.check_unchanged_on_disk()
+            return [table.path for table in tables if table.flush()]
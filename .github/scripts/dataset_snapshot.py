@@ -0,0 +1,116 @@
+"""
+Local snapshots of published dataset CSVs, loaded a column at a time.
+
+The CSV is fetched through cached_download, so an unchanged dataset costs a
+single conditional request. Each download is then split into a columnar
+snapshot: one JSON array per column, under var/cache/datasets/columns/<name>/,
+rebuilt only when the CSV changes. The snapshot is written a row at a time,
+and callers name the columns they need and get rows holding just those, so
+wide datasets (geometry, notes, etc.) are never held in memory as a whole.
+
+    rows = load_rows(url, ['entity', 'quality', 'organisation-entity'], types={'entity': int})
+"""
+
+import csv
+import json
+import sys
+import urllib.parse
+from contextlib import ExitStack
+from pathlib import Path
+
+from cached_download import download_with_cache
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+SNAPSHOT_DIR = REPO_ROOT / 'var' / 'cache' / 'datasets'
+# Bumped when the snapshot layout changes, so older snapshots are rebuilt
+SNAPSHOT_VERSION = 2
+
+# Some published datasets carry large geometry fields
+csv.field_size_limit(sys.maxsize)
+
+
+def _column_filename(column):
+    # Escaped and suffixed so no column name can clash with another or with snapshot.json
+    return urllib.parse.quote(column, safe='') + '.column.json'
+
+
+def _source_stamp(csv_path):
+    stat = csv_path.stat()
+    return {'version': SNAPSHOT_VERSION, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def build_snapshot(csv_path, snapshot_dir):
+    """Split a CSV into one JSON array per column, a row at a time; returns the column names."""
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    rows = 0
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f, ExitStack() as stack:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        # A repeated column name keeps its last values, as csv.DictReader does
+        indexes = {column: i for i, column in enumerate(header)}
+        outputs = {
+            column: stack.enter_context(open(snapshot_dir / _column_filename(column), 'w', encoding='utf-8'))
+            for column in indexes
+        }
+        for output in outputs.values():
+            output.write('[')
+        for row in reader:
+            separator = ', ' if rows else ''
+            for column, i in indexes.items():
+                outputs[column].write(separator + json.dumps(row[i] if i < len(row) else ''))
+            rows += 1
+        for output in outputs.values():
+            output.write(']')
+
+    meta = {'columns': header, 'rows': rows, **_source_stamp(csv_path)}
+    with open(snapshot_dir / 'snapshot.json', 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    return header
+
+
+def snapshot(url, cache_dir=SNAPSHOT_DIR, name=None):
+    """Refresh the snapshot of `url` if needed; returns (snapshot_dir, meta)."""
+    cache_dir = Path(cache_dir)
+    name = name or url.rstrip('/').split('/')[-1]
+    csv_path = download_with_cache(url, cache_dir / 'csv', filename=name)
+    snapshot_dir = cache_dir / 'columns' / Path(name).stem
+
+    meta = {}
+    meta_path = snapshot_dir / 'snapshot.json'
+    if meta_path.exists():
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    if {k: meta.get(k) for k in ('version', 'size', 'mtime_ns')} != _source_stamp(csv_path):
+        print(f"Building column snapshot of {name}...")
+        build_snapshot(csv_path, snapshot_dir)
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    return snapshot_dir, meta
+
+
+def load_columns(url, columns, types=None, cache_dir=SNAPSHOT_DIR, name=None):
+    """Return {column: [values]} for the requested columns of a dataset.
+
+    Columns the dataset doesn't have come back as empty strings, matching
+    `row.get(column, '')` on a csv.DictReader row. `types` maps a column to a
+    callable applied to each of its values, e.g. {'entity': int}.
+    """
+    types = types or {}
+    snapshot_dir, meta = snapshot(url, cache_dir, name)
+    loaded = {}
+    for column in columns:
+        if column in meta['columns']:
+            with open(snapshot_dir / _column_filename(column), 'r', encoding='utf-8') as f:
+                values = json.load(f)
+        else:
+            values = [''] * meta['rows']
+        if column in types:
+            values = [types[column](value) for value in values]
+        loaded[column] = values
+    return loaded
+
+
+def load_rows(url, columns, types=None, cache_dir=SNAPSHOT_DIR, name=None):
+    """Return the dataset as a list of dicts holding just `columns`."""
+    loaded = load_columns(url, columns, types, cache_dir, name)
+    return [dict(zip(columns, values)) for values in zip(*(loaded[column] for column in columns))]
@@ -0,0 +1,59 @@
+"""
+Helpers for SQL queries against datasette.planning.data.gov.uk.
+
+    sql = f"SELECT endpoint, resource FROM ... WHERE endpoint IN ({sql_in_list(chunk)}) ORDER BY endpoint, resource"
+    for row in iter_datasette_query('performance', sql):
+        ...
+
+iter_datasette_query pages through results with LIMIT/OFFSET. SQLite only
+returns rows in a repeatable order when the ORDER BY is a total order, so a
+paged query must order by columns that are unique together, or by every
+column it selects; otherwise pages can skip or repeat rows.
+"""
+
+import json
+import urllib.parse
+import urllib.request
+
+DATASETTE_URL = 'https://datasette.planning.data.gov.uk'
+PAGE_SIZE = 1000
+
+
+def iter_datasette_query(database, sql, page_size=PAGE_SIZE):
+    """Execute a SQL query against Datasette, yielding rows a page at a time.
+
+    `sql` must end in an ORDER BY giving a total order; see the module docstring.
+    """
+    if 'ORDER BY' not in sql.upper():
+        raise ValueError("Paged Datasette queries need an ORDER BY giving a total order")
+    offset = 0
+
+    while True:
+        paginated_sql = f"{sql} LIMIT {page_size} OFFSET {offset}"
+        url = f"{DATASETTE_URL}/{database}.json"
+        params = urllib.parse.urlencode({"sql": paginated_sql, "_shape": "array"})
+
+        try:
+            with urllib.request.urlopen(f"{url}?{params}") as response:
+                data = json.loads(response.read().decode('utf-8'))
+        except Exception as e:
+            print(f"Error executing query: {e}")
+            raise
+
+        yield from data
+
+        # If we got fewer than a full page, we've reached the end
+        if len(data) < page_size:
+            break
+
+        offset += page_size
+
+
+def sql_in_list(values):
+    """Quote values for use in a SQL IN (...) clause."""
+    return ', '.join("'" + str(value).replace("'", "''") + "'" for value in values)
+
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
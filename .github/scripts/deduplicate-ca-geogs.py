@@ -9,127 +9,127 @@ for conservation areas with:
 """
 
 import csv
-import urllib.request
 from datetime import datetime
 from pathlib import Path
-from rapidfuzz import fuzz
-import time
-import tempfile
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from cached_download import download_with_cache
+from config_repository import ConfigRepository
+from redirect_graph import RedirectGraph
 
 CHECKS_URL = 'https://files.planning.data.gov.uk/reporting/duplicate_entity_expectation.csv'
 REPO_ROOT = Path(__file__).resolve().parent.parent.parent
 OLD_ENTITY_PATH = REPO_ROOT / 'pipeline' / 'conservation-area' / 'old-entity.csv'
+CACHE_DIR = REPO_ROOT / 'var' / 'cache' / 'reporting'
 
 # Network retry configuration
 MAX_RETRIES = 3
 TIMEOUT_SECONDS = 120  # 120 seconds for GitHub Actions environment
 INITIAL_BACKOFF = 2  # seconds
-CHUNK_SIZE = 104857600  # 100MB chunks
 
 
-def stream_checks_data():
-    """Download and stream the duplicate checks data from URL with retry logic."""
-    print("Loading duplicate geometry checks...")
+# Columns we actually need for deduplication (excludes the large geometry fields)
+NEEDED_COLUMNS = [
+    'message', 'dataset', 'entity_a', 'entity_b',
+    'entity_a_name', 'entity_b_name', 'lookup_org_a', 'lookup_org_b', 'in_odp'
+]
+DATASET = 'conservation-area'
+HISTORIC_ENGLAND_ORG = 'government-organisation:PB1164'
+SIMILARITY_THRESHOLD = 85  # Similarity threshold (0-100)
+
+
+def download_checks_data():
+    """Fetch the duplicate checks data into the local cache, resuming partial downloads.
+
+    Unchanged feeds are revalidated with a conditional request and not downloaded again.
+    """
+    return download_with_cache(
+        CHECKS_URL,
+        CACHE_DIR,
+        max_retries=MAX_RETRIES,
+        timeout=TIMEOUT_SECONDS,
+        initial_backoff=INITIAL_BACKOFF,
+    )
+
+
+def iter_candidate_rows(path, dataset=DATASET):
+    """Stream rows from the checks file, keeping only possible redirects for `dataset`.
+
+    Rows are filtered on dataset, message and organisation while parsing, and only
+    NEEDED_COLUMNS are kept, so memory stays flat however large the feed is. Short
+    rows are padded with empty values.
+    """
     # Increase field size limit for large geometry fields
     csv.field_size_limit(int(1e8))
 
-    for attempt in range(1, MAX_RETRIES + 1):
-        temp_file = None
-        try:
-            print(f"Attempt {attempt}/{MAX_RETRIES} to download duplicate checks data...")
-            bytes_downloaded = 0
-
-            # Download to a temporary file instead of memory
-            temp_file = tempfile.NamedTemporaryFile(mode='wb', delete=False, suffix='.csv')
-            temp_path = temp_file.name
-
-            with urllib.request.urlopen(CHECKS_URL, timeout=TIMEOUT_SECONDS) as response:
-                while True:
-                    chunk = response.read(CHUNK_SIZE)
-                    if not chunk:
-                        break
-                    temp_file.write(chunk)
-                    bytes_downloaded += len(chunk)
-                    if bytes_downloaded % (500 * 1024 * 1024) == 0:  # Log every ~500MB
-                        print(f"  Downloaded {bytes_downloaded / 1024 / 1024:.1f} MB...")
-
-            temp_file.close()
-            print(f"Successfully downloaded {bytes_downloaded / 1024 / 1024:.1f} MB to disk")
-
-            # Now read the file and parse rows, keeping only needed columns
-            print("Parsing records...")
-            rows = []
-            rows_processed = 0
-
-            # Columns we actually need for deduplication
-            needed_columns = {
-                'message', 'dataset', 'entity_a', 'entity_b',
-                'entity_a_name', 'entity_b_name', 'lookup_org_a', 'lookup_org_b', 'in_odp'
-            }
-
-            with open(temp_path, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    # Filter to only keep needed columns (excludes geometry fields)
-                    filtered_row = {k: v for k, v in row.items() if k in needed_columns}
-                    rows.append(filtered_row)
-                    rows_processed += 1
-                    if rows_processed % 10000 == 0:
-                        print(f"  Processed {rows_processed} records...")
-
-            print(f"Loaded {len(rows)} records")
-
-            # Clean up temp file
-            Path(temp_path).unlink()
-
-            return rows
-
-        except urllib.error.URLError as e:
-            if temp_file:
-                try:
-                    temp_file.close()
-                    Path(temp_file.name).unlink()
-                except:
-                    pass
-            if attempt == MAX_RETRIES:
-                print(f"Error: Failed to download after {MAX_RETRIES} attempts: {e}")
-                raise
-            backoff = INITIAL_BACKOFF * (2 ** (attempt - 1))
-            print(f"Network error (attempt {attempt}): {e}")
-            print(f"Retrying in {backoff} seconds...")
-            time.sleep(backoff)
-        except Exception as e:
-            if temp_file:
-                try:
-                    temp_file.close()
-                    Path(temp_file.name).unlink()
-                except:
-                    pass
-            print(f"Error loading checks data: {e}")
-            raise
-
-
-def load_old_entity():
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        index = {name: header.index(name) for name in NEEDED_COLUMNS if name in header}
+        missing = [name for name in ('message', 'dataset', 'lookup_org_a') if name not in index]
+        if missing:
+            raise ValueError(f"Checks data is missing column(s): {', '.join(missing)}")
+
+        message_i, dataset_i, org_a_i = index['message'], index['dataset'], index['lookup_org_a']
+        org_b_i = index.get('lookup_org_b')
+        row_length = max(index.values()) + 1
+        rows_processed = 0
+
+        for values in reader:
+            rows_processed += 1
+            if rows_processed % 100000 == 0:
+                print(f"  Processed {rows_processed} records...")
+            if len(values) < row_length:
+                values += [''] * (row_length - len(values))
+            if values[dataset_i] != dataset or values[org_a_i] != HISTORIC_ENGLAND_ORG:
+                continue
+            if values[message_i] not in ('complete_match', 'single_match'):
+                continue
+            if org_b_i is not None and values[org_b_i] == HISTORIC_ENGLAND_ORG:
+                continue
+            yield {name: values[i] for name, i in index.items()}
+
+        print(f"Scanned {rows_processed} records")
+
+
+def route_checks_rows(rows):
+    """Route candidate rows to the complete-match and single-match consumers in one pass."""
+    complete_matches = []
+    single_matches = []
+    for row in rows:
+        if row['message'] == 'complete_match':
+            complete_matches.append(row)
+        elif row['message'] == 'single_match' and row.get('in_odp', '').lower() == 'true':
+            single_matches.append(row)
+    return complete_matches, single_matches
+
+
+def stream_checks_data():
+    """Download the duplicate checks data and stream it into (complete, single) match rows."""
+    print("Loading duplicate geometry checks...")
+    path = download_checks_data()
+    print("Parsing records...")
+    complete_matches, single_matches = route_checks_rows(iter_candidate_rows(path))
+
+    print(f"Kept {len(complete_matches)} complete match and {len(single_matches)} single match candidates")
+    return complete_matches, single_matches
+
+
+def load_old_entity(repo):
     """Load existing old-entity data."""
     print(f"Loading existing old-entity data from {OLD_ENTITY_PATH}...")
 
-    rows = []
-    with open(OLD_ENTITY_PATH, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        rows = list(reader)
+    rows = repo.old_entity(DATASET).rows
 
     print(f"Loaded {len(rows)} existing records")
     return rows
 
 
-def extract_complete_matches(df):
-    """Extract complete match duplicates and format for old-entity.csv."""
-    print("\nFiltering for complete matches...")
-
-    complete_matches = [row for row in df if row['message'] == 'complete_match'
-                        and row['dataset'] == 'conservation-area'
-                        and row.get('lookup_org_a') == 'government-organisation:PB1164'
-                        and row.get('lookup_org_b') != 'government-organisation:PB1164']
+def extract_complete_matches(complete_matches):
+    """Format complete match rows, as routed by route_checks_rows, for old-entity.csv."""
+    print("\nFormatting complete matches...")
     print(f"Found {len(complete_matches)} complete matches")
 
     # Format for old-entity.csv
@@ -150,35 +150,55 @@ def extract_complete_matches(df):
     return formatted
 
 
-def extract_single_matches(df):
-    """Extract single matches with high name similarity and format for old-entity.csv."""
-    print("\nFiltering for single matches...")
+def normalise_name(name):
+    """Normalised form of an entity name for comparison."""
+    return str(name).lower()
 
-    # Filter for single matches in conservation-area
-    single_matches = [row for row in df if row['message'] == 'single_match'
-                      and row['dataset'] == 'conservation-area'
-                      and row.get('lookup_org_a') == 'government-organisation:PB1164'
-                      and row.get('lookup_org_b') != 'government-organisation:PB1164'
-                      and row.get('in_odp', '').lower() == 'true']
 
+def score_name_pairs(names_a, names_b, scorer=fuzz.partial_ratio, score_cutoff=SIMILARITY_THRESHOLD):
+    """Score each (names_a[i], names_b[i]) pair in one batched, multi-threaded call.
+
+    Each column is normalised once up front. Pairs scoring below `score_cutoff`
+    are rejected early and come back as 0. Scores are kept as float64, as the
+    scorer returns them, so comparing them with the threshold gives the same
+    answer as scoring each pair on its own.
+    """
+    if not names_a:
+        return []
+    return process.cpdist(
+        [normalise_name(name) for name in names_a],
+        [normalise_name(name) for name in names_b],
+        scorer=scorer,
+        score_cutoff=score_cutoff,
+        dtype=np.float64,
+        workers=-1,
+    ).tolist()
+
+
+def extract_single_matches(single_matches, scorer=fuzz.partial_ratio, threshold=SIMILARITY_THRESHOLD):
+    """Keep single match rows, as routed by route_checks_rows, with high name similarity
+    and format them for old-entity.csv.
+
+    `scorer` is any rapidfuzz scorer; the default partial ratio is lenient with
+    additions and variations in names.
+    """
+    print("\nFiltering single matches by name similarity...")
     print(f"Found {len(single_matches)} single matches meeting criteria")
 
     # Calculate name similarity and filter for high matches
     today = datetime.now().strftime('%Y-%m-%d')
-    threshold = 85  # Similarity threshold (0-100)
 
     # First pass: collect all matches above threshold with similarity scores
-    high_similarity_matches = []
-    for row in single_matches:
-        entity_a_name = str(row.get('entity_a_name', '')).lower()
-        entity_b_name = str(row.get('entity_b_name', '')).lower()
-
-        # Calculate similarity score using partial ratio (more lenient with additions/variations)
-        similarity = fuzz.partial_ratio(entity_a_name, entity_b_name)
-
-        # Only include if similarity is above threshold
-        if similarity > threshold:
-            high_similarity_matches.append(row)
+    similarities = score_name_pairs(
+        [row.get('entity_a_name', '') for row in single_matches],
+        [row.get('entity_b_name', '') for row in single_matches],
+        scorer=scorer,
+        score_cutoff=threshold,
+    )
+    high_similarity_matches = [
+        row for row, similarity in zip(single_matches, similarities)
+        if similarity > threshold
+    ]
 
     # Identify which entity_a values appear multiple times (splits)
     entity_a_counts = {}
@@ -228,39 +248,39 @@ def filter_conflicting_matches(old_entity, new_matches):
     """Filter out new matches that would create circular references or duplicates.
 
     Skips a new match if:
-    - Its old-entity is already a SOURCE in old-entity.csv (would create a duplicate row).
+    - Its old-entity already has a row in old-entity.csv, whatever its status, or is
+      earlier in the new matches (would create a duplicate row).
     - Its old-entity is already a TARGET of an existing redirect (would create a circular
       reference). e.g. if a new redirect A -> B would be added, but A is already a target
       of an existing redirect in old-entity, skip it to preserve the existing A->B, C->B pattern.
+    - It would close a loop of redirects.
     """
     print("\nFiltering for conflicts with existing redirects...")
 
-    existing_sources = set(row['old-entity'] for row in old_entity if row.get('old-entity'))
-    existing_targets = set(
-        row['entity'] for row in old_entity
-        if row.get('status') == '301' and row.get('entity')
-    )
+    graph = RedirectGraph.from_rows(old_entity)
+    existing_sources = set(graph.all_sources)
 
     # Filter new matches: skip if the old-entity is already a target
     filtered = []
-    skipped_count = 0
     skipped_matches = []
 
     for match in new_matches:
         old_ent = match['old-entity']
         if old_ent in existing_sources:
-            skipped_count += 1
-            skipped_matches.append((old_ent, match['entity'], 'already a source'))
-        elif old_ent in existing_targets:
-            skipped_count += 1
-            skipped_matches.append((old_ent, match['entity'], 'already a target'))
+            skipped_matches.append((old_ent, match['entity'], 'already a source in existing redirects'))
+        elif graph.is_target(old_ent):
+            skipped_matches.append((old_ent, match['entity'], 'already a target in existing redirects'))
+        elif graph.is_source(old_ent):
+            skipped_matches.append((old_ent, match['entity'], 'already a source in new redirects'))
+        elif not graph.add_row(match):
+            skipped_matches.append((old_ent, match['entity'], 'would create a redirect loop'))
         else:
             filtered.append(match)
 
-    if skipped_count > 0:
-        print(f"Skipped {skipped_count} new matches:")
+    if skipped_matches:
+        print(f"Skipped {len(skipped_matches)} new matches:")
         for old_ent, target, reason in skipped_matches:
-            print(f"  {old_ent} → {target} ({reason} in existing redirects)")
+            print(f"  {old_ent} → {target} ({reason})")
 
     return filtered
 
@@ -295,68 +315,48 @@ def resolve_redirect_chains(data):
     If entity A redirects to B, and B redirects to C, modify A to point
     directly to C. This results in the A->B, C->B pattern where multiple
     sources point to the same final destination.
-    Circular references are skipped to avoid self-loops.
+    Redirects that would form a loop are left untouched and reported.
     """
     print("\nResolving redirect chains...")
 
-    # Build a map of old-entity -> entity for status 301 redirects with row indices
-    redirect_map = {}
+    # Build the redirect graph from status 301 rows, remembering each source's row
+    graph = RedirectGraph()
     row_indices = {}
     for idx, row in enumerate(data):
-        if row['status'] == '301' and row['entity']:
-            old_entity = row['old-entity']
-            target_entity = row['entity']
-            redirect_map[old_entity] = target_entity
-            row_indices[old_entity] = idx
+        if row['status'] == '301' and row['entity'] and graph.add_redirect(row['old-entity'], row['entity']):
+            row_indices[row['old-entity']] = idx
 
-    # Find entities involved in chains (both source and target)
-    target_entities = set(redirect_map.values())
-    chained_entities = set(redirect_map.keys()) & target_entities
+    for old_entity, entity in graph.cycles:
+        print(f"  Skipping circular redirect {old_entity} → {entity}")
 
-    if not chained_entities:
+    chained_sources = graph.chained_sources()
+    if not chained_sources:
         print("No redirect chains found")
         return data
 
-    print(f"Found {len(chained_entities)} entities in redirect chains")
+    print(f"Found {len(chained_sources)} redirects in chains")
 
     today = datetime.now().strftime('%Y-%m-%d')
     modifications_count = 0
 
-    # For each source, follow the chain to find the final destination
-    for source in redirect_map:
-        current = source
-        visited = set()
-
-        # Follow the chain to find where it ends
-        while current in redirect_map and current not in visited:
-            visited.add(current)
-            current = redirect_map[current]
-
-        # Modify only if:
-        # 1. We followed a chain (current != immediate target)
-        # 2. The final destination is not the source itself (no self-loops)
-        if current != redirect_map[source] and current != source:
-            idx = row_indices[source]
-            data[idx]['entity'] = current
-            data[idx]['notes'] = 'Consolidated redirect to final entity'
-            data[idx]['entry-date'] = today
-            modifications_count += 1
+    # Point each chained source straight at its final destination
+    for source in chained_sources:
+        idx = row_indices[source]
+        data[idx]['entity'] = graph.find(source)
+        data[idx]['notes'] = 'Consolidated redirect to final entity'
+        data[idx]['entry-date'] = today
+        modifications_count += 1
 
     print(f"Consolidated {modifications_count} redirects to final destinations")
     print(f"Total records after chain resolution: {len(data)}")
     return data
 
 
-def save_output(data):
-    """Save the updated data to CSV."""
+def save_output(data, repo):
+    """Queue the updated data in the repository, to be written when it is flushed."""
     print(f"\nSaving to {OLD_ENTITY_PATH}...")
 
-    fieldnames = ['old-entity', 'status', 'entity', 'notes', 'end-date', 'entry-date', 'start-date']
-
-    with open(OLD_ENTITY_PATH, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(data)
+    repo.old_entity(DATASET).replace(data)
 
     print("Done!")
 
@@ -367,15 +367,15 @@ def save_output(data):
             print(f"  {row['old-entity']} → {row['entity']} (status: {row['status']})")
 
 
-def main():
-    """Main execution function."""
+def run(repo):
+    """Find new redirects and queue them in the repository's old-entity table without writing it."""
     try:
-        checks_data = stream_checks_data()
-        old_entity = load_old_entity()
+        complete_rows, single_rows = stream_checks_data()
+        old_entity = load_old_entity(repo)
 
         # Extract both complete and single matches
-        complete_matches = extract_complete_matches(checks_data)
-        single_matches = extract_single_matches(checks_data)
+        complete_matches = extract_complete_matches(complete_rows)
+        single_matches = extract_single_matches(single_rows)
 
         # Combine both types of matches
         all_new_matches = complete_matches + single_matches
@@ -387,11 +387,18 @@ def main():
 
         combined = combine_data(old_entity, all_new_matches)
         combined = resolve_redirect_chains(combined)
-        save_output(combined)
+        save_output(combined, repo)
     except Exception as e:
         print(f"Error: {e}")
         raise
 
 
+def main():
+    """Main execution function."""
+    repo = ConfigRepository(REPO_ROOT)
+    run(repo)
+    repo.flush()
+
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,223 @@
+"""
+Run the evening pipeline's config stages in one process.
+
+The stages (see STAGES) share one ConfigRepository, so each config file is
+read once however many stages use it, and pandas, rapidfuzz and the rest are
+imported once. Each stage declares the files it reads and writes; a stage
+starts once every earlier stage whose writes overlap its reads or writes (or
+the other way round) has finished, so stages touching different files run
+concurrently in threads.
+
+Stages queue their changes in the repository instead of writing them. Once
+every stage has run, the changed tables are standardised in memory and each
+is written once; the rest of the tree is then standardised in-process
+(--no-standardise to skip). As with the separate `if: ${{ !cancelled() }}`
+steps this replaces, a failing stage doesn't stop the others, but its changes
+are rolled back and the exit status is 1.
+
+    python .github/scripts/evening_pipeline.py
+    python .github/scripts/evening_pipeline.py --stage retire-mhclg-plan-data --dry-run
+    python .github/scripts/evening_pipeline.py --batch-assign-scope odp
+
+Batch assign writes lookups through digital-land rather than the repository,
+so it runs first, on its own, and never commits; the caller commits the tree.
+"""
+
+import importlib.util
+import os
+import sys
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from fnmatch import fnmatch
+from time import perf_counter
+from typing import Callable
+
+import click
+
+# Add parent directories to path to import from root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+from create_collection import COLUMN_MAPPINGS
+from config_repository import REPO_ROOT, ConfigRepository
+from standardise_csvs import SORT_MAPPINGS, standardise_rows, standardise_tree
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+_scripts = {}
+
+
+def load_script(filename):
+    """Import a script from .github/scripts by file name, once; several have hyphenated names."""
+    if filename not in _scripts:
+        spec = importlib.util.spec_from_file_location(filename[:-3].replace('-', '_'), os.path.join(SCRIPTS_DIR, filename))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _scripts[filename] = module
+    return _scripts[filename]
+
+
+def _overlaps(patterns, others):
+    return any(fnmatch(a, b) or fnmatch(b, a) for a in patterns for b in others)
+
+
+@dataclass
+class Stage:
+    """A step of the pipeline: run(repo), and the repo-relative file patterns it reads and writes."""
+
+    name: str
+    run: Callable
+    reads: tuple = ()
+    writes: tuple = ()
+
+    def conflicts_with(self, other):
+        return (_overlaps(self.writes, other.reads + other.writes)
+                or _overlaps(other.writes, self.reads + self.writes))
+
+
+def _script_stage(name, filename, reads, writes):
+    return Stage(name, lambda repo: load_script(filename).run(repo), reads, writes)
+
+
+STAGES = [
+    _script_stage(
+        'deduplicate-ca-geogs', 'deduplicate-ca-geogs.py',
+        reads=('pipeline/conservation-area/old-entity.csv',),
+        writes=('pipeline/conservation-area/old-entity.csv',),
+    ),
+    _script_stage(
+        'retire-mhclg-ca-data', 'retire-mhclg-ca-data.py',
+        reads=('collection/conservation-area/*.csv',),
+        writes=('collection/conservation-area/endpoint.csv', 'collection/conservation-area/source.csv',
+                'collection/conservation-area/old-resource.csv'),
+    ),
+    _script_stage(
+        'retire-mhclg-plan-data', 'retire-mhclg-plan-data.py',
+        reads=('pipeline/local-plan/lookup.csv', 'pipeline/local-plan/entity-organisation.csv',
+               'pipeline/local-plan/old-entity.csv'),
+        writes=('pipeline/local-plan/old-entity.csv',),
+    ),
+    _script_stage(
+        'redirect-mhclg-plan-duplicates', 'redirect-mhclg-plan-duplicates.py',
+        reads=('pipeline/local-plan/lookup.csv', 'pipeline/local-plan/old-entity.csv'),
+        writes=('pipeline/local-plan/old-entity.csv',),
+    ),
+]
+
+
+def batch_assign_stage(scope):
+    def run(repo):
+        load_script('batch_assign_entities.py').run_batch_assign_entities(scope=scope, commit=False)
+
+    # Reads every collection's issues, so it conflicts with, and runs before, every other stage
+    return Stage('batch-assign', run, reads=('*',), writes=('pipeline/*/lookup.csv', 'pipeline/*/entity-organisation.csv'))
+
+
+def stage_dependencies(stages):
+    """{stage name: names of the earlier stages it must wait for}."""
+    return {
+        stage.name: {earlier.name for earlier in stages[:i] if stage.conflicts_with(earlier)}
+        for i, stage in enumerate(stages)
+    }
+
+
+def _matching_tables(repo, patterns):
+    return [
+        table for table in repo.modified_tables()
+        if _overlaps([table.path.relative_to(repo.root).as_posix()], patterns)
+    ]
+
+
+def _run_stage(stage, repo):
+    # No stage writing these tables runs at the same time, so they can be rolled back
+    snapshots = {table.path: table.snapshot() for table in _matching_tables(repo, stage.writes)}
+    started = perf_counter()
+    try:
+        stage.run(repo)
+        error = None
+    except SystemExit as e:
+        # The scripts exit 0 when there's nothing to do
+        error = None if e.code in (None, 0) else e
+    except Exception as e:
+        traceback.print_exc()
+        error = e
+    if error is not None:
+        for table in _matching_tables(repo, stage.writes):
+            table.restore(snapshots.get(table.path))
+    return error, perf_counter() - started
+
+
+def run_stages(stages, repo, workers=4):
+    """Run the stages, concurrently where their files allow; returns {name: (error or None, seconds)}.
+
+    A failed stage's changes are rolled back, and the stages after it still run.
+    """
+    dependencies = stage_dependencies(stages)
+    results = {}
+    pending = list(stages)
+    running = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while pending or running:
+            for stage in [s for s in pending if dependencies[s.name] <= set(results)]:
+                pending.remove(stage)
+                running[executor.submit(_run_stage, stage, repo)] = stage
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future).name] = future.result()
+    return results
+
+
+def standardise_modified(repo):
+    """Standardise the modified tables in memory, so each is written once in its final form; returns their paths."""
+    standardised = []
+    for table in repo.modified_tables():
+        kind, filename = table.path.parent.parent.name, table.path.name
+        expected_columns = COLUMN_MAPPINGS.get(kind, {}).get(filename)
+        if not expected_columns:
+            continue
+        result = standardise_rows(table.fieldnames, table.rows, expected_columns,
+                                  SORT_MAPPINGS.get(kind, {}).get(filename))
+        if result:
+            fieldnames, rows = result
+            table.replace(rows, fieldnames=fieldnames)
+            standardised.append(table.path)
+    return standardised
+
+
+@click.command(help="Run the evening pipeline's config stages in one process over a shared view of the config tree")
+@click.option('--stage', 'stage_names', multiple=True, type=click.Choice([stage.name for stage in STAGES]),
+              help="Run only these stages (default: all)")
+@click.option('--batch-assign-scope', type=click.Choice(['mandated', 'odp', 'single-source']),
+              help="Run batch assign for this scope first, without committing")
+@click.option('--workers', type=click.IntRange(min=1), default=4, show_default=True, help="Stages run at once")
+@click.option('--standardise/--no-standardise', default=True, show_default=True,
+              help="Standardise the rest of the tree after writing the stages' changes")
+@click.option('--dry-run', is_flag=True, default=False, help="Run the stages but write nothing")
+def main(stage_names, batch_assign_scope, workers, standardise, dry_run):
+    stages = [stage for stage in STAGES if not stage_names or stage.name in stage_names]
+    if batch_assign_scope:
+        stages.insert(0, batch_assign_stage(batch_assign_scope))
+
+    repo = ConfigRepository(REPO_ROOT, COLUMN_MAPPINGS)
+    results = run_stages(stages, repo, workers)
+
+    standardised = standardise_modified(repo)
+    if dry_run:
+        written = [table.path for table in repo.modified_tables()]
+    else:
+        written = repo.flush()
+
+    print("\n--- Evening pipeline ---")
+    for stage in stages:
+        error, seconds = results[stage.name]
+        print(f"{stage.name}: {'failed: ' + str(error) if error else 'ok'} ({seconds:.1f}s)")
+    for path in written:
+        print(f"{'Would write' if dry_run else 'Wrote'}: {path.relative_to(REPO_ROOT).as_posix()}")
+
+    errors = []
+    if standardise and not dry_run:
+        errors = standardise_tree(REPO_ROOT, exclude=[path for path in standardised if path in written])
+    if errors or any(error for error, _ in results.values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""
+Persistent fingerprints of the transformed resources batch assign has seen.
+
+Batch assign checks a resource's new entities for duplicates by comparing
+their fingerprints with those of the endpoint's previous resource, which
+otherwise means downloading that resource's transformed CSV and
+fingerprinting it again every night. The store keeps, per endpoint and
+resource hash, the resource's entities and a 64-bit hash of each entity's
+fingerprint under each profile (the ways batch assign fingerprints an
+entity), in a SQLite file:
+
+    store = FingerprintStore(cache_dir / 'fingerprints.sqlite3')
+    fingerprints = store.get(endpoint, old_resource_hash)
+    if fingerprints is None:
+        ...  # download the old resource and fingerprint it
+        store.put(endpoint, old_resource_hash, fingerprints)
+    store.close()
+
+Batch assign puts a resource's fingerprints once its entities have been
+assigned, so the next night that resource is the endpoint's previous one and
+is found here. Only the latest KEEP_RESOURCES resources of each endpoint are
+kept. The file is kept between runs with actions/cache; a missing or
+outdated file just means downloading again.
+"""
+
+import hashlib
+import sqlite3
+from dataclasses import dataclass, field
+from pathlib import Path
+
+STORE_FILENAME = 'fingerprints.sqlite3'
+SCHEMA_VERSION = 1
+KEEP_RESOURCES = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS resource (
+    id INTEGER PRIMARY KEY,
+    endpoint TEXT NOT NULL,
+    resource TEXT NOT NULL,
+    UNIQUE (endpoint, resource)
+);
+CREATE TABLE IF NOT EXISTS entity (
+    resource_id INTEGER NOT NULL REFERENCES resource (id) ON DELETE CASCADE,
+    entity TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fingerprint (
+    resource_id INTEGER NOT NULL REFERENCES resource (id) ON DELETE CASCADE,
+    profile TEXT NOT NULL,
+    entity TEXT NOT NULL,
+    hash INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entity_resource ON entity (resource_id);
+CREATE INDEX IF NOT EXISTS fingerprint_resource ON fingerprint (resource_id, profile);
+"""
+
+
+def fingerprint_hash(fingerprint):
+    """A fingerprint's 64-bit hash, as a signed integer so SQLite stores it in 8 bytes."""
+    digest = hashlib.blake2b(str(fingerprint).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+@dataclass
+class ResourceFingerprints:
+    """A resource's entities, and {profile: [(entity, fingerprint hash)]}."""
+
+    entities: set
+    profiles: dict = field(default_factory=dict)
+
+
+class FingerprintStore:
+    """Fingerprints of transformed resources by endpoint and resource hash, in a SQLite file."""
+
+    def __init__(self, path, keep=KEEP_RESOURCES):
+        self.path = Path(path)
+        self.keep = keep
+        self.hits = 0
+        self.misses = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.path))
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        if self.connection.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+            # Written by another version: start again rather than migrate a cache
+            with self.connection:
+                for table in ('fingerprint', 'entity', 'resource'):
+                    self.connection.execute(f'DROP TABLE IF EXISTS {table}')
+                self.connection.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        self.connection.executescript(SCHEMA)
+
+    def _resource_id(self, endpoint, resource):
+        row = self.connection.execute(
+            'SELECT id FROM resource WHERE endpoint = ? AND resource = ?', (endpoint, resource)
+        ).fetchone()
+        return row[0] if row else None
+
+    def get(self, endpoint, resource):
+        """The stored ResourceFingerprints of the endpoint's resource, or None."""
+        resource_id = self._resource_id(endpoint, resource)
+        if resource_id is None:
+            self.misses += 1
+            return None
+        entities = {row[0] for row in self.connection.execute(
+            'SELECT entity FROM entity WHERE resource_id = ?', (resource_id,))}
+        profiles = {}
+        for profile, entity, hash_ in self.connection.execute(
+                'SELECT profile, entity, hash FROM fingerprint WHERE resource_id = ? ORDER BY rowid', (resource_id,)):
+            profiles.setdefault(profile, []).append((entity, hash_))
+        self.hits += 1
+        return ResourceFingerprints(entities, profiles)
+
+    def put(self, endpoint, resource, fingerprints):
+        """Store (or replace) the fingerprints of the endpoint's resource, dropping the endpoint's oldest."""
+        with self.connection:
+            self.connection.execute('DELETE FROM resource WHERE endpoint = ? AND resource = ?', (endpoint, resource))
+            resource_id = self.connection.execute(
+                'INSERT INTO resource (endpoint, resource) VALUES (?, ?)', (endpoint, resource)
+            ).lastrowid
+            self.connection.executemany(
+                'INSERT INTO entity (resource_id, entity) VALUES (?, ?)',
+                ((resource_id, str(entity)) for entity in fingerprints.entities),
+            )
+            self.connection.executemany(
+                'INSERT INTO fingerprint (resource_id, profile, entity, hash) VALUES (?, ?, ?, ?)',
+                ((resource_id, profile, str(entity), hash_)
+                 for profile, pairs in fingerprints.profiles.items() for entity, hash_ in pairs),
+            )
+            self.connection.execute(
+                'DELETE FROM resource WHERE endpoint = ? AND id NOT IN '
+                '(SELECT id FROM resource WHERE endpoint = ? ORDER BY id DESC LIMIT ?)',
+                (endpoint, endpoint, self.keep),
+            )
+
+    def summary(self):
+        return f"Fingerprint store: {self.hits} hit(s), {self.misses} miss(es)"
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,45 @@
+"""
+Stand-ins for modules, or names in them, that are imported on first use.
+
+Scripts started afresh for every workflow dispatch pay for everything they
+import before they parse their options, including pandas, requests and
+digital-land on paths that never use them. A LazyImport is bound where the
+import was and imports its target the first time it is used:
+
+    pd = LazyImport('pandas')
+    check_and_assign_entities = LazyImport('digital_land.commands', 'check_and_assign_entities')
+
+Attributes set on a LazyImport (e.g. by `mock.patch('script.pd.read_csv')`)
+are kept on it and shadow the target's, so patching one script's use of a
+module leaves other users of the module alone.
+"""
+
+import importlib
+
+
+class LazyImport:
+    """A module, or a name in a module, imported the first time it is used."""
+
+    def __init__(self, module, name=None):
+        self._lazy_module = module
+        self._lazy_name = name
+        self._lazy_target = None
+
+    def _load(self):
+        if self._lazy_target is None:
+            target = importlib.import_module(self._lazy_module)
+            self._lazy_target = getattr(target, self._lazy_name) if self._lazy_name else target
+        return self._lazy_target
+
+    def __getattr__(self, attr):
+        # Only called for attributes not set on the stand-in itself
+        if attr.startswith('_lazy_'):
+            raise AttributeError(attr)
+        return getattr(self._load(), attr)
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+    def __repr__(self):
+        target = f"{self._lazy_module}.{self._lazy_name}" if self._lazy_name else self._lazy_module
+        return f"<LazyImport {target}{'' if self._lazy_target is None else ' (imported)'}>"
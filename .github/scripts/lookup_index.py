@@ -0,0 +1,216 @@
+"""
+Prefix index for lookup.csv, read through a memory map.
+
+standardise_csvs keeps lookup.csv sorted by prefix, so each prefix's rows
+form one contiguous run of bytes. The index records, for each run, its byte
+offset and length, row count and entity min/max, plus a checkpoint (entity,
+offset) every CHECKPOINT_ROWS rows when the run's entities are in ascending
+order. With it:
+- `rows(prefix)` decodes just that prefix's bytes, so reading historic-england's
+  23 building-preservation-notice rows doesn't parse its 20k scheduled-monument rows
+- `find_entity(entity)` skips runs whose range can't hold the entity and
+  binary-searches the checkpoints, parsing at most CHECKPOINT_ROWS rows
+
+A file that isn't sorted still works; a prefix then just has several runs.
+The index is kept as JSON under var/cache/lookup-index/, one file per
+resolved lookup path, and rebuilt when the lookup's size or mtime changes or
+the index can't be read.
+
+    index = LookupIndex('pipeline/historic-england/lookup.csv')
+    rows = index.rows('building-preservation-notice')
+    row = index.find_entity(42100123)
+"""
+
+import bisect
+import csv
+import hashlib
+import io
+import json
+import mmap
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+INDEX_DIR = REPO_ROOT / 'var' / 'cache' / 'lookup-index'
+INDEX_VERSION = 1
+CHECKPOINT_ROWS = 256
+
+
+def _records(data, start):
+    """(offset, end, line bytes) for each CSV record from `start`, joining quoted newlines."""
+    offset = start
+    size = len(data)
+    while offset < size:
+        end = data.find(b'\n', offset)
+        end = size if end == -1 else end + 1
+        line = data[offset:end]
+        # An odd number of quotes means a newline inside a quoted field
+        while line.count(b'"') % 2 and end < size:
+            next_end = data.find(b'\n', end)
+            next_end = size if next_end == -1 else next_end + 1
+            line += data[end:next_end]
+            end = next_end
+        yield offset, end, line
+        offset = end
+
+
+def _parse(line):
+    return next(csv.reader(io.StringIO(line.decode('utf-8'), newline='')), [])
+
+
+def _as_entity(value):
+    return int(value) if value.isdigit() else None
+
+
+def build_index(data):
+    """Index the bytes of a lookup.csv; returns the JSON-able index."""
+    header_end = next((end for _, end, _ in _records(data, 0)), 0)
+    fieldnames = _parse(data[:header_end]) if header_end else []
+    prefix_at = fieldnames.index('prefix') if 'prefix' in fieldnames else 0
+    entity_at = fieldnames.index('entity') if 'entity' in fieldnames else None
+
+    runs = []
+    run = None
+    for offset, end, line in _records(data, header_end):
+        values = _parse(line)
+        if not any(value.strip() for value in values):
+            continue
+        prefix = values[prefix_at] if prefix_at < len(values) else ''
+        entity = None
+        if entity_at is not None and entity_at < len(values):
+            entity = _as_entity(values[entity_at])
+
+        if run is None or run['prefix'] != prefix or run['end'] != offset:
+            run = {'prefix': prefix, 'offset': offset, 'end': offset, 'rows': 0,
+                   'entity_min': None, 'entity_max': None, 'sorted': True, 'checkpoints': []}
+            runs.append(run)
+        if run['rows'] % CHECKPOINT_ROWS == 0:
+            run['checkpoints'].append([entity, offset])
+        if entity is None or (run['entity_max'] is not None and entity < run['entity_max']):
+            run['sorted'] = False
+        if entity is not None:
+            run['entity_min'] = entity if run['entity_min'] is None else min(run['entity_min'], entity)
+            run['entity_max'] = entity if run['entity_max'] is None else max(run['entity_max'], entity)
+        run['rows'] += 1
+        run['end'] = end
+
+    prefixes = {}
+    for run in runs:
+        if not run['sorted']:
+            run['checkpoints'] = []
+        run['length'] = run.pop('end') - run['offset']
+        prefixes.setdefault(run.pop('prefix'), []).append(run)
+    return {'version': INDEX_VERSION, 'fieldnames': fieldnames, 'prefixes': prefixes}
+
+
+class LookupIndex:
+    """Memory-mapped lookup.csv with a prefix/entity index, built or refreshed on open."""
+
+    def __init__(self, lookup_path, cache_dir=INDEX_DIR):
+        self.path = Path(lookup_path)
+        # Keyed on the resolved path, so lookups in different trees sharing a
+        # collection name don't overwrite each other's index
+        path_hash = hashlib.sha256(str(self.path.resolve()).encode('utf-8')).hexdigest()[:16]
+        self.index_path = Path(cache_dir) / f"{self.path.parent.name}-{path_hash}.json"
+        self._file = open(self.path, 'rb')
+        stat = self.path.stat()
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else b''
+        self.index = self._load_or_build({'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns})
+
+    def _load_or_build(self, stamp):
+        if self.index_path.exists():
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    index = json.load(f)
+            except json.JSONDecodeError:
+                index = {}
+            if index.get('version') == INDEX_VERSION and index.get('source') == stamp:
+                return index
+        index = build_index(self._data)
+        index['source'] = stamp
+        # Written atomically, so an interrupted run can't leave a truncated index
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix='.json', dir=self.index_path.parent)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.index_path)
+        return index
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def fieldnames(self):
+        return self.index['fieldnames']
+
+    def prefixes(self):
+        return list(self.index['prefixes'])
+
+    def _read(self, start, end):
+        fieldnames = self.fieldnames
+        text = self._data[start:end].decode('utf-8')
+        for values in csv.reader(io.StringIO(text, newline='')):
+            if any(value.strip() for value in values):
+                yield dict(zip(fieldnames, values + [''] * (len(fieldnames) - len(values))))
+
+    def rows(self, prefix):
+        """Every row of one prefix, as dicts of strings like csv.DictReader gives."""
+        return [
+            row
+            for run in self.index['prefixes'].get(prefix, [])
+            for row in self._read(run['offset'], run['offset'] + run['length'])
+        ]
+
+    def count(self, prefix):
+        return sum(run['rows'] for run in self.index['prefixes'].get(prefix, []))
+
+    def find_entity(self, entity):
+        """The first row for `entity`, or None."""
+        entity = int(entity)
+        for runs in self.index['prefixes'].values():
+            for run in runs:
+                if run['entity_min'] is None or not run['entity_min'] <= entity <= run['entity_max']:
+                    continue
+                start, end = run['offset'], run['offset'] + run['length']
+                checkpoints = run['checkpoints']
+                if checkpoints:
+                    # Scan from the last checkpoint before the entity to the first one after it
+                    keys = [c[0] for c in checkpoints]
+                    start = checkpoints[max(bisect.bisect_left(keys, entity) - 1, 0)][1]
+                    after = bisect.bisect_right(keys, entity)
+                    if after < len(checkpoints):
+                        end = checkpoints[after][1]
+                for row in self._read(start, end):
+                    if row.get('entity') == str(entity):
+                        return row
+        return None
+
+
+def main(args):
+    """Print one prefix's rows as CSV, or list the prefixes with their row counts."""
+    if not args:
+        print("usage: lookup_index.py <lookup.csv> [prefix]")
+        return 1
+    with LookupIndex(args[0]) as index:
+        if len(args) == 1:
+            for prefix in index.prefixes():
+                print(f"{prefix}: {index.count(prefix)} rows")
+            return 0
+        writer = csv.DictWriter(sys.stdout, fieldnames=index.fieldnames, lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(index.rows(args[1]))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,232 @@
+"""
+Compact in-memory form of lookup.csv.
+
+A csv.DictReader row is a dict of ten strings, so a 50k-row lookup costs tens
+of MB. LookupTable stores the same data column by column instead:
+- columns holding only whole numbers (entity, entry-number) are int64 arrays
+- every other column is dictionary-encoded: an array of small integer codes
+  into a list of interned distinct values, so each prefix, organisation,
+  endpoint or date string is held once however many rows share it
+
+Rows are read through LookupRow, a two-slot view that behaves like the
+read-only dict scripts already use (`row['entity']`, `row.get('organisation')`),
+with values returned as the same strings the CSV holds.
+
+    lookup = LookupTable.from_csv('pipeline/local-plan/lookup.csv')
+    for row in lookup.where('organisation', 'government-organisation:D1342'):
+        entity = int(row['entity'])
+"""
+
+import csv
+import sys
+from array import array
+from collections.abc import Mapping
+from itertools import islice
+
+MISSING = -1
+# Longer numbers may not fit in an int64, so are kept as strings
+MAX_INT_DIGITS = 18
+CHUNK_ROWS = 10000
+
+
+def _as_int(value):
+    """The value as an int if it round-trips exactly, MISSING if blank, else None.
+
+    Only plain ASCII digits count: str.isdigit() also accepts characters such
+    as '²' that int() rejects. Callers needing a real value must reject MISSING.
+    """
+    if value == '':
+        return MISSING
+    if (value.isascii() and value.isdigit() and len(value) <= MAX_INT_DIGITS
+            and (value == '0' or not value.startswith('0'))):
+        return int(value)
+    return None
+
+
+class _Column:
+    """One column: int64 values while every value is a plain whole number, else codes into categories."""
+
+    __slots__ = ('ints', 'codes', 'categories', 'category_index')
+
+    def __init__(self):
+        self.ints = array('q')
+        self.codes = None
+        self.categories = None
+        self.category_index = None
+
+    @property
+    def is_int(self):
+        return self.codes is None
+
+    def _code(self, value):
+        code = self.category_index.get(value)
+        if code is None:
+            code = len(self.categories)
+            self.categories.append(sys.intern(value))
+            self.category_index[value] = code
+        return code
+
+    def _to_categorical(self):
+        values = [self.value(i) for i in range(len(self.ints))]
+        self.codes = array('I')
+        self.categories = []
+        self.category_index = {}
+        self.ints = None
+        for value in values:
+            self.codes.append(self._code(value))
+
+    def append(self, value):
+        if self.is_int:
+            number = _as_int(value)
+            if number is not None:
+                self.ints.append(number)
+                return
+            self._to_categorical()
+        self.codes.append(self._code(value))
+
+    def extend(self, values):
+        """Append many values at once; much faster than `append` for bulk loads."""
+        if self.is_int:
+            numbers = [_as_int(value) for value in values]
+            if None not in numbers:
+                self.ints.extend(numbers)
+                return
+            self._to_categorical()
+        index = self.category_index
+        code = self._code
+        self.codes.extend([index[value] if value in index else code(value) for value in values])
+
+    def value(self, index):
+        if self.is_int:
+            number = self.ints[index]
+            return '' if number == MISSING else str(number)
+        return self.categories[self.codes[index]]
+
+    def nbytes(self):
+        if self.is_int:
+            return self.ints.itemsize * len(self.ints)
+        return self.codes.itemsize * len(self.codes) + sum(sys.getsizeof(c) for c in self.categories)
+
+
+class LookupRow(Mapping):
+    """Read-only dict-like view of one row of a LookupTable."""
+
+    __slots__ = ('_table', '_index')
+
+    def __init__(self, table, index):
+        self._table = table
+        self._index = index
+
+    def __getitem__(self, column):
+        return self._table.value(self._index, column)
+
+    def __iter__(self):
+        return iter(self._table.fieldnames)
+
+    def __len__(self):
+        return len(self._table.fieldnames)
+
+    def __repr__(self):
+        return f"LookupRow({dict(self)!r})"
+
+
+class LookupTable:
+    """Column-wise, dictionary-encoded table of lookup rows."""
+
+    def __init__(self, fieldnames):
+        self.fieldnames = list(fieldnames)
+        self._columns = {name: _Column() for name in self.fieldnames}
+        self._length = 0
+
+    @classmethod
+    def from_rows(cls, rows, fieldnames=None):
+        rows = iter(rows)
+        if fieldnames is None:
+            first = next(rows, None)
+            table = cls(list(first.keys()) if first else [])
+            if first is not None:
+                table.append(first)
+        else:
+            table = cls(fieldnames)
+        for row in rows:
+            table.append(row)
+        return table
+
+    @classmethod
+    def from_csv(cls, path):
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            fieldnames = next(reader, [])
+            table = cls(fieldnames)
+            columns = [table._columns[name] for name in fieldnames]
+            width = len(columns)
+            # Blank lines are skipped, as csv.DictReader does
+            records = (values for values in reader if values)
+            # Encode a chunk of rows a column at a time, so only CHUNK_ROWS rows
+            # of plain strings are ever held at once
+            while True:
+                chunk = list(islice(records, CHUNK_ROWS))
+                if not chunk:
+                    break
+                padded = (values if len(values) == width else (values + [''] * width)[:width] for values in chunk)
+                for column, values in zip(columns, zip(*padded)):
+                    column.extend(values)
+                table._length += len(chunk)
+        return table
+
+    def append(self, row):
+        for name, column in self._columns.items():
+            value = row.get(name)
+            column.append('' if value is None else str(value))
+        self._length += 1
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        return (LookupRow(self, index) for index in range(self._length))
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError(index)
+        return LookupRow(self, index)
+
+    def value(self, index, column):
+        return self._columns[column].value(index)
+
+    def column(self, name):
+        """Every value of a column, as strings."""
+        column = self._columns[name]
+        return [column.value(index) for index in range(self._length)]
+
+    def int_column(self, name):
+        """The int64 array behind a whole-number column, or None.
+
+        Blanks are MISSING (-1), so callers that need real values must check for it.
+        """
+        column = self._columns[name]
+        return column.ints if column.is_int else None
+
+    def where(self, name, value):
+        """Rows whose `name` column equals `value`, comparing codes rather than strings."""
+        column = self._columns[name]
+        if column.is_int:
+            number = _as_int(value)
+            matches = (i for i, v in enumerate(column.ints) if v == number) if number is not None else ()
+        else:
+            code = column.category_index.get(value)
+            matches = (i for i, c in enumerate(column.codes) if c == code) if code is not None else ()
+        return [LookupRow(self, index) for index in matches]
+
+    def distinct(self, name):
+        """The distinct values of a column."""
+        column = self._columns[name]
+        if column.is_int:
+            return {'' if v == MISSING else str(v) for v in column.ints}
+        return set(column.categories)
+
+    def nbytes(self):
+        """Approximate memory held by the column data."""
+        return sum(column.nbytes() for column in self._columns.values())
@@ -0,0 +1,342 @@
+"""
+Partitioned lookup: a lookup.csv split into entity-range shards.
+
+Some lookups (title-boundary) are too large to keep, review or load as a
+single file. A partitioned lookup is a directory, e.g.
+pipeline/title-boundary/lookup/, holding:
+- lookup-00000.csv, lookup-00001.csv, ...: shards with the usual lookup.csv
+  header, each sorted by entity and no larger than about MAX_SHARD_BYTES
+- manifest.json: per shard, its file, rows, entity-minimum/maximum and sha256
+
+Shards cover ascending, non-overlapping entity ranges, so an entity lives in
+exactly one shard and new entities, which are allocated upwards, are appended
+to the last one. Every tool streams rows, holding at most one shard (or one
+sort chunk) in memory:
+
+    python partitioned_lookup.py split lookup.csv pipeline/title-boundary/lookup/
+    python partitioned_lookup.py append pipeline/title-boundary/lookup/ new-rows.csv
+    python partitioned_lookup.py validate pipeline/title-boundary/lookup/ \
+        --entity-organisation pipeline/title-boundary/entity-organisation.csv
+    python partitioned_lookup.py join pipeline/title-boundary/lookup/ pipeline/title-boundary/lookup.csv
+    python partitioned_lookup.py sort big-unsorted.csv sorted.csv
+"""
+
+import csv
+import hashlib
+import heapq
+import json
+import os
+import sys
+import tempfile
+from itertools import groupby
+from pathlib import Path
+
+import click
+
+# Add parent directories to path to import from root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
+from create_collection import COLUMN_MAPPINGS
+
+FIELDNAMES = COLUMN_MAPPINGS['pipeline']['lookup.csv'].split(',')
+MANIFEST_NAME = 'manifest.json'
+MAX_SHARD_BYTES = 50 * 1024 * 1024
+SORT_CHUNK_ROWS = 200_000
+
+
+class PartitionError(Exception):
+    """A partitioned lookup is inconsistent with its manifest or with itself."""
+
+
+def entity_key(row):
+    """Sort key putting rows in entity order, with rows lacking an entity last."""
+    entity = (row.get('entity') or '').strip()
+    return (0, int(entity)) if entity.isdigit() else (1, 0)
+
+
+def _write_rows(path, rows, fieldnames):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, restval='', extrasaction='ignore', lineterminator='\r\n')
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def _read_rows(path):
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            if any((value or '').strip() for value in row.values()):
+                yield row
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def external_sort(rows, fieldnames=FIELDNAMES, chunk_rows=SORT_CHUNK_ROWS, key=entity_key):
+    """Yield rows sorted by `key`, spilling sorted chunks of chunk_rows to temporary files."""
+    with tempfile.TemporaryDirectory() as tmp:
+        chunk_paths = []
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                chunk.sort(key=key)
+                chunk_paths.append(Path(tmp) / f"chunk-{len(chunk_paths)}.csv")
+                _write_rows(chunk_paths[-1], chunk, fieldnames)
+                chunk = []
+        chunk.sort(key=key)
+        if not chunk_paths:
+            yield from chunk
+            return
+        chunk_paths.append(Path(tmp) / f"chunk-{len(chunk_paths)}.csv")
+        _write_rows(chunk_paths[-1], chunk, fieldnames)
+        chunk = []
+        # heapq.merge is stable across its inputs, so equal keys keep input order
+        yield from heapq.merge(*(_read_rows(path) for path in chunk_paths), key=key)
+
+
+class PartitionedLookup:
+    """A directory of entity-range lookup shards described by manifest.json."""
+
+    def __init__(self, directory, max_shard_bytes=MAX_SHARD_BYTES):
+        self.directory = Path(directory)
+        self.max_shard_bytes = max_shard_bytes
+        manifest_path = self.directory / MANIFEST_NAME
+        if manifest_path.exists():
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {'fieldnames': FIELDNAMES, 'shards': []}
+
+    @property
+    def fieldnames(self):
+        return self.manifest['fieldnames']
+
+    @property
+    def shards(self):
+        return self.manifest['shards']
+
+    def __len__(self):
+        return sum(shard['rows'] for shard in self.shards)
+
+    def save_manifest(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / MANIFEST_NAME, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2)
+            f.write('\n')
+
+    def iter_rows(self):
+        """Every row, in entity order, one shard at a time."""
+        for shard in self.shards:
+            yield from _read_rows(self.directory / shard['file'])
+
+    def _shard_entry(self, filename, rows):
+        path = self.directory / filename
+        entities = [entity_key(row)[1] for row in rows if entity_key(row)[0] == 0]
+        return {
+            'file': filename,
+            'rows': len(rows),
+            'entity-minimum': min(entities) if entities else None,
+            'entity-maximum': max(entities) if entities else None,
+            'sha256': _file_hash(path),
+        }
+
+    def _next_filename(self):
+        numbers = [int(shard['file'][len('lookup-'):-len('.csv')]) for shard in self.shards]
+        return f"lookup-{max(numbers, default=-1) + 1:05d}.csv"
+
+    def _write_shards(self, sorted_rows, start_index=None):
+        """Write sorted rows as new shards, cutting at max_shard_bytes between entities."""
+        written = []
+        shard_rows = []
+        shard_bytes = 0
+
+        def flush():
+            filename = self._next_filename()
+            _write_rows(self.directory / filename, shard_rows, self.fieldnames)
+            entry = self._shard_entry(filename, shard_rows)
+            self.shards.append(entry)
+            written.append(entry)
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for _, entity_rows in groupby(sorted_rows, key=entity_key):
+            entity_rows = list(entity_rows)
+            size = sum(len(','.join(row.get(f) or '' for f in self.fieldnames)) + 2 for row in entity_rows)
+            if shard_rows and shard_bytes + size > self.max_shard_bytes:
+                flush()
+                shard_rows, shard_bytes = [], 0
+            shard_rows.extend(entity_rows)
+            shard_bytes += size
+        if shard_rows:
+            flush()
+        return written
+
+    def split(self, rows, chunk_rows=SORT_CHUNK_ROWS):
+        """Replace the partition with `rows` (in any order)."""
+        for shard in self.shards:
+            (self.directory / shard['file']).unlink(missing_ok=True)
+        self.manifest['shards'] = []
+        self._write_shards(external_sort(rows, self.fieldnames, chunk_rows))
+        self.save_manifest()
+
+    def append(self, rows, chunk_rows=SORT_CHUNK_ROWS):
+        """Add rows, merging each into the shard whose range holds its entity.
+
+        Rows beyond the last shard's range are added to the last shard, which
+        is split into new shards once it grows past max_shard_bytes.
+        """
+        incoming = external_sort(rows, self.fieldnames, chunk_rows)
+        maximums = [shard['entity-maximum'] for shard in self.shards]
+        by_shard = {}
+        for row in incoming:
+            kind, entity = entity_key(row)
+            # First shard whose maximum is at least the entity, else the last
+            index = next((i for i, maximum in enumerate(maximums) if kind == 0 and maximum is not None and entity <= maximum),
+                         len(self.shards) - 1)
+            by_shard.setdefault(index, []).append(row)
+
+        for index in sorted(by_shard, reverse=True):
+            if index < 0:
+                self._write_shards(by_shard[index])
+                continue
+            shard = self.shards[index]
+            path = self.directory / shard['file']
+            merged = list(heapq.merge(_read_rows(path), by_shard[index], key=entity_key))
+            if index == len(self.shards) - 1:
+                # The last shard may outgrow max_shard_bytes, so rewrite it as new shards
+                path.unlink()
+                del self.shards[index]
+                self._write_shards(merged)
+            else:
+                _write_rows(path, merged, self.fieldnames)
+                self.shards[index] = self._shard_entry(shard['file'], merged)
+        self.shards.sort(key=lambda shard: (shard['entity-minimum'] is None, shard['entity-minimum'] or 0))
+        self.save_manifest()
+
+    def join(self, output_path):
+        """Write every shard into one lookup.csv, as the pipeline expects."""
+        _write_rows(output_path, self.iter_rows(), self.fieldnames)
+
+    def validate(self, entity_organisation_path=None):
+        """Return a list of problems; an empty list means the partition is valid.
+
+        Checks the manifest against the shards (files, sha256, row counts and
+        entity ranges), that ranges ascend without overlapping, that rows are in
+        entity order, that no entity has more than one organisation and, given
+        entity-organisation.csv, that entities fall in their organisation's range.
+        """
+        problems = []
+        ranges = {}
+        if entity_organisation_path:
+            for row in _read_rows(entity_organisation_path):
+                ranges.setdefault(row['organisation'], []).append(
+                    (int(row['entity-minimum']), int(row['entity-maximum'])))
+
+        previous_maximum = None
+        files = {shard['file'] for shard in self.shards}
+        for path in sorted(self.directory.glob('lookup-*.csv')):
+            if path.name not in files:
+                problems.append(f"{path.name}: not in {MANIFEST_NAME}")
+
+        for shard in self.shards:
+            path = self.directory / shard['file']
+            if not path.exists():
+                problems.append(f"{shard['file']}: missing")
+                continue
+            if _file_hash(path) != shard['sha256']:
+                problems.append(f"{shard['file']}: sha256 does not match {MANIFEST_NAME}")
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                header = next(csv.reader(f), [])
+            if header != self.fieldnames:
+                problems.append(f"{shard['file']}: header {header} does not match {self.fieldnames}")
+
+            minimum, maximum = shard['entity-minimum'], shard['entity-maximum']
+            if previous_maximum is not None and minimum is not None and minimum <= previous_maximum:
+                problems.append(f"{shard['file']}: entity range overlaps the previous shard")
+            previous_maximum = maximum if maximum is not None else previous_maximum
+
+            rows = 0
+            last_entity = None
+            last_organisation = None
+            for line_number, row in enumerate(_read_rows(path), start=2):
+                rows += 1
+                kind, entity = entity_key(row)
+                organisation = row.get('organisation') or ''
+                if kind:
+                    problems.append(f"{shard['file']}:{line_number}: missing entity")
+                    continue
+                if last_entity is not None and entity < last_entity:
+                    problems.append(f"{shard['file']}:{line_number}: entity {entity} is out of order")
+                if minimum is None or not minimum <= entity <= maximum:
+                    problems.append(f"{shard['file']}:{line_number}: entity {entity} is outside the shard's range")
+                if entity == last_entity and organisation != last_organisation:
+                    problems.append(f"{shard['file']}:{line_number}: entity {entity} has more than one organisation")
+                if ranges and organisation and not any(lo <= entity <= hi for lo, hi in ranges.get(organisation, [])):
+                    problems.append(
+                        f"{shard['file']}:{line_number}: entity {entity} is outside {organisation}'s entity-organisation ranges")
+                last_entity, last_organisation = entity, organisation
+            if rows != shard['rows']:
+                problems.append(f"{shard['file']}: {rows} rows, {MANIFEST_NAME} says {shard['rows']}")
+        return problems
+
+
+@click.group(help="Split, append to, join, sort and validate partitioned lookups")
+def cli():
+    pass
+
+
+@cli.command(help="Split a lookup.csv into entity-range shards under DIRECTORY")
+@click.argument('lookup_csv', type=click.Path(exists=True, dir_okay=False))
+@click.argument('directory', type=click.Path(file_okay=False))
+@click.option('--max-shard-bytes', type=click.IntRange(min=1), default=MAX_SHARD_BYTES, show_default=True)
+def split(lookup_csv, directory, max_shard_bytes):
+    partition = PartitionedLookup(directory, max_shard_bytes)
+    partition.split(_read_rows(lookup_csv))
+    print(f"Wrote {len(partition)} rows in {len(partition.shards)} shard(s) to {directory}")
+
+
+@cli.command(help="Add the rows of ROWS_CSV to the partitioned lookup in DIRECTORY")
+@click.argument('directory', type=click.Path(file_okay=False))
+@click.argument('rows_csv', type=click.Path(exists=True, dir_okay=False))
+def append(directory, rows_csv):
+    partition = PartitionedLookup(directory)
+    before = len(partition)
+    partition.append(_read_rows(rows_csv))
+    print(f"Added {len(partition) - before} rows; {len(partition)} rows in {len(partition.shards)} shard(s)")
+
+
+@cli.command(help="Write the partitioned lookup in DIRECTORY to a single OUTPUT_CSV")
+@click.argument('directory', type=click.Path(exists=True, file_okay=False))
+@click.argument('output_csv', type=click.Path(dir_okay=False))
+def join(directory, output_csv):
+    PartitionedLookup(directory).join(output_csv)
+
+
+@cli.command(name='sort', help="Sort a lookup CSV by entity within bounded memory")
+@click.argument('input_csv', type=click.Path(exists=True, dir_okay=False))
+@click.argument('output_csv', type=click.Path(dir_okay=False))
+@click.option('--chunk-rows', type=click.IntRange(min=1), default=SORT_CHUNK_ROWS, show_default=True)
+def sort_command(input_csv, output_csv, chunk_rows):
+    with open(input_csv, 'r', encoding='utf-8', newline='') as f:
+        fieldnames = next(csv.reader(f), FIELDNAMES)
+    _write_rows(output_csv, external_sort(_read_rows(input_csv), fieldnames, chunk_rows), fieldnames)
+
+
+@cli.command(help="Check the shards of DIRECTORY against the manifest and each other")
+@click.argument('directory', type=click.Path(exists=True, file_okay=False))
+@click.option('--entity-organisation', type=click.Path(exists=True, dir_okay=False),
+              help="entity-organisation.csv to check entity ranges against")
+def validate(directory, entity_organisation):
+    problems = PartitionedLookup(directory).validate(entity_organisation)
+    for problem in problems[:100]:
+        print(problem)
+    if problems:
+        raise click.ClickException(f"{len(problems)} problem(s) found in {directory}")
+    print(f"{directory} is valid")
+
+
+if __name__ == '__main__':
+    cli()
@@ -42,20 +42,22 @@ authoritative entity.
 Each redirected entity is added to old-entity.csv with today's date.
 """
 
-import csv
-import io
 import sys
 import logging
-import urllib.request
 from collections import defaultdict
 from datetime import date
 from pathlib import Path
 
+from config_repository import ConfigRepository
+from dataset_snapshot import load_rows
+from redirect_graph import RedirectGraph
+
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
 REPO_ROOT = Path(__file__).resolve().parent.parent.parent
-PIPELINE_DIR = REPO_ROOT / 'pipeline' / 'local-plan'
+PIPELINE = 'local-plan'
+PIPELINE_DIR = REPO_ROOT / 'pipeline' / PIPELINE
 LOOKUP_PATH = PIPELINE_DIR / 'lookup.csv'
 OLD_ENTITY_PATH = PIPELINE_DIR / 'old-entity.csv'
 
@@ -74,18 +76,17 @@ PUBLISHED_PLAN_TIMETABLE_URL = 'https://files.planning.data.gov.uk/dataset/plan-
 
 DATE_FIELDS = ['event-date', 'actual-date', 'start-date', 'predicted-date']
 
-
-def read_csv_file(path):
-    """Read a CSV file and return a list of dicts."""
-    with open(path, 'r', encoding='utf-8') as f:
-        return list(csv.DictReader(f))
+# Columns of the published datasets used for matching and reporting
+PUBLISHED_COLUMNS = [
+    'entity', 'quality', 'organisation-entity', 'document-url', 'name', 'description',
+    'plan', 'plan-event', *DATE_FIELDS,
+]
 
 
-def fetch_csv(url):
-    """Fetch a CSV from a URL and return a list of dicts."""
-    with urllib.request.urlopen(url) as response:
-        content = response.read().decode('utf-8')
-    return list(csv.DictReader(io.StringIO(content)))
+def fetch_published(url):
+    """Load a published dataset as {entity: row}, with just the columns compared here."""
+    rows = load_rows(url, PUBLISHED_COLUMNS, types={'entity': int})
+    return {row['entity']: row for row in rows}
 
 
 def label(row):
@@ -101,6 +102,73 @@ def event_date(row):
     return ''
 
 
+class PlanMatchIndex:
+    """Authoritative rows of one published dataset, indexed for duplicate matching.
+
+    Built once per pass and shared by the matchers, so finding the candidates
+    for a seeded row is a dict lookup rather than a scan of every authoritative
+    row for its organisation-entity:
+    - by_url: (organisation-entity, document-url) -> entities
+    - by_label: (organisation-entity, label) -> entities
+    - by_event_date: (organisation-entity, plan-event, date) -> entities
+    - by_event: (organisation-entity, plan-event) -> [(date, entity), ...] sorted by
+      date, for date-less lookups
+    - org_entities: organisation-entities with any authoritative row
+
+    Rows submitted by any of `exclude_orgs` (per `entity_org_from_lookup`) are left out.
+    """
+
+    def __init__(self, published_by_entity, entity_org_from_lookup=None, exclude_orgs=()):
+        self.by_url = defaultdict(list)
+        self.by_label = defaultdict(list)
+        self.by_event_date = defaultdict(list)
+        self.by_event = defaultdict(list)
+        self.org_entities = set()
+
+        entity_org_from_lookup = entity_org_from_lookup or {}
+        for row in published_by_entity.values():
+            if row.get('quality') != 'authoritative':
+                continue
+            org_entity = row.get('organisation-entity', '').strip()
+            if not org_entity:
+                continue
+            entity = int(row['entity'])
+            if entity_org_from_lookup.get(entity) in exclude_orgs:
+                continue
+
+            self.org_entities.add(org_entity)
+            url = row.get('document-url', '').strip()
+            if url:
+                self.by_url[(org_entity, url)].append(entity)
+            row_label = label(row)
+            if row_label:
+                self.by_label[(org_entity, row_label)].append(entity)
+            plan_event = row.get('plan-event', '').strip()
+            if plan_event:
+                date_value = event_date(row)
+                self.by_event_date[(org_entity, plan_event, date_value)].append(entity)
+                self.by_event[(org_entity, plan_event)].append((date_value, entity))
+
+        for candidates in self.by_event.values():
+            candidates.sort()
+
+    def document_matches(self, org_entity, url, row_label):
+        """{entity: match_type} for authoritative rows sharing the url and/or label."""
+        url_ids = set(self.by_url.get((org_entity, url), ())) if url else set()
+        label_ids = set(self.by_label.get((org_entity, row_label), ())) if row_label else set()
+        return {
+            entity: 'url+name' if (entity in url_ids and entity in label_ids) else ('url' if entity in url_ids else 'name')
+            for entity in url_ids | label_ids
+        }
+
+    def event_matches(self, org_entity, plan_event, date_value):
+        return sorted(set(self.by_event_date.get((org_entity, plan_event, date_value), ())))
+
+    def events(self, org_entity, plan_event):
+        """[(entity, date), ...] for the plan-event, in date order."""
+        return [(entity, date_value) for date_value, entity in self.by_event.get((org_entity, plan_event), [])]
+
+
 # --- Pass 1: local-plan / waste-plan / minerals-plan -----------------------
 
 def find_seeded_plan_entities(lookup_rows, prefix):
@@ -122,25 +190,18 @@ def find_seeded_plan_entities(lookup_rows, prefix):
     return seeded
 
 
-def find_plan_duplicates(seeded_entities, published_by_entity, entity_org_from_lookup):
+def find_plan_duplicates(seeded_entities, published_by_entity, entity_org_from_lookup, index=None):
     """Match seeded (quality=some) rows to authoritative rows from the same LPA.
 
+    `index` is a PlanMatchIndex over `published_by_entity`, built here if not given.
+
     Returns (confirmed, ambiguous, skipped):
     - confirmed: {entity: (org_entity, matched_entity, match_type)} - safe to redirect
     - ambiguous: {entity: [matched_entity, ...]} - multiple distinct candidates, needs a human
     - skipped: {entity: reason} - not comparable (missing/changed/no org) or no match found
     """
-    authoritative_by_org_entity = defaultdict(list)
-    for row in published_by_entity.values():
-        if row.get('quality') != 'authoritative':
-            continue
-        org_entity = row.get('organisation-entity', '').strip()
-        if not org_entity:
-            continue
-        submitting_org = entity_org_from_lookup.get(int(row['entity']))
-        if submitting_org == MHCLG_ORG:
-            continue
-        authoritative_by_org_entity[org_entity].append(row)
+    if index is None:
+        index = PlanMatchIndex(published_by_entity, entity_org_from_lookup, exclude_orgs={MHCLG_ORG})
 
     confirmed = {}
     ambiguous = {}
@@ -160,25 +221,11 @@ def find_plan_duplicates(seeded_entities, published_by_entity, entity_org_from_l
             skipped[entity] = 'no organisation-entity to match against'
             continue
 
-        candidates = authoritative_by_org_entity.get(org_entity, [])
-        if not candidates:
+        if org_entity not in index.org_entities:
             skipped[entity] = 'no authoritative data yet'
             continue
 
-        seeded_url = row.get('document-url', '').strip()
-        seeded_label = label(row)
-
-        matched_entities = {}
-        for candidate in candidates:
-            candidate_url = candidate.get('document-url', '').strip()
-            candidate_label = label(candidate)
-
-            url_match = bool(seeded_url) and seeded_url == candidate_url
-            name_match = bool(seeded_label) and seeded_label == candidate_label
-
-            if url_match or name_match:
-                match_type = 'url+name' if (url_match and name_match) else ('url' if url_match else 'name')
-                matched_entities[int(candidate['entity'])] = match_type
+        matched_entities = index.document_matches(org_entity, row.get('document-url', '').strip(), label(row))
 
         if not matched_entities:
             skipped[entity] = 'no matching authoritative row'
@@ -218,7 +265,32 @@ def find_retired_plan_references(old_entity_rows, lookup_rows, prefixes, extra_r
     return references
 
 
-def find_matching_timetable_events(retired_references, lookup_rows, old_entity_rows, published_by_entity):
+def seeded_timetable_rows(retired_references, lookup_rows, old_entity_rows, published_by_entity, exclude=()):
+    """Yield (entity, published_row) for seeded plan-timetable rows of retired plans.
+
+    Skips rows already in old-entity.csv or in `exclude`, rows not published
+    with quality=some, and rows whose `plan` isn't one of `retired_references`.
+    """
+    already_retired = set(int(r['old-entity']) for r in old_entity_rows)
+    for row in lookup_rows:
+        if row['prefix'] != 'plan-timetable' or row['organisation'] != MHCLG_ORG:
+            continue
+        entity = int(row['entity'])
+        if entity in already_retired or entity in exclude:
+            continue
+
+        published_row = published_by_entity.get(entity)
+        if published_row is None:
+            continue
+        if published_row.get('quality') != 'some':
+            continue
+        if published_row.get('plan', '').strip() not in retired_references:
+            continue
+        yield entity, published_row
+
+
+def find_matching_timetable_events(retired_references, lookup_rows, old_entity_rows, published_by_entity,
+                                   index=None):
     """Find seeded plan-timetable rows with an exact matching authoritative event.
 
     Scoped to plan-timetable rows belonging to a plan already confirmed
@@ -235,45 +307,20 @@ def find_matching_timetable_events(retired_references, lookup_rows, old_entity_r
     - ambiguous: {entity: [matched_entity, ...]} - more than one equally
       specific authoritative match, needs a human
     """
-    already_retired = set(int(r['old-entity']) for r in old_entity_rows)
-
-    authoritative_by_org_entity = defaultdict(list)
-    for row in published_by_entity.values():
-        if row.get('quality') != 'authoritative':
-            continue
-        org_entity = row.get('organisation-entity', '').strip()
-        if org_entity:
-            authoritative_by_org_entity[org_entity].append(row)
+    if index is None:
+        index = PlanMatchIndex(published_by_entity)
 
     confirmed = {}
     ambiguous = {}
-    for row in lookup_rows:
-        if row['prefix'] != 'plan-timetable' or row['organisation'] != MHCLG_ORG:
-            continue
-        entity = int(row['entity'])
-        if entity in already_retired:
-            continue
-
-        published_row = published_by_entity.get(entity)
-        if published_row is None:
-            continue
-        if published_row.get('quality') != 'some':
-            continue
-        if published_row.get('plan', '').strip() not in retired_references:
-            continue
-
+    for entity, published_row in seeded_timetable_rows(
+            retired_references, lookup_rows, old_entity_rows, published_by_entity):
         org_entity = published_row.get('organisation-entity', '').strip()
         plan_event = published_row.get('plan-event', '').strip()
         date_value = event_date(published_row)
         if not (org_entity and plan_event and date_value):
             continue
 
-        matched_ids = sorted(set(
-            int(candidate['entity'])
-            for candidate in authoritative_by_org_entity.get(org_entity, [])
-            if candidate.get('plan-event', '').strip() == plan_event
-            and event_date(candidate) == date_value
-        ))
+        matched_ids = index.event_matches(org_entity, plan_event, date_value)
 
         if not matched_ids:
             continue
@@ -286,7 +333,7 @@ def find_matching_timetable_events(retired_references, lookup_rows, old_entity_r
 
 
 def find_possible_timetable_matches(retired_references, lookup_rows, old_entity_rows,
-                                     published_by_entity, already_matched):
+                                     published_by_entity, already_matched, index=None):
     """Loosely match (organisation-entity, plan-event) ignoring date, for rows
     the strict match left alone. Logging only - never redirected automatically,
     since dropping the date requirement is known to produce false positives
@@ -295,44 +342,22 @@ def find_possible_timetable_matches(retired_references, lookup_rows, old_entity_
     Surfaced so a human can manually confirm and redirect genuine near-misses
     (e.g. a milestone resubmitted a day or two off its original date).
 
+    Candidates are listed in date order.
+
     Returns {entity: [(candidate_entity, candidate_date), ...]}.
     """
-    already_retired = set(int(r['old-entity']) for r in old_entity_rows)
-
-    authoritative_by_org_entity = defaultdict(list)
-    for row in published_by_entity.values():
-        if row.get('quality') != 'authoritative':
-            continue
-        org_entity = row.get('organisation-entity', '').strip()
-        if org_entity:
-            authoritative_by_org_entity[org_entity].append(row)
+    if index is None:
+        index = PlanMatchIndex(published_by_entity)
 
     possible = {}
-    for row in lookup_rows:
-        if row['prefix'] != 'plan-timetable' or row['organisation'] != MHCLG_ORG:
-            continue
-        entity = int(row['entity'])
-        if entity in already_retired or entity in already_matched:
-            continue
-
-        published_row = published_by_entity.get(entity)
-        if published_row is None:
-            continue
-        if published_row.get('quality') != 'some':
-            continue
-        if published_row.get('plan', '').strip() not in retired_references:
-            continue
-
+    for entity, published_row in seeded_timetable_rows(
+            retired_references, lookup_rows, old_entity_rows, published_by_entity, exclude=already_matched):
         org_entity = published_row.get('organisation-entity', '').strip()
         plan_event = published_row.get('plan-event', '').strip()
         if not (org_entity and plan_event):
             continue
 
-        candidates = [
-            (int(candidate['entity']), event_date(candidate))
-            for candidate in authoritative_by_org_entity.get(org_entity, [])
-            if candidate.get('plan-event', '').strip() == plan_event
-        ]
+        candidates = index.events(org_entity, plan_event)
         if candidates:
             possible[entity] = candidates
 
@@ -341,8 +366,8 @@ def find_possible_timetable_matches(retired_references, lookup_rows, old_entity_
 
 # --- Saving ----------------------------------------------------------------
 
-def save_redirected_entities(records, old_entity_rows):
-    """Append redirect records to old-entity.csv.
+def save_redirected_entities(records, old_entity):
+    """Queue redirect records for old-entity.csv; written when the repository is flushed.
 
     `records` is a list of (entity, target_entity, notes) tuples; all are
     written with status=301 since we only ever redirect to a known successor.
@@ -353,43 +378,54 @@ def save_redirected_entities(records, old_entity_rows):
         logger.warning("No entities to redirect")
         return []
 
-    existing = set(int(r['old-entity']) for r in old_entity_rows)
-    to_add = [r for r in records if r[0] not in existing]
-    duplicates = len(records) - len(to_add)
+    graph = RedirectGraph.from_rows(old_entity.rows)
+    # Only report problems with this run's records, not ones already in the file
+    existing_duplicates, existing_cycles = len(graph.duplicates), len(graph.cycles)
+    to_add = [
+        r for r in records
+        if graph.add_redirect(str(r[0]), str(r[1]))
+    ]
+    duplicates = graph.duplicates[existing_duplicates:]
     if duplicates:
-        logger.warning(f"⚠ {duplicates} entities are already in old-entity.csv (skipping)")
+        logger.warning(f"⚠ {len(duplicates)} entities are already in old-entity.csv (skipping)")
+    for entity_id, target_entity in graph.cycles[existing_cycles:]:
+        logger.warning(f"⚠ Skipping {entity_id} → {target_entity}: would create a redirect loop")
+    added = {str(r[0]) for r in to_add}
+    for entity_id, final in graph.conflicts():
+        if entity_id in added:
+            logger.warning(f"⚠ {entity_id} redirects to {final}, which is retired (410)")
 
     if not to_add:
         logger.info("No new entities to add")
         return []
 
-    fieldnames = ['old-entity', 'status', 'entity', 'notes', 'end-date', 'entry-date', 'start-date']
-    with open(OLD_ENTITY_PATH, 'a', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        for entity_id, target_entity, notes in sorted(to_add):
-            writer.writerow({
-                'old-entity': entity_id,
-                'status': 301,
-                'entity': target_entity,
-                'notes': notes,
-                'end-date': '',
-                'entry-date': date.today().isoformat(),
-                'start-date': '',
-            })
+    for entity_id, target_entity, notes in sorted(to_add):
+        old_entity.append({
+            'old-entity': entity_id,
+            'status': 301,
+            'entity': target_entity,
+            'notes': notes,
+            'end-date': '',
+            'entry-date': date.today().isoformat(),
+            'start-date': '',
+        })
 
     logger.info(f"✓ Added {len(to_add)} rows to old-entity.csv")
     return to_add
 
 
-def main():
+def run(repo):
+    """Queue redirects in the repository's old-entity table without writing it."""
     for path in [LOOKUP_PATH, OLD_ENTITY_PATH]:
         if not path.exists():
             logger.error(f"Required file not found: {path}")
             sys.exit(1)
 
     logger.info("Loading CSV files...")
-    lookup_rows = read_csv_file(LOOKUP_PATH)
-    old_entity_rows = read_csv_file(OLD_ENTITY_PATH)
+    lookup_rows = repo.lookup_table(PIPELINE)
+    old_entity = repo.old_entity(PIPELINE)
+    # Snapshot of the rows before this run's redirects are queued
+    old_entity_rows = list(old_entity.rows)
     logger.info(f"Loaded lookup.csv ({len(lookup_rows)} rows)")
     logger.info(f"Loaded old-entity.csv ({len(old_entity_rows)} rows)")
 
@@ -415,10 +451,11 @@ def main():
         logger.info(f"Found {len(seeded)} MHCLG-seeded {prefix} entities")
 
         logger.info(f"Fetching published {prefix}.csv...")
-        published = {int(r['entity']): r for r in fetch_csv(PLAN_DATASET_URLS[prefix])}
+        published = fetch_published(PLAN_DATASET_URLS[prefix])
         logger.info(f"Loaded {len(published)} published {prefix} rows")
 
-        confirmed, ambiguous, skipped = find_plan_duplicates(seeded, published, entity_org_from_lookup)
+        index = PlanMatchIndex(published, entity_org_from_lookup, exclude_orgs={MHCLG_ORG})
+        confirmed, ambiguous, skipped = find_plan_duplicates(seeded, published, entity_org_from_lookup, index)
         logger.info(f"Confirmed duplicates: {len(confirmed)}")
         logger.info(f"Ambiguous (needs manual review): {len(ambiguous)}")
         logger.info(f"No match / not comparable: {len(skipped)}")
@@ -454,11 +491,12 @@ def main():
     timetable_published = {}
     if retired_references:
         logger.info("Fetching published plan-timetable.csv...")
-        timetable_published = {int(r['entity']): r for r in fetch_csv(PUBLISHED_PLAN_TIMETABLE_URL)}
+        timetable_published = fetch_published(PUBLISHED_PLAN_TIMETABLE_URL)
         logger.info(f"Loaded {len(timetable_published)} published plan-timetable rows")
 
+        timetable_index = PlanMatchIndex(timetable_published)
         confirmed_tt, ambiguous_tt = find_matching_timetable_events(
-            retired_references, lookup_rows, old_entity_rows, timetable_published)
+            retired_references, lookup_rows, old_entity_rows, timetable_published, timetable_index)
         logger.info(f"Confirmed matching events: {len(confirmed_tt)}")
         logger.info(f"Ambiguous (needs manual review): {len(ambiguous_tt)}")
 
@@ -469,7 +507,8 @@ def main():
 
         already_matched = set(confirmed_tt) | set(ambiguous_tt)
         possible_tt = find_possible_timetable_matches(
-            retired_references, lookup_rows, old_entity_rows, timetable_published, already_matched)
+            retired_references, lookup_rows, old_entity_rows, timetable_published, already_matched,
+            timetable_index)
         logger.info(f"Possible matches, date differs (needs manual review): {len(possible_tt)}")
 
         if possible_tt:
@@ -493,10 +532,10 @@ def main():
 
     # --- Save ---
     all_records = plan_records + timetable_records
-    entities_added = save_redirected_entities(all_records, old_entity_rows)
+    entities_added = save_redirected_entities(all_records, old_entity)
     if not entities_added and not possible_tt:
         logger.warning("No entities redirected")
-        sys.exit(0)
+        return
 
     added_by_entity = {e: (target, notes) for e, target, notes in entities_added}
 
@@ -558,5 +597,11 @@ def main():
     logger.info("\n✓ Redirection completed successfully")
 
 
+def main():
+    repo = ConfigRepository(REPO_ROOT)
+    run(repo)
+    repo.flush()
+
+
 if __name__ == '__main__':
     main()
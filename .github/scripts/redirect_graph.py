@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Redirect graph over old-entity.csv.
+
+Every 301 row is an edge old-entity -> entity and every 410 row marks an
+entity as gone. Each entity has at most one outgoing redirect, so the graph
+is a forest of chains; final destinations are found union-find style, with
+path compression, so resolving every chain is near-linear however long the
+chains get.
+
+Edges are added incrementally. An edge is rejected (and recorded) rather
+than added when its old-entity already has a row, or when it would close a
+cycle, so callers can validate a proposed redirect before writing it.
+
+Run as a script to validate one or more old-entity.csv files:
+
+    python .github/scripts/redirect_graph.py pipeline/*/old-entity.csv
+"""
+
+import csv
+import sys
+from pathlib import Path
+
+
+class RedirectGraph:
+    def __init__(self):
+        self.targets = {}       # old-entity -> entity, for accepted 301 rows
+        self.gone = set()       # old-entities with a 410 row
+        self.all_sources = set()  # old-entities with any row, whatever its status or whether it was accepted
+        self.inbound = {}       # entity -> number of accepted redirects pointing at it
+        self.cycles = []        # (old-entity, entity) 301s rejected because they close a loop
+        self.duplicates = []    # (old-entity, status, entity) rows for an already-listed old-entity
+        self._parent = {}
+
+    @classmethod
+    def from_rows(cls, rows):
+        graph = cls()
+        for row in rows:
+            graph.add_row(row)
+        return graph
+
+    @classmethod
+    def from_csv(cls, path):
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            return cls.from_rows(csv.DictReader(f))
+
+    def add_row(self, row):
+        """Add an old-entity.csv row; returns True if it was accepted into the graph."""
+        old_entity = (row.get('old-entity') or '').strip()
+        status = (row.get('status') or '').strip()
+        entity = (row.get('entity') or '').strip()
+        if not old_entity:
+            return False
+        self.all_sources.add(old_entity)
+        if status == '301' and entity:
+            return self.add_redirect(old_entity, entity)
+        if status == '410':
+            return self.add_gone(old_entity)
+        return False
+
+    def is_source(self, entity):
+        """True if the entity already has an old-entity row (redirected or gone)."""
+        return entity in self.targets or entity in self.gone
+
+    def is_target(self, entity):
+        return self.inbound.get(entity, 0) > 0
+
+    def add_redirect(self, old_entity, entity):
+        if self.is_source(old_entity):
+            self.duplicates.append((old_entity, '301', entity))
+            return False
+        if old_entity == entity or self.find(entity) == old_entity:
+            self.cycles.append((old_entity, entity))
+            return False
+        self.targets[old_entity] = entity
+        self.inbound[entity] = self.inbound.get(entity, 0) + 1
+        self._parent[old_entity] = entity
+        return True
+
+    def add_gone(self, old_entity):
+        if self.is_source(old_entity):
+            self.duplicates.append((old_entity, '410', ''))
+            return False
+        self.gone.add(old_entity)
+        return True
+
+    def find(self, entity):
+        """Final destination of `entity`, compressing the path on the way."""
+        root = entity
+        while root in self._parent:
+            root = self._parent[root]
+        while entity != root:
+            self._parent[entity], entity = root, self._parent[entity]
+        return root
+
+    def resolve_all(self):
+        """Map of every redirected old-entity to its final destination."""
+        return {old_entity: self.find(old_entity) for old_entity in self.targets}
+
+    def chained_sources(self):
+        """Old-entities whose direct target is itself redirected."""
+        return [
+            old_entity for old_entity, entity in self.targets.items()
+            if entity in self.targets
+        ]
+
+    def conflicts(self):
+        """Redirects whose chain ends at a gone (410) entity, as (old-entity, final) pairs."""
+        return [
+            (old_entity, final) for old_entity, final in self.resolve_all().items()
+            if final in self.gone
+        ]
+
+
+def main(paths):
+    failed = False
+    for path in paths:
+        graph = RedirectGraph.from_csv(path)
+        chained = graph.chained_sources()
+        conflicts = graph.conflicts()
+        print(f"{path}: {len(graph.targets)} redirects, {len(graph.gone)} gone, "
+              f"{len(chained)} chained, {len(graph.cycles)} cycles, "
+              f"{len(graph.duplicates)} duplicates, {len(conflicts)} redirects to gone entities")
+        for old_entity, entity in graph.cycles:
+            print(f"  ✗ cycle: {old_entity} → {entity}")
+        for old_entity, status, entity in graph.duplicates:
+            print(f"  ✗ duplicate: {old_entity} ({status}{' → ' + entity if entity else ''})")
+        for old_entity, final in conflicts:
+            print(f"  ✗ {old_entity} redirects to {final}, which is gone (410)")
+        failed = failed or bool(graph.cycles or graph.duplicates or conflicts)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Usage: python redirect_graph.py <old-entity.csv> [...]")
+        sys.exit(2)
+    sys.exit(main([Path(p) for p in sys.argv[1:]]))
@@ -19,14 +19,17 @@ Datasets processed:
 - plan-timetable
 """
 
-import csv
-import io
-import urllib.request
 import sys
 import logging
 from datetime import date
 from pathlib import Path
 
+import numpy as np
+
+from config_repository import ConfigRepository
+from dataset_snapshot import load_rows
+from lookup_table import MISSING
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -35,7 +38,8 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 REPO_ROOT = Path(__file__).resolve().parent.parent.parent
-PIPELINE_DIR = REPO_ROOT / 'pipeline' / 'local-plan'
+PIPELINE = 'local-plan'
+PIPELINE_DIR = REPO_ROOT / 'pipeline' / PIPELINE
 LOOKUP_PATH = PIPELINE_DIR / 'lookup.csv'
 ENTITY_ORG_PATH = PIPELINE_DIR / 'entity-organisation.csv'
 OLD_ENTITY_PATH = PIPELINE_DIR / 'old-entity.csv'
@@ -55,18 +59,35 @@ MHCLG_RANGES = {
 MHCLG_ENTITY_RANGE = 22
 
 
-def in_mhclg_range(entity, prefix):
-    """True if a single entity sits inside a fake-template block."""
-    return any(lo <= entity <= hi for lo, hi in MHCLG_RANGES[prefix])
+def _block_index(values, prefix):
+    """For each value, the index of the first fake block ending at or after it.
+
+    Returns (index, lows, highs); `index` is clipped, so callers must still check
+    the value against lows[index] and highs[index].
+    """
+    blocks = np.array(sorted(MHCLG_RANGES[prefix]), dtype=np.int64)
+    lows, highs = blocks[:, 0], blocks[:, 1]
+    index = np.minimum(np.searchsorted(highs, values), len(highs) - 1)
+    return index, lows, highs
+
+
+def in_mhclg_range(entities, prefix):
+    """Boolean mask of the entities sitting inside a fake-template block."""
+    entities = np.asarray(entities, dtype=np.int64)
+    index, lows, highs = _block_index(entities, prefix)
+    return (lows[index] <= entities) & (entities <= highs[index])
 
 
-def range_within_mhclg(entity_min, entity_max, prefix):
-    """True if an entity-organisation range sits wholly inside one fake block.
+def range_within_mhclg(entity_mins, entity_maxs, prefix):
+    """Boolean mask of the entity-organisation ranges sitting wholly inside one fake block.
 
-    A range sitting in the real-data gap, or spanning it, returns False - it is not
+    A range sitting in the real-data gap, or spanning it, is False - it is not
     a fake template and must not be retired.
     """
-    return any(lo <= entity_min and entity_max <= hi for lo, hi in MHCLG_RANGES[prefix])
+    entity_mins = np.asarray(entity_mins, dtype=np.int64)
+    entity_maxs = np.asarray(entity_maxs, dtype=np.int64)
+    index, lows, highs = _block_index(entity_mins, prefix)
+    return (lows[index] <= entity_mins) & (entity_maxs <= highs[index])
 
 
 def describe_mhclg_ranges(prefix):
@@ -74,10 +95,93 @@ def describe_mhclg_ranges(prefix):
     return ', '.join(f"{lo}-{hi}" for lo, hi in MHCLG_RANGES[prefix])
 
 
-def read_csv_file(path):
-    """Read a CSV file and return a list of dicts."""
-    with open(path, 'r', encoding='utf-8') as f:
-        return list(csv.DictReader(f))
+class PlanTables:
+    """Columnar copy of lookup.csv (from a LookupTable) and entity-organisation.csv.
+
+    Entities and ranges are int64 arrays and the text columns object arrays,
+    so each retirement step is a handful of vectorised masks rather than a
+    Python pass over every row.
+    """
+
+    def __init__(self, lookup, entity_org_rows):
+        entities = lookup.int_column('entity')
+        self.lookup = {
+            'prefix': np.array(lookup.column('prefix'), dtype=object),
+            'organisation': np.array(lookup.column('organisation'), dtype=object),
+            'reference': np.array(lookup.column('reference'), dtype=object),
+            'entity': (
+                np.frombuffer(entities, dtype=np.int64).copy() if entities is not None
+                else np.array([int(e) if e else MISSING for e in lookup.column('entity')], dtype=np.int64)
+            ),
+        }
+        self.entity_org = {
+            'dataset': np.array([r['dataset'] for r in entity_org_rows], dtype=object),
+            'organisation': np.array([r['organisation'] for r in entity_org_rows], dtype=object),
+            'minimum': np.array([int(r['entity-minimum']) for r in entity_org_rows], dtype=np.int64),
+            'maximum': np.array([int(r['entity-maximum']) for r in entity_org_rows], dtype=np.int64),
+        }
+
+    @staticmethod
+    def _select(columns, mask):
+        return {name: values[mask] for name, values in columns.items()}
+
+    def lookup_for(self, prefix):
+        """The prefix's lookup rows; raises ValueError if any has no entity."""
+        lookup = self._select(self.lookup, self.lookup['prefix'] == prefix)
+        blank = lookup['entity'] == MISSING
+        if blank.any():
+            raise ValueError(
+                f"ERROR: {int(blank.sum())} {prefix} row(s) in lookup.csv have no entity "
+                f"(references: {', '.join(lookup['reference'][blank][:5])})."
+            )
+        return lookup
+
+    def entity_org_for(self, dataset):
+        return self._select(self.entity_org, self.entity_org['dataset'] == dataset)
+
+
+def group_min_max(keys, values):
+    """Vectorised group-by: returns (sorted unique keys, per-key min, per-key max)."""
+    groups, inverse = np.unique(keys, return_inverse=True)
+    mins = np.full(len(groups), np.iinfo(np.int64).max, dtype=np.int64)
+    maxs = np.full(len(groups), np.iinfo(np.int64).min, dtype=np.int64)
+    np.minimum.at(mins, inverse, values)
+    np.maximum.at(maxs, inverse, values)
+    return groups, mins, maxs
+
+
+def find_new_lpa_data(lookup, prefix):
+    """Split LPA-submitted lookup rows into new data and in-place updates of MHCLG data.
+
+    LPAs that updated MHCLG data in-place (within a fake block) don't need
+    retirement since the MHCLG data was overwritten, not duplicated. Returns
+    (entities, organisations) for the LPA rows outside the fake blocks, or None
+    if there's nothing to retire.
+    """
+    lpa = lookup['organisation'] != MHCLG_ORG
+    if not lpa.any():
+        logger.warning(f"No LPA data found for {prefix}")
+        return None
+
+    in_block = in_mhclg_range(lookup['entity'], prefix)
+    new_data = lpa & ~in_block
+    entities = lookup['entity'][new_data]
+    organisations = lookup['organisation'][new_data]
+
+    updated_in_place_orgs = set(lookup['organisation'][lpa & in_block]) - set(organisations)
+    if updated_in_place_orgs:
+        logger.info(
+            f"Skipping {len(updated_in_place_orgs)} LPAs that updated MHCLG data in-place "
+            f"(no retirement needed): {', '.join(sorted(updated_in_place_orgs))}"
+        )
+
+    if not len(entities):
+        logger.info("No LPAs with new data outside MHCLG range — nothing to retire")
+        return None
+
+    logger.info(f"LPA entity range: {entities.min()} - {entities.max()}")
+    logger.info(f"✓ All LPA entities outside MHCLG range ({describe_mhclg_ranges(prefix)})")
+    return entities, organisations
 
 
 def authority_to_slug(name):
@@ -115,10 +219,7 @@ def fetch_organisation_data():
     """
     logger.info("Loading organisation mapping from planning.data.gov.uk...")
     url = 'https://files.planning.data.gov.uk/organisation-collection/dataset/organisation.csv'
-    with urllib.request.urlopen(url) as response:
-        content = response.read().decode('utf-8')
-
-    reader = csv.DictReader(io.StringIO(content))
+    reader = load_rows(url, ['organisation', 'name', 'organisations'])
     name_by_org = {}
     group_constituents = {}
     for row in reader:
@@ -133,89 +234,41 @@ def fetch_organisation_data():
     return name_by_org, group_constituents
 
 
-def retire_plan_timetable_data(lookup_rows, entity_org_rows, group_constituents):
+def retire_plan_timetable_data(tables, group_constituents):
     """Retire MHCLG seeded data for plan-timetable dataset. Returns (entities, orgs)."""
     logger.info("\n=== Processing plan-timetable dataset ===")
 
     prefix = 'plan-timetable'
+    lookup = tables.lookup_for(prefix)
+    entity_org = tables.entity_org_for(prefix)
 
-    # Step 1: Find LPAs that provided data
-    all_lpa_rows = [
-        r for r in lookup_rows
-        if r['organisation'] != MHCLG_ORG and r['prefix'] == prefix
-    ]
-
-    if not all_lpa_rows:
-        logger.warning(f"No LPA data found for {prefix}")
-        return {}, set()
-
-    # Separate LPAs that created new data (outside the fake blocks) from those that
-    # updated MHCLG data in-place (within a fake block). In-place updates don't
-    # need retirement since the MHCLG data was overwritten, not duplicated.
-    def is_in_mhclg_range(entity):
-        return in_mhclg_range(entity, prefix)
-
-    lpa_rows = [r for r in all_lpa_rows if not is_in_mhclg_range(int(r['entity']))]
-
-    updated_in_place_orgs = set(
-        r['organisation'] for r in all_lpa_rows if is_in_mhclg_range(int(r['entity']))
-    ) - set(r['organisation'] for r in lpa_rows)
-
-    if updated_in_place_orgs:
-        logger.info(
-            f"Skipping {len(updated_in_place_orgs)} LPAs that updated MHCLG data in-place "
-            f"(no retirement needed): {', '.join(sorted(updated_in_place_orgs))}"
-        )
-
-    if not lpa_rows:
-        logger.info("No LPAs with new data outside MHCLG range — nothing to retire")
+    # Step 1: Find LPAs that provided new data, outside the fake blocks
+    lpa_data = find_new_lpa_data(lookup, prefix)
+    if lpa_data is None:
         return {}, set()
-
-    min_lpa = min(int(r['entity']) for r in lpa_rows)
-    max_lpa = max(int(r['entity']) for r in lpa_rows)
-    logger.info(f"LPA entity range: {min_lpa} - {max_lpa}")
-    logger.info(f"✓ All LPA entities outside MHCLG range ({describe_mhclg_ranges(prefix)})")
+    lpa_entities, lpa_organisations = lpa_data
 
     # Step 2: Get min/max entity per organisation from LPA data
-    org_ranges = {}
-    for row in lpa_rows:
-        org = row['organisation']
-        entity = int(row['entity'])
-        if org not in org_ranges:
-            org_ranges[org] = {'min': entity, 'max': entity}
-        else:
-            org_ranges[org]['min'] = min(org_ranges[org]['min'], entity)
-            org_ranges[org]['max'] = max(org_ranges[org]['max'], entity)
+    orgs, org_mins, org_maxs = group_min_max(lpa_organisations, lpa_entities)
+    logger.info(f"Found {len(orgs)} LPAs with new authoritative data")
 
-    logger.info(f"Found {len(org_ranges)} LPAs with new authoritative data")
-
-    # Step 3: Filter entity-organisation to this dataset and orgs with data
-    entity_org_filtered = [
-        r for r in entity_org_rows
-        if r['dataset'] == prefix and r['organisation'] in org_ranges
-    ]
+    # Step 3: Filter entity-organisation to orgs with data
+    eo_orgs, eo_mins, eo_maxs = entity_org['organisation'], entity_org['minimum'], entity_org['maximum']
+    position = np.minimum(np.searchsorted(orgs, eo_orgs), len(orgs) - 1)
+    has_data = orgs[position] == eo_orgs
 
     # Step 4: Anti-join - find ranges NOT matching the LPA's authoritative data
-    lpa_range_keys = {
-        (org, data['min'], data['max'])
-        for org, data in org_ranges.items()
-    }
-
-    mhclg_to_retire = []
-    for row in entity_org_filtered:
-        org = row['organisation']
-        entity_min = int(row['entity-minimum'])
-        entity_max = int(row['entity-maximum'])
-        if (org, entity_min, entity_max) not in lpa_range_keys:
-            mhclg_to_retire.append((org, entity_min, entity_max))
+    same_range = has_data & (eo_mins == org_mins[position]) & (eo_maxs == org_maxs[position])
 
     # Step 5: Filter to ranges with exactly 23 entities (MHCLG template size) that
     # sit wholly inside a fake block. The containment test excludes real published
     # data in the gap between the blocks, which is MHCLG-authored but must be kept.
+    within_block = range_within_mhclg(eo_mins, eo_maxs, prefix)
+    template = within_block & ((eo_maxs - eo_mins) == MHCLG_ENTITY_RANGE)
+    retire = has_data & ~same_range & template
     mhclg_to_retire = [
-        (org, emin, emax) for org, emin, emax in mhclg_to_retire
-        if (emax - emin) == MHCLG_ENTITY_RANGE
-        and range_within_mhclg(emin, emax, prefix)
+        (org, int(emin), int(emax))
+        for org, emin, emax in zip(eo_orgs[retire], eo_mins[retire], eo_maxs[retire])
     ]
     logger.info(f"Found {len(mhclg_to_retire)} MHCLG-seeded entity ranges to retire")
 
@@ -225,16 +278,12 @@ def retire_plan_timetable_data(lookup_rows, entity_org_rows, group_constituents)
     # every constituent is already covered — by its own direct submission above, or
     # by a template found here — the group itself doesn't need one of its own.
     orgs_with_retirement = set(org for org, _, _ in mhclg_to_retire)
-    orgs_missing = set(org_ranges.keys()) - orgs_with_retirement
+    orgs_missing = set(orgs) - orgs_with_retirement
 
     # An org only needs a template retiring if MHCLG seeded one for it inside a fake
     # block. County councils whose only MHCLG-authored data is a real minerals and
     # waste timetable in the gap have nothing to retire, so they are exempt.
-    seeded = {
-        r['organisation'] for r in entity_org_rows
-        if r['dataset'] == prefix
-        and range_within_mhclg(int(r['entity-minimum']), int(r['entity-maximum']), prefix)
-    }
+    seeded = set(eo_orgs[within_block])
     never_seeded = {
         org for org in orgs_missing
         if not (constituent_orgs(org, group_constituents) & seeded)
@@ -246,6 +295,11 @@ def retire_plan_timetable_data(lookup_rows, entity_org_rows, group_constituents)
         )
     orgs_missing -= never_seeded
 
+    # First template-sized range inside a fake block for each organisation
+    template_by_org = {}
+    for org, emin, emax in zip(eo_orgs[template], eo_mins[template], eo_maxs[template]):
+        template_by_org.setdefault(org, (int(emin), int(emax)))
+
     still_missing = set()
     for org in sorted(orgs_missing):
         constituents = constituent_orgs(org, group_constituents)
@@ -257,15 +311,9 @@ def retire_plan_timetable_data(lookup_rows, entity_org_rows, group_constituents)
         for constituent in constituents:
             if constituent in orgs_with_retirement:
                 continue
-            match = next(
-                (r for r in entity_org_rows
-                 if r['dataset'] == prefix and r['organisation'] == constituent
-                 and int(r['entity-maximum']) - int(r['entity-minimum']) == MHCLG_ENTITY_RANGE
-                 and range_within_mhclg(int(r['entity-minimum']), int(r['entity-maximum']), prefix)),
-                None
-            )
+            match = template_by_org.get(constituent)
             if match:
-                mhclg_to_retire.append((org, int(match['entity-minimum']), int(match['entity-maximum'])))
+                mhclg_to_retire.append((org, *match))
             else:
                 all_covered = False
 
@@ -281,7 +329,7 @@ def retire_plan_timetable_data(lookup_rows, entity_org_rows, group_constituents)
             "These LPAs provided data but no fake template was identified to retire."
         )
     logger.info(
-        f"✓ All {len(org_ranges) - len(never_seeded)} LPAs have a matching MHCLG template range"
+        f"✓ All {len(orgs) - len(never_seeded)} LPAs have a matching MHCLG template range"
     )
 
     if not mhclg_to_retire:
@@ -289,30 +337,26 @@ def retire_plan_timetable_data(lookup_rows, entity_org_rows, group_constituents)
         return {}, set()
 
     # Step 6: Expand ranges to individual entities and verify they are MHCLG
+    mhclg_entities = np.sort(lookup['entity'][lookup['organisation'] == MHCLG_ORG])
     entity_to_org = {}
 
     for org, entity_min, entity_max in mhclg_to_retire:
-        mhclg_entities = [
-            int(r['entity']) for r in lookup_rows
-            if r['organisation'] == MHCLG_ORG
-            and r['prefix'] == prefix
-            and int(r['entity']) >= entity_min
-            and int(r['entity']) <= entity_max
-        ]
+        start = np.searchsorted(mhclg_entities, entity_min, side='left')
+        end = np.searchsorted(mhclg_entities, entity_max, side='right')
+        in_range = mhclg_entities[start:end]
 
         expected_count = entity_max - entity_min + 1
-        if len(mhclg_entities) != expected_count:
+        if len(in_range) != expected_count:
             logger.warning(
                 f"  {org}: Expected {expected_count} entities in range "
-                f"[{entity_min}, {entity_max}], found {len(mhclg_entities)}"
+                f"[{entity_min}, {entity_max}], found {len(in_range)}"
             )
 
-        for e in mhclg_entities:
+        for e in in_range.tolist():
             entity_to_org[e] = (org, prefix)
 
     # No-overlap check: ensure no entity being retired is also LPA authoritative data
-    lpa_entity_set = set(int(r['entity']) for r in lpa_rows)
-    overlap = set(entity_to_org.keys()) & lpa_entity_set
+    overlap = set(entity_to_org.keys()) & set(lpa_entities.tolist())
     if overlap:
         raise ValueError(
             f"ERROR: Entities {sorted(overlap)} are in BOTH the retirement list and "
@@ -321,54 +365,25 @@ def retire_plan_timetable_data(lookup_rows, entity_org_rows, group_constituents)
     logger.info(f"✓ No overlap with LPA authoritative data")
 
     logger.info(f"✓ Verified and queued {len(entity_to_org)} plan-timetable entities for retirement")
-    return entity_to_org, set(org_ranges.keys()) - never_seeded
+    return entity_to_org, set(orgs) - never_seeded
 
 
-def retire_local_plan_data(lookup_rows, entity_org_rows, org_mapping, group_constituents):
+def retire_local_plan_data(tables, org_mapping, group_constituents):
     """Retire MHCLG seeded data for local-plan dataset. Returns (entities, orgs)."""
     logger.info("\n=== Processing local-plan dataset ===")
 
     prefix = 'local-plan'
+    lookup = tables.lookup_for(prefix)
+    entity_org = tables.entity_org_for(prefix)
 
-    # Step 1: Find LPAs that provided data
-    all_lpa_rows = [
-        r for r in lookup_rows
-        if r['organisation'] != MHCLG_ORG and r['prefix'] == prefix
-    ]
-
-    if not all_lpa_rows:
-        logger.warning(f"No LPA data found for {prefix}")
+    # Step 1: Find LPAs that provided new data, outside the MHCLG range
+    lpa_data = find_new_lpa_data(lookup, prefix)
+    if lpa_data is None:
         return {}, set()
-
-    # Separate LPAs that created new data (outside MHCLG range) from those that
-    # updated MHCLG data in-place (within MHCLG range). In-place updates don't
-    # need retirement since the MHCLG data was overwritten, not duplicated.
-    def is_in_mhclg_range(entity):
-        return in_mhclg_range(entity, prefix)
-
-    lpa_rows = [r for r in all_lpa_rows if not is_in_mhclg_range(int(r['entity']))]
-
-    updated_in_place_orgs = set(
-        r['organisation'] for r in all_lpa_rows if is_in_mhclg_range(int(r['entity']))
-    ) - set(r['organisation'] for r in lpa_rows)
-
-    if updated_in_place_orgs:
-        logger.info(
-            f"Skipping {len(updated_in_place_orgs)} LPAs that updated MHCLG data in-place "
-            f"(no retirement needed): {', '.join(sorted(updated_in_place_orgs))}"
-        )
-
-    if not lpa_rows:
-        logger.info("No LPAs with new data outside MHCLG range — nothing to retire")
-        return {}, set()
-
-    min_lpa = min(int(r['entity']) for r in lpa_rows)
-    max_lpa = max(int(r['entity']) for r in lpa_rows)
-    logger.info(f"LPA entity range: {min_lpa} - {max_lpa}")
-    logger.info(f"✓ All LPA entities outside MHCLG range ({describe_mhclg_ranges(prefix)})")
+    lpa_entities, lpa_organisations = lpa_data
 
     # Step 2: Generate fake plan references from LPA organisation names
-    lpa_orgs = set(r['organisation'] for r in lpa_rows)
+    lpa_orgs = set(lpa_organisations)
 
     # Validation #4: Fail if any LPA org name could not be resolved
     unresolved_orgs = [org for org in lpa_orgs if org not in org_mapping]
@@ -391,18 +406,31 @@ def retire_local_plan_data(lookup_rows, entity_org_rows, org_mapping, group_cons
     # Build reverse mapping: reference -> org
     ref_to_org = {ref: org for org, ref in fake_plan_references.items()}
 
-    entity_to_org = {}
-    for row in lookup_rows:
-        if (row['organisation'] == MHCLG_ORG
-                and row['prefix'] == prefix
-                and row['reference'] in fake_plan_references.values()):
-            entity = int(row['entity'])
-            if not is_in_mhclg_range(entity):
-                raise ValueError(
-                    f"ERROR: Found MHCLG entity {entity} outside expected range "
-                    f"({describe_mhclg_ranges(prefix)}). This indicates data corruption."
-                )
-            entity_to_org[entity] = (ref_to_org[row['reference']], prefix)
+    mhclg = lookup['organisation'] == MHCLG_ORG
+    mhclg_entities_col = lookup['entity'][mhclg]
+    mhclg_references = lookup['reference'][mhclg]
+
+    def check_in_range(entities):
+        outside = entities[~in_mhclg_range(entities, prefix)]
+        if len(outside):
+            raise ValueError(
+                f"ERROR: Found MHCLG entity {outside[0]} outside expected range "
+                f"({describe_mhclg_ranges(prefix)}). This indicates data corruption."
+            )
+
+    matched = np.isin(mhclg_references, list(ref_to_org))
+    check_in_range(mhclg_entities_col[matched])
+    entity_to_org = {
+        int(entity): (ref_to_org[reference], prefix)
+        for entity, reference in zip(mhclg_entities_col[matched], mhclg_references[matched])
+    }
+
+    # First MHCLG entity for each reference, and first reference for each entity
+    entity_by_reference = {}
+    reference_by_entity = {}
+    for entity, reference in zip(mhclg_entities_col.tolist(), mhclg_references):
+        entity_by_reference.setdefault(reference, entity)
+        reference_by_entity.setdefault(entity, reference)
 
     # Completeness check: every LPA with data should have a MHCLG template entity.
     # Joint local-planning-group orgs submit data under a combined code, but MHCLG
@@ -430,21 +458,11 @@ def retire_local_plan_data(lookup_rows, entity_org_rows, org_mapping, group_cons
                 continue
             slug = authority_to_slug(org_mapping[constituent])
             reference = f"{slug}-new-local-plan"
-            match = next(
-                (r for r in lookup_rows
-                 if r['organisation'] == MHCLG_ORG and r['prefix'] == prefix
-                 and r['reference'] == reference),
-                None
-            )
-            if not match:
+            entity = entity_by_reference.get(reference)
+            if entity is None:
                 all_covered = False
                 continue
-            entity = int(match['entity'])
-            if not is_in_mhclg_range(entity):
-                raise ValueError(
-                    f"ERROR: Found MHCLG entity {entity} outside expected range "
-                    f"({describe_mhclg_ranges(prefix)}). This indicates data corruption."
-                )
+            check_in_range(np.array([entity], dtype=np.int64))
             entity_to_org[entity] = (org, prefix)
             ref_to_org[reference] = org
 
@@ -465,8 +483,7 @@ def retire_local_plan_data(lookup_rows, entity_org_rows, org_mapping, group_cons
     logger.info(f"Found {len(mhclg_entities)} MHCLG local plan entities to retire")
 
     # No-overlap check: ensure no entity being retired is also LPA authoritative data
-    lpa_entity_set = set(int(r['entity']) for r in lpa_rows)
-    overlap = mhclg_entities & lpa_entity_set
+    overlap = mhclg_entities & set(lpa_entities.tolist())
     if overlap:
         raise ValueError(
             f"ERROR: Entities {sorted(overlap)} are in BOTH the retirement list and "
@@ -475,23 +492,16 @@ def retire_local_plan_data(lookup_rows, entity_org_rows, org_mapping, group_cons
     logger.info(f"✓ No overlap with LPA authoritative data")
 
     # Cross-check each entity falls within an entity-organisation range for its LPA
-    entity_org_ranges = [
-        (r['organisation'], int(r['entity-minimum']), int(r['entity-maximum']))
-        for r in entity_org_rows
-        if r['dataset'] == prefix
-    ]
-
-    for entity in mhclg_entities:
-        # Find which LPA this entity's reference belongs to
-        reference = None
-        for row in lookup_rows:
-            if (row['prefix'] == prefix
-                    and int(row['entity']) == entity
-                    and row['organisation'] == MHCLG_ORG):
-                reference = row['reference']
-                break
-
-        # Find the LPA org that generated this reference
+    # (or one of its constituent authorities, for joint local-planning-groups):
+    # an interval join of the entities against each organisation's ranges
+    ranges_by_org = {}
+    for org in set(entity_org['organisation']):
+        mask = entity_org['organisation'] == org
+        ranges_by_org[org] = (entity_org['minimum'][mask], entity_org['maximum'][mask])
+
+    for entity in sorted(mhclg_entities):
+        # Find the LPA org that generated this entity's reference
+        reference = reference_by_entity.get(entity)
         lpa_org = ref_to_org.get(reference)
 
         if not lpa_org:
@@ -499,11 +509,12 @@ def retire_local_plan_data(lookup_rows, entity_org_rows, org_mapping, group_cons
                 f"ERROR: Entity {entity} (ref={reference}) does not map back to any LPA organisation."
             )
 
-        # Verify entity falls within an entity-organisation range for this LPA
-        # (or one of its constituent authorities, for joint local-planning-groups)
         in_range = any(
-            org in constituent_orgs(lpa_org, group_constituents) and emin <= entity <= emax
-            for org, emin, emax in entity_org_ranges
+            bool(((mins <= entity) & (entity <= maxs)).any())
+            for mins, maxs in (
+                ranges_by_org[org] for org in constituent_orgs(lpa_org, group_constituents)
+                if org in ranges_by_org
+            )
         )
         if not in_range:
             raise ValueError(
@@ -516,8 +527,8 @@ def retire_local_plan_data(lookup_rows, entity_org_rows, org_mapping, group_cons
     return entity_to_org, lpa_orgs
 
 
-def save_retired_entities(entity_to_org, old_entity_rows):
-    """Append retired entities to old-entity.csv."""
+def save_retired_entities(entity_to_org, old_entity):
+    """Queue retired entities for old-entity.csv; written when the repository is flushed."""
     logger.info(f"\n=== Saving {len(entity_to_org)} entities to old-entity.csv ===")
 
     if not entity_to_org:
@@ -525,7 +536,7 @@ def save_retired_entities(entity_to_org, old_entity_rows):
         return
 
     # Check for duplicates (entities already retired)
-    existing = set(int(r['old-entity']) for r in old_entity_rows)
+    existing = set(int(e) for e in old_entity.values('old-entity'))
     duplicates = set(entity_to_org.keys()) & existing
 
     if duplicates:
@@ -538,29 +549,24 @@ def save_retired_entities(entity_to_org, old_entity_rows):
         logger.info("No new entities to add")
         return
 
-    # Read existing file content and append new rows
-    fieldnames = ['old-entity', 'status', 'entity', 'notes', 'end-date', 'entry-date', 'start-date']
-
-    with open(OLD_ENTITY_PATH, 'a', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        for entity_id in sorted(entities_to_add):
-            org, dataset = entities_to_add[entity_id]
-            writer.writerow({
-                'old-entity': entity_id,
-                'status': 410,
-                'entity': '',
-                'notes': f'Retiring fake MHCLG template data for {org}-{dataset}',
-                'end-date': '',
-                'entry-date': date.today().isoformat(),
-                'start-date': '',
-            })
+    for entity_id in sorted(entities_to_add):
+        org, dataset = entities_to_add[entity_id]
+        old_entity.append({
+            'old-entity': entity_id,
+            'status': 410,
+            'entity': '',
+            'notes': f'Retiring fake MHCLG template data for {org}-{dataset}',
+            'end-date': '',
+            'entry-date': date.today().isoformat(),
+            'start-date': '',
+        })
 
     logger.info(f"✓ Added {len(entities_to_add)} rows to old-entity.csv")
-    logger.info(f"  Total old-entity entries: {len(old_entity_rows) + len(entities_to_add)}")
+    logger.info(f"  Total old-entity entries: {len(old_entity)}")
 
 
-def main():
-    """Main entry point."""
+def run(repo):
+    """Queue retirements in the repository's old-entity table without writing it."""
     # Validate files exist
     for path in [LOOKUP_PATH, ENTITY_ORG_PATH, OLD_ENTITY_PATH]:
         if not path.exists():
@@ -568,19 +574,18 @@ def main():
             sys.exit(1)
 
     logger.info("Loading CSV files...")
-    lookup_rows = read_csv_file(LOOKUP_PATH)
-    entity_org_rows = read_csv_file(ENTITY_ORG_PATH)
-    old_entity_rows = read_csv_file(OLD_ENTITY_PATH)
-    logger.info(f"Loaded lookup.csv ({len(lookup_rows)} rows)")
+    lookup = repo.lookup_table(PIPELINE)
+    entity_org_rows = repo.entity_organisation(PIPELINE).rows
+    old_entity = repo.old_entity(PIPELINE)
+    logger.info(f"Loaded lookup.csv ({len(lookup)} rows)")
     logger.info(f"Loaded entity-organisation.csv ({len(entity_org_rows)} rows)")
-    logger.info(f"Loaded old-entity.csv ({len(old_entity_rows)} rows)")
+    logger.info(f"Loaded old-entity.csv ({len(old_entity)} rows)")
 
     org_mapping, group_constituents = fetch_organisation_data()
+    tables = PlanTables(lookup, entity_org_rows)
 
-    timetable_entity_org, timetable_orgs = retire_plan_timetable_data(
-        lookup_rows, entity_org_rows, group_constituents)
-    local_plan_entity_org, local_plan_orgs = retire_local_plan_data(
-        lookup_rows, entity_org_rows, org_mapping, group_constituents)
+    timetable_entity_org, timetable_orgs = retire_plan_timetable_data(tables, group_constituents)
+    local_plan_entity_org, local_plan_orgs = retire_local_plan_data(tables, org_mapping, group_constituents)
 
     all_entity_org = {**timetable_entity_org, **local_plan_entity_org}
 
@@ -591,9 +596,9 @@ def main():
 
     if not all_entity_org:
         logger.warning("No entities to retire")
-        sys.exit(0)
+        return
 
-    save_retired_entities(all_entity_org, old_entity_rows)
+    save_retired_entities(all_entity_org, old_entity)
     logger.info("\n✓ Retirement completed successfully")
 
     # Print summary to stdout for use in PR body
@@ -611,5 +616,12 @@ def main():
         print("")
 
 
+def main():
+    """Main entry point."""
+    repo = ConfigRepository(REPO_ROOT)
+    run(repo)
+    repo.flush()
+
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,121 @@
+"""
+Content-hash manifest of which collections each stage has already processed.
+
+A collection's inputs are every CSV under collection/<collection>/ and
+pipeline/<collection>/. The manifest records, per stage, the hash of those
+inputs after the stage last ran over them successfully, so the next run can
+skip any collection that hasn't changed since:
+
+    manifest = StageManifest()
+    for collection in manifest.changed('standardise', code=[__file__]):
+        ...  # process it
+        manifest.record('standardise', collection, code=[__file__])
+    manifest.save()
+
+`code` names the files that define what a stage does; if any of them change,
+every collection counts as changed for that stage.
+
+Hashes are recorded after the stage has written its changes, so a stage that
+rewrites a file (standardise) doesn't see its own output as new input. The
+manifest lives in var/cache/stage-manifest.json, which the evening pipeline
+keeps between runs with actions/cache. File hashes are cached against size
+and mtime, so stages run in the same checkout only hash each file once.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+MANIFEST_PATH = Path('var') / 'cache' / 'stage-manifest.json'
+MANIFEST_VERSION = 1
+SOURCE_DIRS = ('collection', 'pipeline')
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class StageManifest:
+    """Per-stage record of the input hashes each collection was last processed at."""
+
+    def __init__(self, root=REPO_ROOT, path=None):
+        self.root = Path(root)
+        self.path = Path(path) if path else self.root / MANIFEST_PATH
+        self.data = {'version': MANIFEST_VERSION, 'files': {}, 'stages': {}}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == MANIFEST_VERSION:
+                self.data = data
+
+    def collections(self):
+        names = set()
+        for source_dir in SOURCE_DIRS:
+            base_dir = self.root / source_dir
+            if base_dir.is_dir():
+                names.update(p.name for p in base_dir.iterdir() if p.is_dir())
+        return sorted(names)
+
+    def file_hash(self, path):
+        """sha256 of a file, reusing the cached hash while its size and mtime are unchanged."""
+        path = Path(path).resolve()
+        stat = path.stat()
+        root = self.root.resolve()
+        key = path.relative_to(root).as_posix() if path.is_relative_to(root) else path.as_posix()
+        cached = self.data['files'].get(key)
+        if cached and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+            return cached['sha256']
+        sha256 = file_hash(path)
+        self.data['files'][key] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha256}
+        return sha256
+
+    def collection_hash(self, collection):
+        """One hash over the paths and contents of every CSV of a collection."""
+        digest = hashlib.sha256()
+        for source_dir in SOURCE_DIRS:
+            for path in sorted((self.root / source_dir / collection).rglob('*.csv')):
+                digest.update(path.relative_to(self.root).as_posix().encode('utf-8') + b'\0')
+                digest.update(self.file_hash(path).encode('ascii') + b'\n')
+        return digest.hexdigest()
+
+    def _code_hash(self, code):
+        digest = hashlib.sha256()
+        for path in sorted(str(p) for p in code):
+            digest.update(self.file_hash(path).encode('ascii'))
+        return digest.hexdigest()
+
+    def unchanged(self, stage, collection, code=()):
+        """True if `stage` last processed exactly the collection's current inputs, with the same code."""
+        recorded = self.data['stages'].get(stage)
+        if not recorded or recorded.get('code') != self._code_hash(code):
+            return False
+        return recorded['collections'].get(collection) == self.collection_hash(collection)
+
+    def changed(self, stage, collections=None, code=()):
+        """The collections `stage` still needs to process."""
+        collections = self.collections() if collections is None else collections
+        return [c for c in collections if not self.unchanged(stage, c, code)]
+
+    def record(self, stage, collection, code=()):
+        """Mark the collection's current inputs as processed by `stage`."""
+        code_hash = self._code_hash(code)
+        recorded = self.data['stages'].get(stage)
+        if not recorded or recorded.get('code') != code_hash:
+            # New code invalidates whatever older code processed
+            recorded = self.data['stages'][stage] = {'code': code_hash, 'collections': {}}
+        recorded['collections'][collection] = self.collection_hash(collection)
+
+    def save(self):
+        """Write the manifest atomically, so an interrupted stage leaves the previous one intact."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix='.json', dir=self.path.parent)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
@@ -1,10 +1,16 @@
 import os
 import csv
+import heapq
 import sys
+import tempfile
 
 # Add parent directories to path to import from root
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
 from create_collection import COLUMN_MAPPINGS
+from stage_manifest import StageManifest
+
+# What standardising does is defined by these files, so changing them restandardises everything
+STAGE_CODE = [__file__, os.path.join(os.path.dirname(__file__), '../../create_collection.py')]
 
 SORT_MAPPINGS = {
     "collection": {
@@ -28,6 +34,11 @@ SORT_MAPPINGS = {
     }
 }
 
+# Files larger than this are sorted in runs of EXTERNAL_SORT_RUN_ROWS rows
+# spilled to temporary files, so memory use doesn't grow with the file
+EXTERNAL_SORT_BYTES = 64 * 1024 * 1024
+EXTERNAL_SORT_RUN_ROWS = 100_000
+
 def _sort_key(row, sort_cols):
     """Sort key that puts empty values last."""
     return tuple(
@@ -36,11 +47,67 @@ def _sort_key(row, sort_cols):
         for col in sort_cols
     )
 
-def standardise_csv(file_path, expected_columns, sort_cols=None):
-    """Reorder and add missing columns to a CSV file, preserving line endings."""
+def _write_csv(file_path, fieldnames, rows):
+    with open(file_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, restval='', lineterminator='\r\n')
+        writer.writeheader()
+        writer.writerows(rows)
+
+def _read_csv(file_path):
+    with open(file_path, 'r', encoding='utf-8', newline='') as f:
+        yield from csv.DictReader(f)
+
+def _external_standardise_csv(file_path, expected_cols, sort_cols, run_rows):
+    """standardise_csv for large files: sort runs on disk, then k-way merge them into place."""
+    directory = os.path.dirname(os.path.abspath(file_path))
+    with tempfile.TemporaryDirectory() as tmp:
+        runs = []
+        with open(file_path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.DictReader(f)
+            unexpected = [col for col in (reader.fieldnames or []) if col not in expected_cols]
+            if unexpected:
+                return f"✗ {file_path}: unexpected column(s) found that would be removed: {', '.join(unexpected)}"
+
+            run = []
+            for row in reader:
+                if None in row:
+                    return f"✗ {file_path}: one or more rows have more values than columns in the header"
+                run.append(row)
+                if len(run) >= run_rows:
+                    run.sort(key=lambda row: _sort_key(row, sort_cols))
+                    runs.append(os.path.join(tmp, f"run-{len(runs)}.csv"))
+                    _write_csv(runs[-1], expected_cols, run)
+                    run = []
+            run.sort(key=lambda row: _sort_key(row, sort_cols))
+            runs.append(os.path.join(tmp, f"run-{len(runs)}.csv"))
+            _write_csv(runs[-1], expected_cols, run)
+            run = []
+
+        # heapq.merge takes equal keys from earlier runs first, so the order
+        # matches the stable in-memory sort exactly
+        merged = heapq.merge(*(_read_csv(path) for path in runs), key=lambda row: _sort_key(row, sort_cols))
+        fd, output_path = tempfile.mkstemp(suffix='.csv', dir=directory)
+        os.close(fd)
+        try:
+            _write_csv(output_path, expected_cols, merged)
+            os.replace(output_path, file_path)
+        finally:
+            if os.path.exists(output_path):
+                os.remove(output_path)
+    return None
+
+def standardise_csv(file_path, expected_columns, sort_cols=None,
+                    external_sort_bytes=EXTERNAL_SORT_BYTES, run_rows=EXTERNAL_SORT_RUN_ROWS):
+    """Reorder and add missing columns to a CSV file, preserving line endings.
+
+    Sorted files larger than external_sort_bytes are sorted on disk.
+    """
     expected_cols = expected_columns.split(',')
 
     try:
+        if sort_cols and os.path.getsize(file_path) > external_sort_bytes:
+            return _external_standardise_csv(file_path, expected_cols, sort_cols, run_rows)
+
         # Read existing data
         with open(file_path, 'r', encoding='utf-8', newline='') as f:
             reader = csv.DictReader(f)
@@ -62,10 +129,7 @@ def standardise_csv(file_path, expected_columns, sort_cols=None):
             rows.sort(key=lambda row: _sort_key(row, sort_cols))
 
         # Write back with standard column order, row order, and CRLF line endings
-        with open(file_path, 'w', encoding='utf-8', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=expected_cols, restval='', lineterminator='\r\n')
-            writer.writeheader()
-            writer.writerows(rows)
+        _write_csv(file_path, expected_cols, rows)
         return None
     
     except Exception as e:
@@ -87,11 +151,32 @@ def standardise_folder(folder_type, folder_path):
         else:
             print(f"⊘ {file_path} (not found)")
 
-def main():
-    """Standardise all CSVs in all datasets across pipeline and collection."""
-    # Get the root directory (two levels up from this script)
-    base_dir = os.path.join(os.path.dirname(__file__), '../..')
+def standardise_rows(fieldnames, rows, expected_columns, sort_cols=None):
+    """standardise_csv for rows already in memory: (columns, rows), or None if standardise_csv would refuse them."""
+    expected_cols = expected_columns.split(',')
+    if any(col not in expected_cols for col in fieldnames) or any(None in row for row in rows):
+        return None
+    rows = list(rows)
+    if sort_cols:
+        rows.sort(key=lambda row: _sort_key(row, sort_cols))
+    return expected_cols, rows
+
+def standardise_tree(base_dir, all_collections=False, exclude=()):
+    """Standardise every collection's CSVs under base_dir; returns the errors.
+
+    Collections whose CSVs haven't changed since they were last standardised
+    are skipped, unless all_collections is given. Files in `exclude` (already
+    standardised, e.g. by evening_pipeline) are left alone.
+    """
     errors = []
+    exclude = {os.path.realpath(path) for path in exclude}
+    manifest = StageManifest(base_dir)
+    skipped = set(manifest.collections()) - set(manifest.changed('standardise', code=STAGE_CODE))
+    if all_collections:
+        skipped = set()
+    elif skipped:
+        print(f"Skipping {len(skipped)} collection(s) unchanged since they were last standardised")
+    failed = set()
 
     for folder_type in ["collection", "pipeline"]:
         folder_path = os.path.join(base_dir, folder_type)
@@ -105,22 +190,41 @@ def main():
                           if os.path.isdir(os.path.join(folder_path, d))]
 
         for dataset in dataset_folders:
+            if dataset in skipped:
+                continue
             dataset_path = os.path.join(folder_path, dataset)
             print(f"\nStandardising {folder_type}/{dataset}...")
 
             for filename, expected_columns in COLUMN_MAPPINGS[folder_type].items():
                 file_path = os.path.join(dataset_path, filename)
+                if os.path.realpath(file_path) in exclude:
+                    continue
                 if os.path.exists(file_path):
                     sort_cols = SORT_MAPPINGS.get(folder_type, {}).get(filename)
                     result = standardise_csv(file_path, expected_columns, sort_cols)
                     if result:
                         print(result)
                         errors.append(result)
+                        failed.add(dataset)
                 else:
                     print(f"⊘ {filename} (not found)")
 
-    if errors:
+    for dataset in manifest.collections():
+        if dataset not in skipped and dataset not in failed:
+            manifest.record('standardise', dataset, code=STAGE_CODE)
+    manifest.save()
+    return errors
+
+def main(all_collections=False):
+    """Standardise all CSVs in all datasets across pipeline and collection.
+
+    Collections whose CSVs haven't changed since they were last standardised
+    are skipped, unless all_collections (--all) is given.
+    """
+    # Get the root directory (two levels up from this script)
+    base_dir = os.path.join(os.path.dirname(__file__), '../..')
+    if standardise_tree(base_dir, all_collections):
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
+    main(all_collections="--all" in sys.argv[1:])
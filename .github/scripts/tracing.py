@@ -0,0 +1,149 @@
+"""
+Lightweight timing spans and counters for the batch scripts.
+
+    from tracing import span, count, configure, summary
+
+    configure('batch_assign_trace.jsonl')
+    with span('download', resource=resource) as s:
+        ...
+        s.count(rows=len(df))
+    print(summary())
+    close()
+
+Each finished span is aggregated by name (calls, total and max seconds,
+summed counters) and, once `configure` has been given a path, written as
+one JSON line: name, parent span, start time, seconds, attributes, counters
+and the exception type if the block raised. Spans nest, so a trace can be
+read back as a tree per resource. Without a path nothing is written and the
+cost of a span is two perf_counter calls.
+
+Spans may be opened from several threads: each thread nests its own spans,
+and totals and trace lines are updated under a lock. The trace file is opened
+once by `configure` and kept open, line buffered, until `close` (or exit).
+"""
+
+import atexit
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+_trace_file = None
+_local = threading.local()
+_lock = threading.Lock()
+_totals = {}
+_counters = {}
+
+
+class Span:
+    __slots__ = ('name', 'attrs', 'counts')
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.counts = {}
+
+    def count(self, **counts):
+        """Add to this span's counters, e.g. span.count(rows=120)."""
+        for key, value in counts.items():
+            self.counts[key] = self.counts.get(key, 0) + value
+
+
+def configure(path=None, reset=True):
+    """Write spans to the JSONL file at `path` (appended to), or stop writing if None."""
+    global _trace_file
+    with _lock:
+        if _trace_file is not None:
+            _trace_file.close()
+        _trace_file = open(path, 'a', encoding='utf-8', buffering=1) if path else None
+        if reset:
+            _totals.clear()
+            _counters.clear()
+
+
+def close():
+    """Stop writing spans and close the trace file; totals are kept for summary()."""
+    configure(None, reset=False)
+
+
+atexit.register(close)
+
+
+def count(**counts):
+    """Add to run-wide counters that aren't tied to a span, e.g. count(failed_downloads=1)."""
+    with _lock:
+        for key, value in counts.items():
+            _counters[key] = _counters.get(key, 0) + value
+
+
+def _stack():
+    """This thread's open spans, innermost last."""
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+    return _local.stack
+
+
+@contextmanager
+def span(name, **attrs):
+    """Time a block; nested spans (in the same thread) record their parent's name."""
+    current = Span(name, attrs)
+    stack = _stack()
+    parent = stack[-1].name if stack else None
+    stack.append(current)
+    started = time.time()
+    start = time.perf_counter()
+    error = None
+    try:
+        yield current
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        stack.pop()
+        with _lock:
+            _record(current, parent, started, seconds, error)
+
+
+def _record(current, parent, started, seconds, error):
+    total = _totals.setdefault(current.name, {'calls': 0, 'seconds': 0.0, 'max': 0.0, 'errors': 0, 'counts': {}})
+    total['calls'] += 1
+    total['seconds'] += seconds
+    total['max'] = max(total['max'], seconds)
+    total['errors'] += error is not None
+    for key, value in current.counts.items():
+        total['counts'][key] = total['counts'].get(key, 0) + value
+
+    if _trace_file is not None:
+        record = {
+            'span': current.name,
+            'parent': parent,
+            'start': datetime.fromtimestamp(started, timezone.utc).isoformat(),
+            'seconds': round(seconds, 6),
+            **({'attrs': current.attrs} if current.attrs else {}),
+            **({'counts': current.counts} if current.counts else {}),
+            **({'error': error} if error else {}),
+        }
+        _trace_file.write(json.dumps(record, default=str) + '\n')
+
+
+def totals():
+    """{span name: {'calls', 'seconds', 'max', 'errors', 'counts'}} for the run so far."""
+    return _totals
+
+
+def summary():
+    """A table of span totals, slowest first, followed by run-wide counters."""
+    lines = [f"{'span':<32} {'calls':>7} {'total s':>10} {'mean s':>9} {'max s':>9}  counts"]
+    for name, total in sorted(_totals.items(), key=lambda item: item[1]['seconds'], reverse=True):
+        counts = ', '.join(f"{key}={value}" for key, value in sorted(total['counts'].items()))
+        if total['errors']:
+            counts = f"errors={total['errors']}" + (f", {counts}" if counts else '')
+        lines.append(
+            f"{name:<32} {total['calls']:>7} {total['seconds']:>10.2f} "
+            f"{total['seconds'] / total['calls']:>9.3f} {total['max']:>9.3f}  {counts}"
+        )
+    for key, value in sorted(_counters.items()):
+        lines.append(f"{key}: {value}")
+    return '\n'.join(lines)
@@ -11,7 +11,6 @@ from urllib.error import HTTPError, URLError
 from urllib.request import urlopen
 
 import click
-import pandas as pd
 
 
 API_BASE_URL_BY_ENVIRONMENT = {
@@ -112,6 +111,43 @@ def append_csv_rows(path: Path, rows: list[list[object]]) -> int:
     return count
 
 
+def read_csv_rows(path: Path) -> tuple[list[str], list[list[str]]]:
+    with path.open(newline="", encoding="utf-8") as f:
+        rows = [row for row in csv.reader(f) if row]
+    if not rows:
+        return [], []
+    header = rows[0]
+    return header, [row + [""] * (len(header) - len(row)) for row in rows[1:]]
+
+
+def write_csv_rows(path: Path, header: list[str], rows: list[list[str]]) -> None:
+    with path.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, lineterminator="\r\n")
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def update_csv_rows(path: Path, match_column: str, match_values: set[str], column: str, value: str) -> Optional[int]:
+    """Set `column` to `value` in the rows whose `match_column` is one of `match_values`.
+
+    The file is only rewritten if a row matches. Returns the number of rows
+    updated, or None if the file lacks either column.
+    """
+    header, rows = read_csv_rows(path)
+    if match_column not in header or column not in header:
+        return None
+    match_index = header.index(match_column)
+    index = header.index(column)
+    updated_count = 0
+    for row in rows:
+        if row[match_index] in match_values:
+            row[index] = value
+            updated_count += 1
+    if updated_count:
+        write_csv_rows(path, header, rows)
+    return updated_count
+
+
 def normalize_retire_endpoints(value: object) -> list[str]:
     if value is None:
         return []
@@ -137,8 +173,11 @@ def append_old_entity(response: dict, collection: str) -> None:
 
     old_entity_file = Path("pipeline") / collection / "old-entity.csv"
     if old_entity_file.exists():
-        frame = pd.read_csv(old_entity_file, dtype=str, keep_default_na=False)
-        existing_old_entities = set(frame.get("old-entity", []))
+        header, existing_rows = read_csv_rows(old_entity_file)
+        existing_old_entities = set()
+        if "old-entity" in header:
+            index = header.index("old-entity")
+            existing_old_entities = {row[index] for row in existing_rows}
     else:
         old_entity_file.write_text(",".join(OLD_ENTITY_HEADER) + "\r\n", encoding="utf-8")
         existing_old_entities = set()
@@ -188,19 +227,14 @@ def retire_endpoints_in_csv(collection: str, retire_endpoints: list[str]) -> Non
             print(f"{file_label} not found, skipping retire endpoints")
             return
 
-        frame = pd.read_csv(path, dtype=str, keep_default_na=False)
-        if "endpoint" not in frame.columns or "end-date" not in frame.columns:
+        updated_count = update_csv_rows(path, "endpoint", set(retire_endpoints), "end-date", today)
+        if updated_count is None:
             print(f"{file_label} missing required columns, skipping retire endpoints")
             return
-
-        mask = frame["endpoint"].isin(retire_endpoints)
-        updated_count = int(mask.sum())
         if updated_count == 0:
             print(f"No matching endpoints found in {file_label}")
             return
 
-        frame.loc[mask, "end-date"] = today
-        frame.to_csv(path, index=False, lineterminator="\r\n")
         print(f"Retired {updated_count} row(s) in {file_label} with end-date {today}")
 
     update_file(endpoint_file, "endpoint.csv")
@@ -219,19 +253,14 @@ def unretire_endpoints_in_csv(collection: str, unretire_endpoints: list[str]) ->
             print(f"{file_label} not found, skipping unretire endpoints")
             return
 
-        frame = pd.read_csv(path, dtype=str, keep_default_na=False)
-        if "endpoint" not in frame.columns or "end-date" not in frame.columns:
+        updated_count = update_csv_rows(path, "endpoint", set(unretire_endpoints), "end-date", "")
+        if updated_count is None:
             print(f"{file_label} missing required columns, skipping unretire endpoints")
             return
-
-        mask = frame["endpoint"].isin(unretire_endpoints)
-        updated_count = int(mask.sum())
         if updated_count == 0:
             print(f"No matching endpoints found in {file_label}")
             return
 
-        frame.loc[mask, "end-date"] = ""
-        frame.to_csv(path, index=False, lineterminator="\r\n")
         print(f"Unretired {updated_count} row(s) in {file_label} (cleared end-date)")
 
     update_file(endpoint_file, "endpoint.csv")
@@ -358,13 +387,9 @@ def append_source(response: dict, collection: str) -> None:
             if not source_hash:
                 print("pipelines_append_required present but no source hash in existing_source_entry, skipping")
                 return
-            frame = pd.read_csv(source_file, dtype=str, keep_default_na=False)
-            mask = frame["source"] == source_hash
-            if not mask.any():
+            if not update_csv_rows(source_file, "source", {source_hash}, "pipelines", updated):
                 print(f"Source {source_hash} not found in source.csv, skipping pipelines update")
                 return
-            frame.loc[mask, "pipelines"] = updated
-            frame.to_csv(source_file, index=False, lineterminator="\r\n")
             print(f"Updated pipelines to '{updated}' for source {source_hash} in source.csv")
         else:
             print("Source already exists in source.csv, skipping")
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Compile a collection's configuration CSVs into an indexed SQLite database.
+
+Every CSV in collection/<collection>/ and pipeline/<collection>/ becomes a
+table, named as digital-land names them: the file name without .csv and
+with hyphens as underscores, and likewise for columns (old-entity.csv ->
+old_entity(old_entity, status, entity, ...)). Indexes are created on
+(dataset, endpoint), (dataset, resource), (prefix, reference), entity and
+the entity-organisation ranges wherever a table has those columns.
+
+The sha256 of each input is stored in the _source table, so a rebuild only
+reloads the tables whose CSV has changed, and does nothing if none have.
+
+    python bin/compile_config.py conservation-area
+    python bin/compile_config.py            # every collection
+
+By default the database is written to
+var/<collection>/cache/compiled-config.sqlite3, in the CACHE_DIR the Makefile
+gives the pipeline rules but apart from the config.sqlite3 that makerules
+builds with digital-land config-create/config-load, whose schema this does
+not follow.
+"""
+import csv
+import hashlib
+import sqlite3
+import sys
+from pathlib import Path
+
+import click
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SOURCE_DIRS = ("collection", "pipeline")
+OUTPUT_PATH = "var/{collection}/cache/compiled-config.sqlite3"
+INDEXES = [
+    ("dataset", "endpoint"),
+    ("dataset", "resource"),
+    ("prefix", "reference"),
+    ("entity",),
+    ("old_entity",),
+    ("entity_minimum", "entity_maximum"),
+]
+INTEGER_COLUMNS = {"entity", "old_entity", "entity_minimum", "entity_maximum"}
+
+csv.field_size_limit(sys.maxsize)
+
+
+def sqlite_name(name: str) -> str:
+    return name.replace("-", "_")
+
+
+def file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def config_sources(root: Path, collection: str) -> dict:
+    """{table name: csv path} for every config CSV of a collection."""
+    sources = {}
+    for source_dir in SOURCE_DIRS:
+        for path in sorted((root / source_dir / collection).glob("*.csv")):
+            sources[sqlite_name(path.stem)] = path
+    return sources
+
+
+def recorded_hashes(conn) -> dict:
+    conn.execute("CREATE TABLE IF NOT EXISTS _source (name TEXT PRIMARY KEY, path TEXT, sha256 TEXT)")
+    return {name: sha256 for name, sha256 in conn.execute("SELECT name, sha256 FROM _source")}
+
+
+def load_table(conn, name: str, path: Path) -> int:
+    """(Re)create a table from a CSV and index it; returns the number of rows loaded."""
+    with path.open("r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        header = [sqlite_name(column.strip()) for column in next(reader, [])]
+        columns = [column for column in dict.fromkeys(header) if column]
+        positions = [header.index(column) for column in columns]
+
+        conn.execute(f'DROP TABLE IF EXISTS "{name}"')
+        if not columns:
+            return 0
+        definitions = ", ".join(
+            f'"{column}" {"INTEGER" if column in INTEGER_COLUMNS else "TEXT"}' for column in columns
+        )
+        conn.execute(f'CREATE TABLE "{name}" ({definitions})')
+
+        placeholders = ", ".join("?" for _ in columns)
+        before = conn.total_changes
+        conn.executemany(
+            f'INSERT INTO "{name}" VALUES ({placeholders})',
+            (
+                [row[i] if i < len(row) else "" for i in positions]
+                for row in reader
+                if any(value.strip() for value in row)
+            ),
+        )
+        rows = conn.total_changes - before
+
+    for index in INDEXES:
+        if all(column in columns for column in index):
+            quoted = ", ".join(f'"{column}"' for column in index)
+            conn.execute(f'CREATE INDEX "{name}__{"__".join(index)}" ON "{name}" ({quoted})')
+    return rows
+
+
+def compile_config(collection: str, output_path: Path, root: Path = REPO_ROOT) -> list[str]:
+    """Bring output_path up to date with the collection's CSVs; returns the tables rebuilt."""
+    root = Path(root)
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    sources = config_sources(root, collection)
+
+    conn = sqlite3.connect(output_path)
+    try:
+        with conn:
+            previous = recorded_hashes(conn)
+            rebuilt = []
+            for name, path in sources.items():
+                sha256 = file_hash(path)
+                if previous.get(name) == sha256:
+                    continue
+                load_table(conn, name, path)
+                conn.execute(
+                    "INSERT OR REPLACE INTO _source (name, path, sha256) VALUES (?, ?, ?)",
+                    (name, path.relative_to(root).as_posix(), sha256),
+                )
+                rebuilt.append(name)
+            for name in set(previous) - set(sources):
+                conn.execute(f'DROP TABLE IF EXISTS "{name}"')
+                conn.execute("DELETE FROM _source WHERE name = ?", (name,))
+                rebuilt.append(name)
+        if rebuilt:
+            conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    return rebuilt
+
+
+def collections(root: Path) -> list[str]:
+    names = set()
+    for source_dir in SOURCE_DIRS:
+        base_dir = root / source_dir
+        if base_dir.is_dir():
+            names.update(p.name for p in base_dir.iterdir() if p.is_dir())
+    return sorted(names)
+
+
+@click.command(help="Compile collection and pipeline CSVs into an indexed config.sqlite3 per collection")
+@click.argument("collection_names", nargs=-1)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help=f"Database path for a single collection (default: {OUTPUT_PATH})",
+)
+def main(collection_names, output):
+    collection_names = list(collection_names) or collections(REPO_ROOT)
+    if output and len(collection_names) != 1:
+        raise click.UsageError("--output can only be used with a single collection")
+
+    for collection in collection_names:
+        output_path = output or REPO_ROOT / OUTPUT_PATH.format(collection=collection)
+        rebuilt = compile_config(collection, output_path)
+        if rebuilt:
+            print(f"{collection}: rebuilt {', '.join(rebuilt)} in {output_path}")
+        else:
+            print(f"{collection}: {output_path} is up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Report the size, growth and parse cost of every configuration CSV.
+
+Scans collection/ and pipeline/ and, for each file, records:
+- rows and bytes
+- the seconds taken to read it with csv.DictReader, as the scripts do, and
+  the number of files read concurrently while it was timed (one by default;
+  times taken with --workers above one are inflated by contention)
+- growth in rows per day over the last --days days of git history
+- contiguous runs of entity numbers in lookup.csv, and the allocated ranges
+  in entity-organisation.csv, as separate columns
+
+Output is JSON or CSV with one record per file (or per collection with
+--group), in path order, so successive runs can be stored and compared.
+
+    python bin/config_stats.py --format csv --output config-stats.csv
+"""
+import csv
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import click
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+TARGET_DIRS = ("collection", "pipeline")
+FIELDS = [
+    "kind",
+    "name",
+    "file",
+    "rows",
+    "bytes",
+    "parse-seconds",
+    "parse-workers",
+    "growth-rows-per-day",
+    "lookup-entity-runs",
+    "entity-organisation-ranges",
+]
+# Fields totalled by group_stats
+SUMMED_FIELDS = [
+    "rows",
+    "bytes",
+    "parse-seconds",
+    "growth-rows-per-day",
+    "lookup-entity-runs",
+    "entity-organisation-ranges",
+]
+
+csv.field_size_limit(sys.maxsize)
+
+
+def config_files(root: Path) -> list[Path]:
+    files = []
+    for target_dir in TARGET_DIRS:
+        base_dir = root / target_dir
+        if base_dir.is_dir():
+            files.extend(base_dir.glob("*/*.csv"))
+    return sorted(files)
+
+
+def count_entity_runs(entities) -> int:
+    """Number of contiguous runs in a set of entity numbers, e.g. {1, 2, 3, 7} has two."""
+    runs = 0
+    previous = None
+    for entity in sorted(entities):
+        if previous is None or entity != previous + 1:
+            runs += 1
+        previous = entity
+    return runs
+
+
+def file_stats(path: Path, root: Path) -> dict:
+    """Rows, bytes, parse time and entity ranges of one CSV."""
+    relative = path.relative_to(root)
+    start = time.perf_counter()
+    with path.open("r", newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    parse_seconds = time.perf_counter() - start
+
+    lookup_entity_runs = ""
+    entity_organisation_ranges = ""
+    if path.name == "lookup.csv":
+        lookup_entity_runs = count_entity_runs(
+            {int(row["entity"]) for row in rows if (row.get("entity") or "").isdigit()}
+        )
+    elif path.name == "entity-organisation.csv":
+        entity_organisation_ranges = len(rows)
+
+    return {
+        "kind": relative.parts[0],
+        "name": relative.parts[1],
+        "file": path.name,
+        "rows": len(rows),
+        "bytes": path.stat().st_size,
+        "parse-seconds": round(parse_seconds, 4),
+        "parse-workers": 1,
+        "growth-rows-per-day": "",
+        "lookup-entity-runs": lookup_entity_runs,
+        "entity-organisation-ranges": entity_organisation_ranges,
+    }
+
+
+def line_growth(root: Path, days: int) -> dict:
+    """{relative path: net lines added} over the last `days` days, from a single git log.
+
+    Returns {} if git history isn't available.
+    """
+    try:
+        result = subprocess.run(
+            ["git", "log", f"--since={days}.days", "--numstat", "--format=", "--", *TARGET_DIRS],
+            cwd=root,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return {}
+
+    growth = {}
+    for line in result.stdout.splitlines():
+        parts = line.split("\t")
+        # Binary files show "-" for both counts
+        if len(parts) != 3 or not parts[0].isdigit() or not parts[1].isdigit():
+            continue
+        added, deleted, path = parts
+        growth[path] = growth.get(path, 0) + int(added) - int(deleted)
+    return growth
+
+
+def collect_stats(root: Path = REPO_ROOT, days: int = 30, workers: int = 1) -> list[dict]:
+    """Stats for every config CSV, reading `workers` files at a time (None for one per CPU)."""
+    root = Path(root)
+    files = config_files(root)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        stats = [file_stats(path, root) for path in files]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            stats = list(executor.map(file_stats, files, [root] * len(files), chunksize=8))
+        for record in stats:
+            record["parse-workers"] = workers
+
+    growth = line_growth(root, days)
+    if growth:
+        for record in stats:
+            path = f"{record['kind']}/{record['name']}/{record['file']}"
+            record["growth-rows-per-day"] = round(growth.get(path, 0) / days, 2)
+    return stats
+
+
+def group_stats(stats: list[dict]) -> list[dict]:
+    """Totals per collection, summing the numeric fields of its collection/ and pipeline/ files."""
+    groups = {}
+    for record in stats:
+        group = groups.setdefault(record["name"], {field: "" for field in FIELDS})
+        group.update(kind="*", name=record["name"], file="*", **{"parse-workers": record["parse-workers"]})
+        for field in SUMMED_FIELDS:
+            if record[field] != "":
+                group[field] = (group[field] or 0) + record[field]
+    for group in groups.values():
+        group["parse-seconds"] = round(group["parse-seconds"], 4)
+        if group["growth-rows-per-day"] != "":
+            group["growth-rows-per-day"] = round(group["growth-rows-per-day"], 2)
+    return [groups[name] for name in sorted(groups)]
+
+
+def write_stats(stats: list[dict], output_format: str, f) -> None:
+    if output_format == "json":
+        json.dump(stats, f, indent=2)
+        f.write("\n")
+    else:
+        writer = csv.DictWriter(f, fieldnames=FIELDS, lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(stats)
+
+
+@click.command(help="Report rows, bytes, parse time, growth and entity ranges for every config CSV")
+@click.option("--format", "output_format", type=click.Choice(["json", "csv"]), default="json", show_default=True)
+@click.option("--output", type=click.Path(dir_okay=False, path_type=Path), help="Write to a file instead of stdout")
+@click.option("--days", type=click.IntRange(min=1), default=30, show_default=True, help="Git history window for growth")
+@click.option("--group/--no-group", default=False, help="Report totals per collection rather than per file")
+@click.option("--top", type=click.IntRange(min=0), default=10, show_default=True, help="Print the N slowest files to stderr")
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Parse files in parallel; faster, but each file's parse time is then measured under contention",
+)
+def main(output_format, output, days, group, top, workers):
+    stats = collect_stats(REPO_ROOT, days=days, workers=workers)
+
+    for record in sorted(stats, key=lambda r: r["parse-seconds"], reverse=True)[:top]:
+        click.echo(
+            f"{record['parse-seconds']:>8.3f}s {record['rows']:>9} rows "
+            f"{record['kind']}/{record['name']}/{record['file']}",
+            err=True,
+        )
+
+    if group:
+        stats = group_stats(stats)
+    if output:
+        with output.open("w", newline="", encoding="utf-8") as f:
+            write_stats(stats, output_format, f)
+    else:
+        write_stats(stats, output_format, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
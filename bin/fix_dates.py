@@ -1,9 +1,15 @@
 #!/usr/bin/env python3
 import csv
 import re
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / ".github/scripts"))
+from stage_manifest import StageManifest  # noqa: E402
+
 TARGET_DIRS = ("pipeline", "specification", "collection")
+# pipeline/ and collection/ files are skipped per collection when unchanged since the last run
+COLLECTION_DIRS = ("pipeline", "collection")
 
 # Matches malformed form: 2023-06-23T10:10:11:49Z
 BAD_TS_RE = re.compile(
@@ -48,10 +54,13 @@ def fix_csv_file(csv_path: Path) -> int:
 
     return changed
 
-def main(root="."):
+def main(root=".", all_collections=False):
     root_path = Path(root)
     total_files_changed = 0
     total_values_changed = 0
+    manifest = StageManifest(root_path)
+    code = [Path(__file__)]
+    skipped = set() if all_collections else set(manifest.collections()) - set(manifest.changed("fix-dates", code=code))
 
     for target_dir in TARGET_DIRS:
         base_dir = root_path / target_dir
@@ -59,16 +68,25 @@ def main(root="."):
             continue
 
         for csv_file in base_dir.rglob("*.csv"):
+            relative = csv_file.relative_to(base_dir)
+            if target_dir in COLLECTION_DIRS and len(relative.parts) > 1 and relative.parts[0] in skipped:
+                continue
             changes = fix_csv_file(csv_file)
             if changes:
                 total_files_changed += 1
                 total_values_changed += changes
                 print(f"Updated {csv_file} ({changes} value(s))")
 
+    for collection in manifest.collections():
+        if collection not in skipped:
+            manifest.record("fix-dates", collection, code=code)
+    manifest.save()
+
     print(
         f"Done. Files changed: {total_files_changed}, "
         f"timestamps fixed: {total_values_changed}"
+        + (f", collections unchanged and skipped: {len(skipped)}" if skipped else "")
     )
 
 if __name__ == "__main__":
-    main(".")
\ No newline at end of file
+    main(".", all_collections="--all" in sys.argv[1:])
\ No newline at end of file
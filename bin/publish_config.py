@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Publish collection/ and pipeline/ to S3, uploading only what has changed.
+
+Instead of `aws s3 sync`, which lists the whole remote tree and compares
+sizes and mtimes (and mtimes change on every checkout), this keeps a
+manifest of the sha256 of every file. The manifest from the last publish
+is read from <destination>manifest.json, and only files whose hash differs
+are uploaded, in parallel. The new manifest is written last, so it only
+ever describes objects that are already in place, and downstream consumers
+can diff two manifests to see what changed.
+
+With --compress gzip (and/or zstd, which needs the zstandard package) each
+file is also uploaded as a precompressed <key>.gz / <key>.zst, listed under
+`variants` in the manifest.
+
+    python bin/publish_config.py s3://development-collection-data/config/
+    python bin/publish_config.py s3://bucket/config/ --dry-run
+    python bin/publish_config.py s3://bucket/config/ --endpoint-url http://localhost:9000
+
+Like `aws s3 sync`, files deleted locally are left in the bucket unless
+--delete is given.
+
+With --skip-unchanged, the stage manifest (var/cache/stage-manifest.json)
+records each publish, and a run where no collection has changed since the
+last publish to the same destination returns without contacting S3.
+"""
+import gzip
+import hashlib
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import click
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / ".github/scripts"))
+from stage_manifest import StageManifest  # noqa: E402
+
+SOURCE_DIRS = ("collection", "pipeline")
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+CONTENT_TYPES = {".csv": "text/csv", ".json": "application/json"}
+COMPRESSORS = {
+    "gzip": (".gz", "application/gzip"),
+    "zstd": (".zst", "application/zstd"),
+}
+
+
+def parse_s3_url(url: str) -> tuple[str, str]:
+    """Split s3://bucket/prefix/ into (bucket, 'prefix/')."""
+    if not url.startswith("s3://"):
+        raise ValueError(f"expected an s3:// url, got {url}")
+    bucket, _, prefix = url[len("s3://"):].partition("/")
+    if prefix and not prefix.endswith("/"):
+        prefix += "/"
+    return bucket, prefix
+
+
+def file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_manifest(root: Path = REPO_ROOT, compress: tuple = (), hasher=file_hash) -> dict:
+    """{relative path: {'sha256', 'size', 'variants'}} for every file under collection/ and pipeline/."""
+    files = {}
+    for source_dir in SOURCE_DIRS:
+        base_dir = root / source_dir
+        if not base_dir.is_dir():
+            continue
+        for path in sorted(p for p in base_dir.rglob("*") if p.is_file()):
+            relative = path.relative_to(root).as_posix()
+            files[relative] = {
+                "sha256": hasher(path),
+                "size": path.stat().st_size,
+                "variants": {name: relative + COMPRESSORS[name][0] for name in compress},
+            }
+    return {"version": MANIFEST_VERSION, "files": files}
+
+
+def manifest_delta(local: dict, remote: dict) -> tuple[list, list]:
+    """(paths to upload, paths no longer present locally) between two manifests."""
+    local_files = local["files"]
+    remote_files = (remote or {}).get("files", {})
+    changed = [
+        path for path, entry in local_files.items()
+        if remote_files.get(path, {}).get("sha256") != entry["sha256"]
+        or remote_files.get(path, {}).get("variants", {}) != entry["variants"]
+    ]
+    removed = [path for path in remote_files if path not in local_files]
+    return changed, removed
+
+
+def compress_bytes(data: bytes, name: str) -> bytes:
+    if name == "gzip":
+        # mtime=0 so identical content always compresses to identical bytes
+        return gzip.compress(data, mtime=0)
+    if name == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise click.ClickException("--compress zstd needs the zstandard package (pip install zstandard)")
+        return zstandard.ZstdCompressor(level=19).compress(data)
+    raise ValueError(f"unknown compression {name}")
+
+
+def make_s3_client(endpoint_url: str = None):
+    # boto3 is only needed when actually publishing, so it's imported here
+    import boto3
+
+    return boto3.client("s3", endpoint_url=endpoint_url)
+
+
+def _is_missing(error) -> bool:
+    code = getattr(error, "response", {}).get("Error", {}).get("Code")
+    return code in ("NoSuchKey", "404", "NotFound")
+
+
+def read_remote_manifest(client, bucket: str, prefix: str):
+    """The last published manifest, or None if nothing has been published with one."""
+    try:
+        response = client.get_object(Bucket=bucket, Key=prefix + MANIFEST_NAME)
+    except Exception as e:
+        if _is_missing(e):
+            return None
+        raise
+    return json.loads(response["Body"].read())
+
+
+def _upload(client, bucket: str, prefix: str, root: Path, path: str, entry: dict) -> int:
+    data = (root / path).read_bytes()
+    content_type = CONTENT_TYPES.get(Path(path).suffix, "application/octet-stream")
+    client.put_object(Bucket=bucket, Key=prefix + path, Body=data, ContentType=content_type)
+    uploaded = len(data)
+    for name, variant in entry["variants"].items():
+        compressed = compress_bytes(data, name)
+        client.put_object(Bucket=bucket, Key=prefix + variant, Body=compressed, ContentType=COMPRESSORS[name][1])
+        uploaded += len(compressed)
+    return uploaded
+
+
+def publish(
+    client,
+    destination: str,
+    root: Path = REPO_ROOT,
+    compress: tuple = (),
+    delete: bool = False,
+    dry_run: bool = False,
+    workers: int = 8,
+    stage_manifest: StageManifest = None,
+) -> dict:
+    """Upload changed files and the new manifest; returns {'uploaded', 'removed', 'bytes'}.
+
+    Given a stage_manifest, nothing is done when no collection has changed
+    since the last publish to this destination.
+    """
+    root = Path(root)
+    bucket, prefix = parse_s3_url(destination)
+    stage = f"publish:{destination.rstrip('/')}"
+    code = [Path(__file__)]
+    if stage_manifest is not None and not stage_manifest.changed(stage, code=code):
+        return {"uploaded": [], "removed": [], "bytes": 0}
+
+    local = build_manifest(root, compress, stage_manifest.file_hash if stage_manifest is not None else file_hash)
+    remote = read_remote_manifest(client, bucket, prefix)
+    changed, removed = manifest_delta(local, remote)
+    result = {"uploaded": changed, "removed": removed if delete else [], "bytes": 0}
+
+    if dry_run:
+        return result
+    if not changed and not result["removed"] and remote is not None:
+        _record_publish(stage_manifest, stage, code)
+        return result
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        sizes = executor.map(
+            lambda path: _upload(client, bucket, prefix, root, path, local["files"][path]), changed
+        )
+        result["bytes"] = sum(sizes)
+
+    if result["removed"]:
+        remote_files = remote["files"]
+        keys = [
+            prefix + key
+            for path in result["removed"]
+            for key in [path, *remote_files[path].get("variants", {}).values()]
+        ]
+        for start in range(0, len(keys), 1000):
+            client.delete_objects(
+                Bucket=bucket, Delete={"Objects": [{"Key": key} for key in keys[start:start + 1000]], "Quiet": True}
+            )
+
+    if not delete and remote is not None:
+        # Files removed locally but left in the bucket stay in the manifest
+        for path in removed:
+            local["files"][path] = remote["files"][path]
+    local["published"] = datetime.now(timezone.utc).isoformat()
+    client.put_object(
+        Bucket=bucket,
+        Key=prefix + MANIFEST_NAME,
+        Body=json.dumps(local, indent=2, sort_keys=True).encode("utf-8"),
+        ContentType="application/json",
+    )
+    _record_publish(stage_manifest, stage, code)
+    return result
+
+
+def _record_publish(stage_manifest, stage, code):
+    if stage_manifest is None:
+        return
+    for collection in stage_manifest.collections():
+        stage_manifest.record(stage, collection, code=code)
+    stage_manifest.save()
+
+
+@click.command(help="Upload changed collection/ and pipeline/ files to S3 using a content-hash manifest")
+@click.argument("destination")
+@click.option("--compress", type=click.Choice(sorted(COMPRESSORS)), multiple=True, help="Also upload compressed variants")
+@click.option("--delete", is_flag=True, default=False, help="Delete objects for files removed locally")
+@click.option("--dry-run", is_flag=True, default=False, help="List what would be uploaded without uploading")
+@click.option("--workers", type=click.IntRange(min=1), default=8, show_default=True, help="Parallel uploads")
+@click.option("--endpoint-url", default=None, help="S3-compatible endpoint, e.g. a local stand-in for testing")
+@click.option(
+    "--skip-unchanged",
+    is_flag=True,
+    default=False,
+    help="Do nothing if no collection has changed since the last publish (uses var/cache/stage-manifest.json)",
+)
+def main(destination, compress, delete, dry_run, workers, endpoint_url, skip_unchanged):
+    result = publish(
+        make_s3_client(endpoint_url),
+        destination,
+        compress=compress,
+        delete=delete,
+        dry_run=dry_run,
+        workers=workers,
+        stage_manifest=StageManifest(REPO_ROOT) if skip_unchanged else None,
+    )
+    verb = "Would upload" if dry_run else "Uploaded"
+    for path in result["uploaded"]:
+        print(f"{verb}: {path}")
+    for path in result["removed"]:
+        print(f"{'Would delete' if dry_run else 'Deleted'}: {path}")
+    print(f"{verb} {len(result['uploaded'])} file(s) ({result['bytes']} bytes) to {destination}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+"""Expectation rules test_config_dataset.py runs on top of the specification's field rules."""
+
+OLD_ENTITY_RULES = [
+    {
+        "name": "old-entity values are unique",
+        "operation": "check_unique",
+        "parameters": {"field": "old-entity"},
+        "severity": "error",
+    },
+    {
+        "name": "old-entity statuses only contains 301 or 410",
+        "operation": "check_allowed_values",
+        "parameters": {"field": "status", "allowed_values": ["301", "410"]},
+        "severity": "error",
+    },
+]
+
+ENTITY_ORGANISATION_RULES = [
+    {
+        "name": "entity-minimum and entity-maximum ranges do not overlap",
+        "operation": "check_no_overlapping_ranges",
+        "parameters": {"min_field": "entity-minimum", "max_field": "entity-maximum"},
+        "severity": "error",
+    },
+]
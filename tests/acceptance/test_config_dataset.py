@@ -8,6 +8,8 @@ import os
 from pathlib import Path
 from glob import glob
 
+import sys
+
 import pytest
 
 from digital_land.expectations.checkpoints.csv import CsvCheckpoint
@@ -16,11 +18,48 @@ from digital_land.specification import Specification
 REPO_ROOT = Path(__file__).resolve().parents[2]
 SEARCH_DIRS = ["pipeline", "collection"]
 
+sys.path.insert(0, str(REPO_ROOT / ".github/scripts"))
+from stage_manifest import StageManifest  # noqa: E402
+from tests.acceptance.rules import ENTITY_ORGANISATION_RULES, OLD_ENTITY_RULES  # noqa: E402
+
+# With ACCEPTANCE_CHANGED_ONLY set, only collections changed since they last
+# passed are checked; tests/conftest.py records the collections that pass.
+# The checks depend on this file, the specification and digital-land's
+# expectations as well as the collections, so all of those are hashed as the
+# stage's code, and the specification is downloaded up front to hash it.
+ACCEPTANCE_STAGE = "acceptance"
+ACCEPTANCE_SPECIFICATION_DIR = REPO_ROOT / "var" / "cache" / "acceptance-specification"
+
+
+def _acceptance_code():
+    import digital_land.expectations
+
+    ACCEPTANCE_SPECIFICATION_DIR.mkdir(parents=True, exist_ok=True)
+    Specification.download(ACCEPTANCE_SPECIFICATION_DIR)
+    expectations_dir = Path(digital_land.expectations.__file__).parent
+    return [
+        __file__,
+        REPO_ROOT / "tests" / "acceptance" / "rules.py",
+        REPO_ROOT / "tests" / "conftest.py",
+        *sorted(ACCEPTANCE_SPECIFICATION_DIR.glob("*.csv")),
+        *sorted(expectations_dir.rglob("*.py")),
+    ]
+
+
+if os.getenv("ACCEPTANCE_CHANGED_ONLY"):
+    ACCEPTANCE_CODE = _acceptance_code()
+    CHANGED_COLLECTIONS = set(StageManifest(REPO_ROOT).changed(ACCEPTANCE_STAGE, code=ACCEPTANCE_CODE))
+else:
+    ACCEPTANCE_CODE = None
+    CHANGED_COLLECTIONS = None
+
 def _collect_files(pattern, search_dirs=None):
     search_dirs = search_dirs or SEARCH_DIRS
     files = []
     for search_dir in search_dirs:
         files.extend(glob(str(REPO_ROOT / search_dir / "*" / pattern)))
+    if CHANGED_COLLECTIONS is not None:
+        files = [f for f in files if Path(f).parent.name in CHANGED_COLLECTIONS]
     return sorted(files)
 
 
@@ -29,6 +68,19 @@ def _test_id(file_path):
     return f"{path.parts[-3]}/{path.parts[-2]}"
 
 
+def expected_tests():
+    """{collection: names of the tests parametrized over its files}, e.g. 'test_lookup[pipeline/tree]'."""
+    expected = {}
+    for name, test in list(globals().items()):
+        if not name.startswith("test_"):
+            continue
+        for mark in getattr(test, "pytestmark", []):
+            if mark.name == "parametrize" and mark.args[0] == "file_path":
+                for file_path in mark.args[1]:
+                    expected.setdefault(Path(file_path).parent.name, set()).add(f"{name}[{_test_id(file_path)}]")
+    return expected
+
+
 def _format_line_reference(file_path, line_number):
     path = Path(file_path).resolve()
     try:
@@ -605,37 +657,15 @@ old_entity_files = _collect_files("old-entity.csv")
 def test_old_entity(file_path, specification_dir):
     source_file_path = file_path
     all_csv_rules = _build_all_csv_rules(file_path, specification_dir)
-    old_entity_rules = [
-        {
-            "name": "old-entity values are unique",
-            "operation": "check_unique",
-            "parameters": {"field": "old-entity"},
-            "severity": "error",
-        },
-        {
-            "name": "old-entity statuses only contains 301 or 410",
-            "operation": "check_allowed_values",
-            "parameters": {"field": "status", "allowed_values": ["301", "410"]},
-            "severity": "error",
-        },
-    ]
     _run_checkpoint(
         dataset="old-entity",
         file_path=file_path,
-        rules=old_entity_rules + all_csv_rules,
+        rules=OLD_ENTITY_RULES + all_csv_rules,
         reference_file_path=source_file_path,
     )
 
 
 # TEST ENTITY-ORGANISATION.CSV
-ENTITY_ORGANISATION_RULES = [
-    {
-        "name": "entity-minimum and entity-maximum ranges do not overlap",
-        "operation": "check_no_overlapping_ranges",
-        "parameters": {"min_field": "entity-minimum", "max_field": "entity-maximum"},
-        "severity": "error",
-    },
-]
 
 entity_organisation_files = _collect_files("entity-organisation.csv")
 
@@ -0,0 +1,92 @@
+"""
+Fixtures for the benchmark suite.
+
+Every benchmark takes a `scale` (1 and 10 by default; set BENCHMARK_SCALES,
+e.g. BENCHMARK_SCALES=1,10,100, to choose) and measures its function with
+`profile`, which records both time and peak traced memory:
+- with pytest-benchmark installed, timings come from its `benchmark` fixture
+  and the peak memory is stored in extra_info, so both end up in
+  --benchmark-json / --benchmark-autosave output and can be compared
+  between runs with `pytest-benchmark compare`
+- without it, each function is timed over a few rounds with perf_counter
+  and the results are printed in the terminal summary
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / ".github/scripts"))
+
+DEFAULT_SCALES = "1,10"
+ROUNDS = 3
+
+
+def pytest_generate_tests(metafunc):
+    if "scale" in metafunc.fixturenames:
+        scales = [int(s) for s in os.environ.get("BENCHMARK_SCALES", DEFAULT_SCALES).split(",") if s.strip()]
+        metafunc.parametrize("scale", scales, ids=[f"{s}x" for s in scales])
+
+
+def _peak_memory(func, args, kwargs):
+    tracemalloc.start()
+    try:
+        func(*args, **kwargs)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.fixture
+def profile(request):
+    """Return profile(func, setup, rounds=ROUNDS), which times func and records its peak memory.
+
+    `setup` returns the (args, kwargs) for one call and is run before every
+    round, so functions that modify their input can be measured repeatedly.
+    The result of the final call is returned.
+    """
+
+    def run(func, setup, rounds=ROUNDS):
+        args, kwargs = setup()
+        peak = _peak_memory(func, args, kwargs)
+
+        try:
+            import pytest_benchmark  # noqa: F401
+        except ImportError:
+            benchmark = None
+        else:
+            benchmark = request.getfixturevalue("benchmark")
+
+        if benchmark is not None:
+            benchmark.extra_info["peak_memory_bytes"] = peak
+            return benchmark.pedantic(func, setup=setup, rounds=rounds)
+
+        timings = []
+        for _ in range(rounds):
+            args, kwargs = setup()
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            timings.append(time.perf_counter() - start)
+        request.config._benchmark_results.append((request.node.nodeid, min(timings), peak))
+        return result
+
+    return run
+
+
+def pytest_configure(config):
+    config._benchmark_results = []
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    results = getattr(config, "_benchmark_results", [])
+    if not results:
+        return
+    terminalreporter.section("benchmark (min of rounds, peak traced memory)")
+    for nodeid, seconds, peak in results:
+        terminalreporter.write_line(f"{seconds:10.4f}s {peak / 1024 / 1024:9.1f}MB  {nodeid}")
@@ -0,0 +1,150 @@
+"""
+Synthetic configuration shaped like ours, for benchmarks.
+
+At scale 1 a collection is roughly the size of one of our larger ones
+(conservation-area, brownfield-land): ~10k lookup rows across a few hundred
+organisations, an old-entity.csv with redirect chains, one entity-organisation
+range per organisation and a transformed resource of a few thousand entities.
+Scale 10 and 100 multiply every table. Generation is seeded, so a given
+scale always produces the same data.
+"""
+
+import csv
+import random
+from pathlib import Path
+
+from create_collection import COLUMN_MAPPINGS
+
+LOOKUP_ROWS = 10_000
+OLD_ENTITY_ROWS = 1_000
+ORGANISATIONS = 300
+TRANSFORMED_ENTITIES = 2_000
+ENDPOINTS = 400
+ENTITY_BASE = 44_000_000
+FIELDS = ["reference", "name", "organisation", "prefix", "geometry", "notes", "start-date", "entry-date"]
+TRANSFORMED_COLUMNS = [
+    "end-date", "entity", "entry-date", "entry-number", "fact", "field",
+    "priority", "reference-entity", "resource", "start-date", "value",
+]
+
+
+def _columns(kind, filename):
+    return COLUMN_MAPPINGS[kind][filename].split(",")
+
+
+def organisations(scale):
+    return [f"local-authority:S{i:04d}" for i in range(ORGANISATIONS * scale)]
+
+
+def lookup_rows(scale, dataset="conservation-area"):
+    """Lookup rows in contiguous entity blocks per organisation, as the assigners produce."""
+    orgs = organisations(scale)
+    per_org = LOOKUP_ROWS // ORGANISATIONS
+    rows = []
+    for i, org in enumerate(orgs):
+        base = ENTITY_BASE + i * per_org * 2
+        for j in range(per_org):
+            rows.append({
+                "prefix": dataset, "resource": "", "endpoint": "", "entry-number": "",
+                "organisation": org, "reference": f"{org[-5:]}-{j}", "entity": str(base + j),
+                "entry-date": "2024-01-01", "start-date": "", "end-date": "",
+            })
+    return rows
+
+
+def entity_organisation_rows(scale, dataset="conservation-area"):
+    per_org = LOOKUP_ROWS // ORGANISATIONS
+    return [
+        {
+            "dataset": dataset, "entity-minimum": str(ENTITY_BASE + i * per_org * 2),
+            "entity-maximum": str(ENTITY_BASE + (i + 1) * per_org * 2 - 1), "organisation": org,
+        }
+        for i, org in enumerate(organisations(scale))
+    ]
+
+
+def old_entity_rows(scale, seed=0):
+    """301 and 410 rows where about a third of the redirects form chains of two to four hops."""
+    rng = random.Random(seed)
+    rows = []
+    next_entity = ENTITY_BASE + LOOKUP_ROWS * 2 * scale
+    while len(rows) < OLD_ENTITY_ROWS * scale:
+        if rng.random() < 0.1:
+            rows.append({"old-entity": str(next_entity), "status": "410", "entity": ""})
+            next_entity += 1
+            continue
+        hops = rng.choice([1, 1, 2, 3, 4])
+        chain = list(range(next_entity, next_entity + hops + 1))
+        next_entity += hops + 1
+        rows.extend(
+            {"old-entity": str(source), "status": "301", "entity": str(target)}
+            for source, target in zip(chain, chain[1:])
+        )
+    for row in rows:
+        row.update({"notes": "", "end-date": "", "entry-date": "2024-01-01", "start-date": ""})
+    return rows
+
+
+def endpoint_rows(scale):
+    return [
+        {
+            "endpoint": f"{i:064x}", "endpoint-url": f"https://example.test/{i}.csv",
+            "parameters": "", "plugin": "", "entry-date": "2024-01-01", "start-date": "", "end-date": "",
+        }
+        for i in range(ENDPOINTS * scale)
+    ]
+
+
+def transformed_facts(scale, seed=0, resource="r" * 64):
+    """Fact rows for TRANSFORMED_ENTITIES * scale entities, one per FIELDS entry."""
+    rng = random.Random(seed)
+    orgs = organisations(scale)
+    rows = []
+    for i in range(TRANSFORMED_ENTITIES * scale):
+        entity = str(ENTITY_BASE + i)
+        org = rng.choice(orgs)
+        values = {
+            "reference": f"REF-{i}", "name": f"Area {i % 997}", "organisation": org, "prefix": "conservation-area",
+            "geometry": f"POINT ({rng.uniform(-2, 1):.6f} {rng.uniform(50, 55):.6f})",
+            "notes": "", "start-date": "2020-01-01", "entry-date": "2024-01-01",
+        }
+        for j, field in enumerate(FIELDS):
+            rows.append({
+                "end-date": "", "entity": entity, "entry-date": "2024-01-01", "entry-number": str(i + 1),
+                "fact": f"{i:056x}{j:08x}", "field": field, "priority": "2", "reference-entity": "",
+                "resource": resource, "start-date": "", "value": values[field],
+            })
+    return rows
+
+
+def write_csv(path, rows, fieldnames):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, restval="", lineterminator="\r\n")
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+def write_tree(root, scale, collection="conservation-area"):
+    """Write collection/<collection>/ and pipeline/<collection>/ CSVs under root."""
+    root = Path(root)
+    collection_dir = root / "collection" / collection
+    pipeline_dir = root / "pipeline" / collection
+    endpoints = endpoint_rows(scale)
+    write_csv(collection_dir / "endpoint.csv", endpoints, _columns("collection", "endpoint.csv"))
+    write_csv(
+        collection_dir / "source.csv",
+        [{"source": row["endpoint"][::-1], "endpoint": row["endpoint"], "organisation": org, "collection": collection}
+         for row, org in zip(endpoints, organisations(scale) * 2)],
+        _columns("collection", "source.csv"),
+    )
+    write_csv(pipeline_dir / "lookup.csv", lookup_rows(scale, collection), _columns("pipeline", "lookup.csv"))
+    write_csv(pipeline_dir / "old-entity.csv", old_entity_rows(scale), _columns("pipeline", "old-entity.csv"))
+    write_csv(
+        pipeline_dir / "entity-organisation.csv",
+        entity_organisation_rows(scale, collection),
+        _columns("pipeline", "entity-organisation.csv"),
+    )
+    return root
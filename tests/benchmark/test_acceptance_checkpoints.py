@@ -0,0 +1,29 @@
+import pytest
+
+from tests.acceptance.rules import ENTITY_ORGANISATION_RULES, OLD_ENTITY_RULES
+from tests.benchmark import synthetic
+
+csv_checkpoints = pytest.importorskip("digital_land.expectations.checkpoints.csv")
+
+
+def _run_checkpoint(dataset, file_path, rules):
+    checkpoint = csv_checkpoints.CsvCheckpoint(dataset=dataset, file_path=str(file_path))
+    checkpoint.load(rules)
+    checkpoint.run()
+    return [entry for entry in checkpoint.log.entries if not entry["passed"]]
+
+
+@pytest.mark.parametrize(
+    "dataset, filename, rules",
+    [
+        ("old-entity", "old-entity.csv", OLD_ENTITY_RULES),
+        ("entity-organisation", "entity-organisation.csv", ENTITY_ORGANISATION_RULES),
+    ],
+)
+def test_checkpoint(tmp_path, scale, profile, dataset, filename, rules):
+    file_path = synthetic.write_tree(tmp_path, scale) / "pipeline" / "conservation-area" / filename
+    # The acceptance tests normalise line endings before running checkpoints
+    file_path.write_bytes(file_path.read_bytes().replace(b"\r\n", b"\n"))
+
+    failed = profile(_run_checkpoint, lambda: ((dataset, file_path, rules), {}))
+    assert failed == []
@@ -0,0 +1,29 @@
+import pandas as pd
+import pytest
+
+from tests.benchmark import synthetic
+
+batch_assign_entities = pytest.importorskip("batch_assign_entities")
+
+
+@pytest.fixture
+def facts(scale):
+    return pd.DataFrame(synthetic.transformed_facts(scale), dtype=str)
+
+
+def test_make_fingerprints(facts, profile):
+    fingerprints = profile(batch_assign_entities._make_fingerprints, lambda: ((facts,), {}))
+    assert len(fingerprints) == facts["entity"].nunique()
+
+
+def test_collect_validation_rows(facts, scale, profile):
+    # The current resource re-publishes every old entity plus 5% new ones
+    entities = sorted(facts["entity"].unique())
+    new_entities = set(entities[-len(entities) // 20:])
+    old = facts[~facts["entity"].isin(new_entities)]
+
+    def setup():
+        return (facts, old, "conservation-area", "r" * 64, 10, "o" * 64), {}
+
+    validation_rows, old_entities, new_entity_ids = profile(batch_assign_entities._collect_validation_rows, setup)
+    assert new_entity_ids == new_entities
@@ -0,0 +1,77 @@
+import copy
+import csv
+import importlib.util
+import shutil
+from datetime import date
+
+from create_collection import COLUMN_MAPPINGS
+from standardise_csvs import SORT_MAPPINGS, standardise_csv
+
+import bin.add_data as add_data
+from tests.benchmark import synthetic
+from tests.benchmark.conftest import ROOT
+
+
+def _load_script(filename):
+    spec = importlib.util.spec_from_file_location(filename.replace("-", "_")[:-3], ROOT / ".github/scripts" / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _fresh_copy(source, target, *args):
+    """A profile setup that restores target from source before each run."""
+    def setup():
+        shutil.copyfile(source, target)
+        return (target, *args), {}
+
+    return setup
+
+
+def test_standardise_lookup_csv(tmp_path, scale, profile):
+    source = synthetic.write_tree(tmp_path / "tree", scale) / "pipeline" / "conservation-area" / "lookup.csv"
+    target = tmp_path / "lookup.csv"
+    columns = COLUMN_MAPPINGS["pipeline"]["lookup.csv"]
+    sort_cols = SORT_MAPPINGS["pipeline"]["lookup.csv"]
+
+    assert profile(standardise_csv, _fresh_copy(source, target, columns, sort_cols)) is None
+
+
+def test_resolve_redirect_chains(scale, profile):
+    dedup = _load_script("deduplicate-ca-geogs.py")
+    rows = synthetic.old_entity_rows(scale)
+
+    def setup():
+        return (copy.deepcopy(rows),), {}
+
+    resolved = profile(dedup.resolve_redirect_chains, setup)
+    targets = {row["entity"] for row in resolved if row["status"] == "301"}
+    assert not any(row["old-entity"] in targets for row in resolved if row["status"] == "301")
+
+
+def test_append_old_entity_rows(tmp_path, scale, profile):
+    source = synthetic.write_tree(tmp_path / "tree", scale) / "pipeline" / "conservation-area" / "old-entity.csv"
+    target = tmp_path / "old-entity.csv"
+    new_rows = [[str(90_000_000 + i), "410", "", "", "", "2025-01-01", ""] for i in range(100 * scale)]
+
+    assert profile(add_data.append_csv_rows, _fresh_copy(source, target, new_rows)) == len(new_rows)
+
+
+def test_retire_endpoints_in_csv(tmp_path, scale, profile, monkeypatch):
+    root = synthetic.write_tree(tmp_path / "tree", scale)
+    collection_dir = root / "collection" / "conservation-area"
+    pristine = tmp_path / "pristine"
+    shutil.copytree(collection_dir, pristine)
+    retire = [row["endpoint"] for row in synthetic.endpoint_rows(scale)[::10]]
+    monkeypatch.chdir(root)
+
+    def setup():
+        shutil.copytree(pristine, collection_dir, dirs_exist_ok=True)
+        return ("conservation-area", retire), {}
+
+    profile(add_data.retire_endpoints_in_csv, setup)
+
+    today = date.today().isoformat()
+    with open(collection_dir / "endpoint.csv", newline="") as f:
+        end_dates = {row["endpoint"]: row["end-date"] for row in csv.DictReader(f)}
+    assert all(end_dates[endpoint] == today for endpoint in retire)
@@ -1,5 +1,6 @@
 
 import os
+import sys
 
 import pytest
 from urllib.parse import urlencode
@@ -9,9 +10,14 @@ import json
 
 
 DATASETTE_BASE_URL = "https://datasette.planning.data.gov.uk/digital-land.json"
+ACCEPTANCE_MODULE = "tests.acceptance.test_config_dataset"
 
 @pytest.fixture(scope="session")
 def specification_dir(tmp_path_factory):
+    acceptance = sys.modules.get(ACCEPTANCE_MODULE)
+    if acceptance is not None and acceptance.ACCEPTANCE_CODE is not None:
+        # Already downloaded, and hashed to decide which collections to check
+        return acceptance.ACCEPTANCE_SPECIFICATION_DIR
     specification_dir = tmp_path_factory.mktemp("specification")
     Specification.download(specification_dir)
     return specification_dir
@@ -53,4 +59,40 @@ def prefix_aliases():
                 result[prefix] = []
             result[prefix].append(dataset)
     
-    return result
\ No newline at end of file
+    return result
+
+
+_passed_tests = set()
+_failed_tests = set()
+
+
+def pytest_runtest_logreport(report):
+    if report.failed:
+        _failed_tests.add(report.nodeid)
+    elif report.when == "call" and report.passed:
+        _passed_tests.add(report.nodeid)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """With ACCEPTANCE_CHANGED_ONLY set, record the changed collections all of whose acceptance tests passed.
+
+    A collection counts only if every test parametrized over its files ran and
+    passed in this session, so a -k or node id run records just the
+    collections it fully checked.
+    """
+    if not os.getenv("ACCEPTANCE_CHANGED_ONLY"):
+        return
+    acceptance = sys.modules.get(ACCEPTANCE_MODULE)
+    if acceptance is None or acceptance.CHANGED_COLLECTIONS is None:
+        return
+    passed = {
+        item.name for item in session.items
+        if getattr(item, "module", None) is acceptance
+        and item.nodeid in _passed_tests and item.nodeid not in _failed_tests
+    }
+    expected = acceptance.expected_tests()
+    manifest = acceptance.StageManifest(acceptance.REPO_ROOT)
+    for collection in sorted(acceptance.CHANGED_COLLECTIONS):
+        if expected.get(collection, set()) <= passed:
+            manifest.record(acceptance.ACCEPTANCE_STAGE, collection, code=acceptance.ACCEPTANCE_CODE)
+    manifest.save()
@@ -10,9 +10,11 @@ import pytest
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / ".github/scripts"))
 
+from fingerprint_store import STORE_FILENAME, FingerprintStore
 from batch_assign_entities import (
     _collect_validation_rows,
     _make_fingerprints,
+    _resource_fingerprints,
     download_file,
     download_urls,
     ensure_specification_dir,
@@ -237,6 +239,52 @@ def test_process_csv_detects_duplicate_all_fields(
     assert "Matches existing entity" in dup_rows.iloc[0]["message"]
 
 
+@patch("batch_assign_entities.get_old_resource_hashes_batch")
+@patch("batch_assign_entities.check_and_assign_entities")
+@patch("batch_assign_entities.get_old_resource_df_from_hash")
+@patch("batch_assign_entities.pd.read_csv")
+@patch("batch_assign_entities.shutil.copy")
+def test_process_csv_compares_against_stored_fingerprints(
+    mock_copy,
+    mock_read_csv,
+    mock_get_old_hash,
+    mock_check,
+    mock_batch_hashes,
+    temp_dirs,
+):
+    cache_dir, resource_dir = temp_dirs
+    resource_file = resource_dir / "resource123"
+    resource_file.write_text("test data")
+
+    old_resource_df = pd.DataFrame(
+        {"entity": ["1", "1", "1"], "field": ["organisation", "reference", "prefix"], "value": ["org1", "ref1", "ca"]}
+    )
+    new_resource_df = pd.DataFrame(
+        {"entity": ["2", "2", "2"], "field": ["organisation", "reference", "prefix"], "value": ["org1", "ref1", "ca"]}
+    )
+    lookup_df = pd.DataFrame({"prefix": ["ca"], "organisation": ["org1"], "entity": [1]})
+    store = FingerprintStore(cache_dir / STORE_FILENAME)
+    store.put("endpoint456", "hash123", _resource_fingerprints(old_resource_df))
+    store.close()
+
+    mock_batch_hashes.return_value = {"endpoint456": "hash123"}
+    mock_read_csv.side_effect = [lookup_df, new_resource_df, lookup_df]
+
+    _, output_df = process_csv(
+        "odp",
+        resource_dir,
+        _issue_summary_df(resource_file),
+        cache_dir,
+        new_entity_threshold=10,
+        skip_checks=False,
+    )
+
+    mock_get_old_hash.assert_not_called()
+    dup_rows = output_df[output_df["error_code"] == "duplicate_entity_all_fields"]
+    assert "Matches existing entity(s) 1 " in dup_rows.iloc[0]["message"]
+    assert dup_rows.iloc[0]["organisation"] == "org1"
+
+
 @patch("batch_assign_entities.get_old_resource_hashes_batch")
 @patch("batch_assign_entities.check_and_assign_entities")
 @patch("batch_assign_entities.get_old_resource_df_from_hash")
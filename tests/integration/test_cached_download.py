@@ -0,0 +1,112 @@
+import hashlib
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / ".github/scripts"))
+
+import cached_download
+
+
+class _RangeHandler(BaseHTTPRequestHandler):
+    """Serves `server.body` with ETag validation and byte-range support.
+
+    If `server.drop_after` is set, the next full response is cut short after
+    that many bytes to simulate a connection dropping mid-transfer.
+    """
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        body = server.body
+        etag = server.etag
+
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        range_header = self.headers.get("Range")
+        if range_header and self.headers.get("If-Range") == etag:
+            start = int(range_header.split("=")[1].split("-")[0])
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+            self.send_header("Content-Length", str(len(body) - start))
+            self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body[start:])
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        if server.drop_after is not None:
+            self.wfile.write(body[:server.drop_after])
+            server.drop_after = None
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _RangeHandler)
+    httpd.requests = []
+    httpd.drop_after = None
+    httpd.body = b"entity_a,entity_b\n" + b"1,2\n" * 5000
+    httpd.etag = f'"{hashlib.md5(httpd.body).hexdigest()}"'
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}/reporting/feed.csv"
+
+
+def test_download_then_revalidate_uses_cache(server, tmp_path):
+    path = cached_download.download_with_cache(_url(server), tmp_path)
+    assert path.read_bytes() == server.body
+
+    path = cached_download.download_with_cache(_url(server), tmp_path)
+
+    assert path.read_bytes() == server.body
+    assert server.requests[-1]["If-None-Match"] == server.etag
+    assert len(server.requests) == 2
+
+
+def test_changed_feed_is_downloaded_again(server, tmp_path):
+    cached_download.download_with_cache(_url(server), tmp_path)
+    server.body = b"entity_a,entity_b\n3,4\n"
+    server.etag = f'"{hashlib.md5(server.body).hexdigest()}"'
+
+    path = cached_download.download_with_cache(_url(server), tmp_path)
+
+    assert path.read_bytes() == server.body
+
+
+def test_interrupted_download_resumes_with_range(server, tmp_path):
+    server.drop_after = 1000
+
+    path = cached_download.download_with_cache(_url(server), tmp_path, initial_backoff=0)
+
+    assert path.read_bytes() == server.body
+    assert server.requests[-1]["Range"] == "bytes=1000-"
+    assert not path.with_name(path.name + ".part").exists()
+
+
+def test_corrupt_download_is_rejected(server, tmp_path):
+    server.etag = '"' + "0" * 32 + '"'
+
+    with pytest.raises(cached_download.DownloadIntegrityError):
+        cached_download.download_with_cache(_url(server), tmp_path, max_retries=2, initial_backoff=0)
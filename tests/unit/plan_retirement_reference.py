@@ -0,0 +1,183 @@
+"""
+The per-row plan retirement rules retire-mhclg-plan-data.py used before it was
+vectorised, kept as a reference for test_retire_mhclg_plan_data.
+
+They take lookup and entity-organisation rows as dicts of strings, as read by
+csv.DictReader, and return what the script's retire_* functions return.
+"""
+
+MHCLG_ORG = 'government-organisation:D1342'
+MHCLG_RANGES = {
+    'plan-timetable': [(5101702, 5102699), (5103454, 5109686)],
+    'local-plan': [(4220656, 4220966)],
+}
+MHCLG_ENTITY_RANGE = 22
+
+
+def in_mhclg_range(entity, prefix):
+    return any(lo <= entity <= hi for lo, hi in MHCLG_RANGES[prefix])
+
+
+def range_within_mhclg(entity_min, entity_max, prefix):
+    return any(lo <= entity_min and entity_max <= hi for lo, hi in MHCLG_RANGES[prefix])
+
+
+def _lpa_rows(lookup_rows, prefix):
+    all_lpa_rows = [r for r in lookup_rows if r['organisation'] != MHCLG_ORG and r['prefix'] == prefix]
+    return [r for r in all_lpa_rows if not in_mhclg_range(int(r['entity']), prefix)]
+
+
+def retire_plan_timetable_data(lookup_rows, entity_org_rows, group_constituents, constituent_orgs):
+    prefix = 'plan-timetable'
+    lpa_rows = _lpa_rows(lookup_rows, prefix)
+    if not lpa_rows:
+        return {}, set()
+
+    org_ranges = {}
+    for row in lpa_rows:
+        org = row['organisation']
+        entity = int(row['entity'])
+        if org not in org_ranges:
+            org_ranges[org] = {'min': entity, 'max': entity}
+        else:
+            org_ranges[org]['min'] = min(org_ranges[org]['min'], entity)
+            org_ranges[org]['max'] = max(org_ranges[org]['max'], entity)
+
+    lpa_range_keys = {(org, data['min'], data['max']) for org, data in org_ranges.items()}
+    mhclg_to_retire = []
+    for row in entity_org_rows:
+        if row['dataset'] == prefix and row['organisation'] in org_ranges:
+            key = (row['organisation'], int(row['entity-minimum']), int(row['entity-maximum']))
+            if key not in lpa_range_keys:
+                mhclg_to_retire.append(key)
+    mhclg_to_retire = [
+        (org, emin, emax) for org, emin, emax in mhclg_to_retire
+        if (emax - emin) == MHCLG_ENTITY_RANGE and range_within_mhclg(emin, emax, prefix)
+    ]
+
+    orgs_with_retirement = set(org for org, _, _ in mhclg_to_retire)
+    orgs_missing = set(org_ranges) - orgs_with_retirement
+    seeded = {
+        r['organisation'] for r in entity_org_rows
+        if r['dataset'] == prefix
+        and range_within_mhclg(int(r['entity-minimum']), int(r['entity-maximum']), prefix)
+    }
+    never_seeded = {org for org in orgs_missing if not (constituent_orgs(org, group_constituents) & seeded)}
+    orgs_missing -= never_seeded
+
+    still_missing = set()
+    for org in sorted(orgs_missing):
+        constituents = constituent_orgs(org, group_constituents)
+        if constituents == {org}:
+            still_missing.add(org)
+            continue
+        all_covered = True
+        for constituent in constituents:
+            if constituent in orgs_with_retirement:
+                continue
+            match = next(
+                (r for r in entity_org_rows
+                 if r['dataset'] == prefix and r['organisation'] == constituent
+                 and int(r['entity-maximum']) - int(r['entity-minimum']) == MHCLG_ENTITY_RANGE
+                 and range_within_mhclg(int(r['entity-minimum']), int(r['entity-maximum']), prefix)),
+                None
+            )
+            if match:
+                mhclg_to_retire.append((org, int(match['entity-minimum']), int(match['entity-maximum'])))
+            else:
+                all_covered = False
+        if all_covered:
+            orgs_with_retirement.add(org)
+        else:
+            still_missing.add(org)
+    if still_missing:
+        raise ValueError(f"No MHCLG template range found for: {', '.join(sorted(still_missing))}")
+    if not mhclg_to_retire:
+        return {}, set()
+
+    entity_to_org = {}
+    for org, entity_min, entity_max in mhclg_to_retire:
+        for r in lookup_rows:
+            if (r['organisation'] == MHCLG_ORG and r['prefix'] == prefix
+                    and entity_min <= int(r['entity']) <= entity_max):
+                entity_to_org[int(r['entity'])] = (org, prefix)
+
+    if set(entity_to_org) & {int(r['entity']) for r in lpa_rows}:
+        raise ValueError("Entities are in both the retirement list and LPA authoritative data")
+    return entity_to_org, set(org_ranges) - never_seeded
+
+
+def retire_local_plan_data(lookup_rows, entity_org_rows, org_mapping, group_constituents,
+                           constituent_orgs, authority_to_slug):
+    prefix = 'local-plan'
+    lpa_rows = _lpa_rows(lookup_rows, prefix)
+    if not lpa_rows:
+        return {}, set()
+
+    lpa_orgs = set(r['organisation'] for r in lpa_rows)
+    if [org for org in lpa_orgs if org not in org_mapping]:
+        raise ValueError("Could not resolve organisation names")
+    fake_plan_references = {org: f"{authority_to_slug(org_mapping[org])}-new-local-plan" for org in lpa_orgs}
+    ref_to_org = {ref: org for org, ref in fake_plan_references.items()}
+
+    entity_to_org = {}
+    for row in lookup_rows:
+        if (row['organisation'] == MHCLG_ORG and row['prefix'] == prefix
+                and row['reference'] in fake_plan_references.values()):
+            entity = int(row['entity'])
+            if not in_mhclg_range(entity, prefix):
+                raise ValueError(f"Found MHCLG entity {entity} outside expected range")
+            entity_to_org[entity] = (ref_to_org[row['reference']], prefix)
+
+    orgs_with_retirement = set(org for org, _ in entity_to_org.values())
+    still_missing = set()
+    for org in sorted(lpa_orgs - orgs_with_retirement):
+        constituents = constituent_orgs(org, group_constituents)
+        if constituents == {org} or [c for c in constituents if c not in org_mapping]:
+            still_missing.add(org)
+            continue
+        all_covered = True
+        for constituent in constituents:
+            if constituent in orgs_with_retirement:
+                continue
+            reference = f"{authority_to_slug(org_mapping[constituent])}-new-local-plan"
+            match = next(
+                (r for r in lookup_rows
+                 if r['organisation'] == MHCLG_ORG and r['prefix'] == prefix and r['reference'] == reference),
+                None
+            )
+            if not match:
+                all_covered = False
+                continue
+            entity = int(match['entity'])
+            if not in_mhclg_range(entity, prefix):
+                raise ValueError(f"Found MHCLG entity {entity} outside expected range")
+            entity_to_org[entity] = (org, prefix)
+            ref_to_org[reference] = org
+        if all_covered:
+            orgs_with_retirement.add(org)
+        else:
+            still_missing.add(org)
+    if still_missing:
+        raise ValueError(f"No MHCLG template entity found for: {', '.join(sorted(still_missing))}")
+
+    if set(entity_to_org) & {int(r['entity']) for r in lpa_rows}:
+        raise ValueError("Entities are in both the retirement list and LPA authoritative data")
+
+    entity_org_ranges = [
+        (r['organisation'], int(r['entity-minimum']), int(r['entity-maximum']))
+        for r in entity_org_rows if r['dataset'] == prefix
+    ]
+    for entity in entity_to_org:
+        reference = next(
+            (r['reference'] for r in lookup_rows
+             if r['prefix'] == prefix and int(r['entity']) == entity and r['organisation'] == MHCLG_ORG),
+            None
+        )
+        lpa_org = ref_to_org.get(reference)
+        if not lpa_org:
+            raise ValueError(f"Entity {entity} does not map back to any LPA organisation")
+        if not any(org in constituent_orgs(lpa_org, group_constituents) and emin <= entity <= emax
+                   for org, emin, emax in entity_org_ranges):
+            raise ValueError(f"Entity {entity} does not fall within any entity-organisation range")
+    return entity_to_org, lpa_orgs
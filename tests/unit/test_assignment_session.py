@@ -0,0 +1,84 @@
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / ".github/scripts"))
+
+from assignment_session import MEMOISED, AssignmentSession  # noqa: E402
+
+
+def _commands_module():
+    """A stand-in for digital_land.commands, whose function builds a Pipeline per call."""
+    module = types.ModuleType("commands")
+    exec(
+        "built = []\n"
+        "class Pipeline:\n"
+        "    def __init__(self, path, dataset):\n"
+        "        built.append((path, dataset))\n"
+        "def check_and_assign_entities(path, dataset):\n"
+        "    return Pipeline(path, dataset)\n",
+        module.__dict__,
+    )
+    return module
+
+
+def test_objects_are_reused_until_their_files_change(tmp_path):
+    commands = _commands_module()
+    original = commands.Pipeline
+    pipeline_dir = tmp_path / "pipeline" / "tree"
+    pipeline_dir.mkdir(parents=True)
+    (pipeline_dir / "lookup.csv").write_text("prefix,entity\r\n")
+    session = AssignmentSession()
+
+    with session.installed(commands.check_and_assign_entities):
+        first = commands.check_and_assign_entities(pipeline_dir, "tree")
+        assert commands.check_and_assign_entities(pipeline_dir, "tree") is first
+        other = commands.check_and_assign_entities(pipeline_dir, "tree-preservation-zone")
+
+        (pipeline_dir / "lookup.csv").write_text("prefix,entity\r\ntree,1\r\n")
+        reloaded = commands.check_and_assign_entities(pipeline_dir, "tree")
+
+    assert other is not first and reloaded is not first
+    assert len(commands.built) == 3
+    assert commands.Pipeline is original
+    assert session.stats["Pipeline"] == {
+        "loads": 3, "reloads": 1, "reuses": 1, "load_seconds": session.stats["Pipeline"]["load_seconds"],
+    }
+    assert "Pipeline: 3 load(s)" in session.summary()
+
+
+def test_only_files_directly_inside_a_directory_are_checked(tmp_path):
+    commands = _commands_module()
+    pipeline_dir = tmp_path / "pipeline" / "tree"
+    (pipeline_dir / "var").mkdir(parents=True)
+    (pipeline_dir / "lookup.csv").write_text("prefix,entity\r\n")
+    session = AssignmentSession()
+
+    with session.installed(commands.check_and_assign_entities):
+        first = commands.check_and_assign_entities(pipeline_dir, "tree")
+        (pipeline_dir / "var" / "log.txt").write_text("not read by Pipeline")
+        assert commands.check_and_assign_entities(pipeline_dir, "tree") is first
+
+
+def test_check_and_assign_entities_builds_the_memoised_classes_from_its_module_globals():
+    # If digital_land stops looking these classes up in its module's globals,
+    # installing a session silently stops saving anything; fail loudly instead.
+    commands = pytest.importorskip("digital_land.commands")
+    func = commands.check_and_assign_entities
+    namespace = func.__globals__
+    originals = {name: namespace.get(name) for name in MEMOISED}
+
+    assert all(isinstance(cls, type) for cls in originals.values()), originals
+    session = AssignmentSession()
+    with session.installed(func):
+        assert all(namespace[name] is not originals[name] for name in MEMOISED)
+    assert {name: namespace[name] for name in MEMOISED} == originals
+
+
+def test_installing_leaves_functions_without_globals_alone():
+    session = AssignmentSession()
+    with session.installed(object()):
+        pass
+    assert "Total setup time saved: ~0.00s" in session.summary()
@@ -0,0 +1,129 @@
+import csv
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / ".github/scripts"))
+
+from authoritative_retirement import (
+    MHCLG_ORG,
+    RepositoryRetirementWriter,
+    RetirementTarget,
+    RetirementWriter,
+    retire_placeholder_data,
+)
+from config_repository import ConfigRepository
+
+HISTORY = [
+    # ABC has MHCLG data and an active endpoint of its own, so MHCLG's is retired
+    {"pipeline": "conservation-area", "endpoint": "mhclg-abc", "organisation": MHCLG_ORG,
+     "endpoint_url": "https://example.test/ABC-conservation-area.csv", "endpoint_end_date": ""},
+    {"pipeline": "conservation-area", "endpoint": "lpa-abc", "organisation": "local-authority:ABC",
+     "endpoint_url": "https://abc.test/ca.csv", "endpoint_end_date": ""},
+    # DEF's own endpoint has ended, so MHCLG's is kept
+    {"pipeline": "conservation-area", "endpoint": "mhclg-def", "organisation": MHCLG_ORG,
+     "endpoint_url": "https://example.test/DEF-conservation-area.csv", "endpoint_end_date": ""},
+    {"pipeline": "conservation-area", "endpoint": "lpa-def", "organisation": "local-authority:DEF",
+     "endpoint_url": "https://def.test/ca.csv", "endpoint_end_date": "2024-01-01"},
+    {"pipeline": "conservation-area", "endpoint": "he", "organisation": "government-organisation:PB1164",
+     "endpoint_url": "https://he.test/ca.csv", "endpoint_end_date": ""},
+    # Document endpoints share the conservation-area collection
+    {"pipeline": "conservation-area-document", "endpoint": "mhclg-abc-doc", "organisation": MHCLG_ORG,
+     "endpoint_url": "https://example.test/ABC-conservation-area-document.csv", "endpoint_end_date": "2024-02-01"},
+    {"pipeline": "conservation-area-document", "endpoint": "lpa-abc-doc", "organisation": "local-authority:ABC",
+     "endpoint_url": "https://abc.test/doc.csv", "endpoint_end_date": ""},
+]
+
+RESOURCES = {
+    "mhclg-abc": ["res-1", "res-2"],
+    "mhclg-abc-doc": ["res-2", "res-3"],
+}
+
+
+class _Query:
+    def __init__(self):
+        self.sql = []
+
+    def __call__(self, database, sql):
+        self.sql.append(sql)
+        if "SELECT DISTINCT endpoint, resource" in sql:
+            return [
+                {"endpoint": endpoint, "resource": resource}
+                for endpoint, resources in RESOURCES.items() if f"'{endpoint}'" in sql
+                for resource in resources
+            ]
+        return iter(HISTORY)
+
+
+def _write_csv(path, header, rows):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def _read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def test_retires_placeholder_data_across_datasets_in_one_pass(tmp_path):
+    collection = tmp_path / "conservation-area"
+    _write_csv(collection / "endpoint.csv", ["endpoint", "end-date"],
+               [["mhclg-abc", ""], ["mhclg-abc-doc", ""], ["mhclg-def", ""], ["lpa-abc", ""]])
+    _write_csv(collection / "source.csv", ["source", "endpoint", "end-date"],
+               [["s1", "mhclg-abc", ""], ["s2", "mhclg-def", ""]])
+    _write_csv(collection / "old-resource.csv", ["old-resource", "status", "resource", "notes"],
+               [["res-1", "410", "", "already retired"]])
+    query = _Query()
+    cache_path = tmp_path / "cache.json"
+
+    results = retire_placeholder_data(
+        [
+            RetirementTarget("conservation-area", collection="conservation-area"),
+            RetirementTarget("conservation-area-document", collection="conservation-area"),
+        ],
+        writer=RetirementWriter(tmp_path, today="2025-01-01"),
+        query=query,
+        resource_cache_path=cache_path,
+    )
+
+    assert results["conservation-area"]["lpas"] == {"ABC"}
+    assert results["conservation-area"]["resources"] == ["res-2"]
+    assert results["conservation-area-document"]["resources"] == ["res-3"]
+
+    end_dates = {row["endpoint"]: row["end-date"] for row in _read_csv(collection / "endpoint.csv")}
+    assert end_dates == {"mhclg-abc": "2025-01-01", "mhclg-abc-doc": "2025-01-01", "mhclg-def": "", "lpa-abc": ""}
+    assert [row["old-resource"] for row in _read_csv(collection / "old-resource.csv")] == ["res-1", "res-2", "res-3"]
+
+    # Only the endpoint that has ended on the platform is cached, so a second run
+    # queries resources for the live one alone
+    query.sql.clear()
+    retire_placeholder_data(
+        [RetirementTarget("conservation-area-document", collection="conservation-area")],
+        writer=RetirementWriter(tmp_path, today="2025-01-01"),
+        query=query,
+        resource_cache_path=cache_path,
+    )
+    assert not any("SELECT DISTINCT endpoint, resource" in sql for sql in query.sql)
+
+
+def test_repository_writer_defers_changes_until_the_repository_is_flushed(tmp_path):
+    collection = tmp_path / "collection" / "conservation-area"
+    _write_csv(collection / "endpoint.csv", ["endpoint", "end-date"], [["mhclg-abc", ""], ["lpa-abc", ""]])
+    _write_csv(collection / "old-resource.csv", ["old-resource", "status", "resource", "notes"],
+               [["res-1", "410", "", "already retired"]])
+    repo = ConfigRepository(tmp_path)
+
+    retire_placeholder_data(
+        [RetirementTarget("conservation-area", collection="conservation-area")],
+        writer=RepositoryRetirementWriter(repo, today="2025-01-01"),
+        query=_Query(),
+        resource_cache_path=tmp_path / "cache.json",
+    )
+    assert [row["end-date"] for row in _read_csv(collection / "endpoint.csv")] == ["", ""]
+
+    repo.flush()
+    end_dates = {row["endpoint"]: row["end-date"] for row in _read_csv(collection / "endpoint.csv")}
+    assert end_dates == {"mhclg-abc": "2025-01-01", "lpa-abc": ""}
+    assert [row["old-resource"] for row in _read_csv(collection / "old-resource.csv")] == ["res-1", "res-2"]
@@ -0,0 +1,99 @@
+import csv
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / ".github/scripts"))
+
+import check_endpoints
+
+
+class _Response:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.rows
+
+
+class _Session:
+    """Answers endpoint IN (...) queries from a fixed set of known endpoints."""
+
+    def __init__(self, known, fail_on=None):
+        self.known = known
+        self.fail_on = fail_on
+        self.urls = []
+
+    def get(self, url, timeout=None):
+        self.urls.append(url)
+        if self.fail_on and self.fail_on in url:
+            raise RuntimeError("datasette unavailable")
+        return _Response([{"endpoint": e} for e in self.known if e in url])
+
+
+def _write_csv(path: Path, header, rows):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+@pytest.fixture
+def collection_dir(tmp_path):
+    recent = (datetime.now(timezone.utc) - timedelta(days=1)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    _write_csv(
+        tmp_path / "conservation-area" / "endpoint.csv",
+        ["endpoint", "endpoint-url", "parameters", "plugin", "entry-date", "start-date", "end-date"],
+        [
+            ["aaa", "http://example.test/a", "", "", recent, "", ""],
+            ["bbb", "http://example.test/b", "", "", recent, "", ""],
+            ["old", "http://example.test/old", "", "", "2020-01-01T00:00:00Z", "", ""],
+        ],
+    )
+    _write_csv(
+        tmp_path / "conservation-area" / "source.csv",
+        ["source", "endpoint", "organisation", "pipelines"],
+        [["s1", "aaa", "local-authority:ABC", "conservation-area"]],
+    )
+    (tmp_path / "empty-collection").mkdir()
+    return tmp_path
+
+
+def test_collect_new_endpoints_reads_local_tree(collection_dir):
+    entries = check_endpoints.collect_new_endpoints(
+        check_endpoints.get_dataset_names(collection_dir), collection_dir=collection_dir
+    )
+
+    assert [e["endpoint"] for e in entries] == ["aaa", "bbb"]
+    assert entries[0]["organisations"] == ["local-authority:ABC"]
+    assert entries[0]["pipelines"] == ["conservation-area"]
+    assert entries[1]["organisations"] == []
+
+
+def test_check_endpoints_batches_queries(collection_dir):
+    entries = check_endpoints.collect_new_endpoints(["conservation-area"], collection_dir=collection_dir)
+    session = _Session(known={"aaa"})
+
+    results = check_endpoints.check_endpoints(entries, session=session, chunk_size=50, requests_per_second=0)
+
+    assert len(session.urls) == 1
+    assert {r["endpoint"]: r["status"] for r in results} == {"aaa": "found", "bbb": "not-found"}
+
+
+def test_check_endpoints_marks_failed_chunk_as_error():
+    entries = [{"dataset": "d", "endpoint": e, "organisations": [], "pipelines": []} for e in ("aaa", "bbb")]
+    session = _Session(known={"aaa", "bbb"}, fail_on="bbb")
+
+    results = check_endpoints.check_endpoints(entries, session=session, chunk_size=1, requests_per_second=0)
+    report = check_endpoints.build_report(results)
+
+    assert {r["endpoint"]: r["status"] for r in results} == {"aaa": "found", "bbb": "error"}
+    assert results[1]["error"] == "datasette unavailable"
+    assert report["checked"] == 2
+    assert report["failed"] == 1
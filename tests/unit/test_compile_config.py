@@ -0,0 +1,42 @@
+import sqlite3
+
+import bin.compile_config as compile_config
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(text.encode("utf-8"))
+
+
+def test_compiles_indexed_tables_and_rebuilds_only_changed_inputs(tmp_path):
+    _write(tmp_path / "collection" / "tree" / "endpoint.csv", "endpoint,end-date\r\ne1,\r\n")
+    _write(
+        tmp_path / "pipeline" / "tree" / "lookup.csv",
+        "prefix,reference,entity,organisation\r\ntree,T1,100,local-authority:ABC\r\n,,,\r\ntree,T2,101\r\n",
+    )
+    _write(tmp_path / "pipeline" / "tree" / "old-entity.csv", "old-entity,status,entity\r\n99,301,100\r\n")
+    output = tmp_path / "var" / "compiled-config.sqlite3"
+
+    assert compile_config.compile_config("tree", output, root=tmp_path) == ["endpoint", "lookup", "old_entity"]
+
+    conn = sqlite3.connect(output)
+    assert conn.execute("SELECT prefix, reference, entity, organisation FROM lookup ORDER BY entity").fetchall() == [
+        ("tree", "T1", 100, "local-authority:ABC"),
+        ("tree", "T2", 101, ""),
+    ]
+    indexes = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"lookup__prefix__reference", "lookup__entity", "old_entity__old_entity"} <= indexes
+    assert conn.execute("SELECT status FROM old_entity WHERE old_entity = 99").fetchone() == ("301",)
+    conn.close()
+
+    assert compile_config.compile_config("tree", output, root=tmp_path) == []
+
+    _write(tmp_path / "pipeline" / "tree" / "old-entity.csv", "old-entity,status,entity\r\n99,410,\r\n")
+    (tmp_path / "collection" / "tree" / "endpoint.csv").unlink()
+    assert sorted(compile_config.compile_config("tree", output, root=tmp_path)) == ["endpoint", "old_entity"]
+
+    conn = sqlite3.connect(output)
+    assert conn.execute("SELECT status FROM old_entity").fetchall() == [("410",)]
+    tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")}
+    assert tables == {"_source", "lookup", "old_entity"}
+    conn.close()
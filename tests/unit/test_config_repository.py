@@ -0,0 +1,101 @@
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / ".github/scripts"))
+
+from config_repository import ConfigConflictError, ConfigRepository
+
+
+@pytest.fixture
+def repo(tmp_path):
+    pipeline = tmp_path / "pipeline" / "local-plan"
+    pipeline.mkdir(parents=True)
+    (pipeline / "lookup.csv").write_bytes(
+        b"prefix,resource,endpoint,entry-number,organisation,reference,entity,entry-date,start-date,end-date\r\n"
+        b"local-plan,,,,local-authority:ABC,plan-1,100,,,\r\n"
+        b"local-plan,,,,local-authority:DEF,plan-2,101,,,\r\n"
+    )
+    (pipeline / "old-entity.csv").write_bytes(
+        b"old-entity,status,entity,notes,end-date,entry-date,start-date\r\n"
+        b"99,410,,,,,\r\n"
+    )
+    return ConfigRepository(tmp_path)
+
+
+def test_tables_are_loaded_lazily_and_indexed(repo):
+    lookup = repo.lookup("local-plan")
+    assert lookup._rows is None
+
+    assert lookup.get("reference", "plan-2")["entity"] == "101"
+    assert [r["entity"] for r in lookup.find("organisation", "local-authority:ABC")] == ["100"]
+    assert repo.datasets() == ["local-plan"]
+
+
+def test_appended_rows_are_indexed_and_appended_on_flush(repo, tmp_path):
+    old_entity = repo.old_entity("local-plan")
+    old_entity.index("old-entity")
+    old_entity.append({"old-entity": 100, "status": 301, "entity": 101})
+
+    assert old_entity.get("old-entity", "100")["entity"] == "101"
+    assert repo.flush() == [old_entity.path]
+    assert old_entity.path.read_bytes().endswith(b"99,410,,,,,\r\n100,301,101,,,,\r\n")
+    assert repo.flush() == []
+
+
+def test_tables_reload_when_changed_on_disk(repo):
+    lookup = repo.lookup("local-plan")
+    assert len(lookup) == 2
+
+    with open(lookup.path, "ab") as f:
+        f.write(b"local-plan,,,,local-authority:GHI,plan-3,102,,,\r\n")
+
+    assert len(lookup) == 3
+
+
+def test_flush_refuses_to_overwrite_changes_made_on_disk(repo):
+    lookup = repo.lookup("local-plan")
+    lookup.rows[0]["reference"] = "renamed"
+    lookup.mark_changed()
+    old_entity = repo.old_entity("local-plan")
+    old_entity.append({"old-entity": "100", "status": "410"})
+    before = old_entity.path.read_bytes()
+
+    with open(lookup.path, "ab") as f:
+        f.write(b"local-plan,,,,local-authority:GHI,plan-3,102,,,\r\n")
+
+    with pytest.raises(ConfigConflictError):
+        repo.flush()
+    assert old_entity.path.read_bytes() == before
+
+
+def test_new_tables_take_their_columns_from_the_mappings_given(tmp_path):
+    mappings = {"pipeline": {"old-entity.csv": "old-entity,status,entity"}}
+    old_entity = ConfigRepository(tmp_path, mappings).old_entity("tree")
+    old_entity.append({"old-entity": "1", "status": "410"})
+
+    assert old_entity.fieldnames == ["old-entity", "status", "entity"]
+    with pytest.raises(ValueError, match="columns aren't known"):
+        ConfigRepository(tmp_path).old_entity("park").append({"old-entity": "1", "status": "410"})
+
+
+def test_threads_appending_to_one_table_lose_no_rows(repo):
+    old_entity = repo.old_entity("local-plan")
+    old_entity.index("old-entity")
+
+    def append(start):
+        for n in range(start, start + 200):
+            old_entity.append({"old-entity": n, "status": "410"})
+
+    threads = [threading.Thread(target=append, args=(start,)) for start in range(1000, 9000, 1000)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    repo.flush()
+
+    assert len(old_entity) == 1 + 8 * 200
+    assert len(old_entity.index("old-entity")) == 1 + 8 * 200
+    assert old_entity.path.read_bytes().count(b"\r\n") == 2 + 8 * 200
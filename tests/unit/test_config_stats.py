@@ -0,0 +1,63 @@
+import csv
+import io
+import json
+
+import bin.config_stats as config_stats
+
+
+def _write_csv(path, header, rows):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def test_count_entity_runs():
+    assert config_stats.count_entity_runs([]) == 0
+    assert config_stats.count_entity_runs({7, 1, 2, 3, 9, 10}) == 3
+
+
+def test_collect_stats_reports_each_file_and_groups_by_collection(tmp_path, mocker):
+    mocker.patch.object(config_stats, "line_growth", return_value={"pipeline/tree/lookup.csv": 60})
+    _write_csv(tmp_path / "collection" / "tree" / "endpoint.csv", ["endpoint"], [["a"], ["b"]])
+    _write_csv(
+        tmp_path / "pipeline" / "tree" / "lookup.csv",
+        ["prefix", "reference", "entity"],
+        [["tree", "1", "100"], ["tree", "2", "101"], ["tree", "3", "200"], ["tree", "4", ""]],
+    )
+    _write_csv(tmp_path / "pipeline" / "tree" / "entity-organisation.csv", ["entity-minimum"], [["100"]])
+
+    stats = config_stats.collect_stats(tmp_path, days=30, workers=1)
+
+    by_file = {(r["kind"], r["file"]): r for r in stats}
+    assert [r["file"] for r in stats] == ["endpoint.csv", "entity-organisation.csv", "lookup.csv"]
+    assert by_file[("collection", "endpoint.csv")]["rows"] == 2
+    assert by_file[("collection", "endpoint.csv")]["lookup-entity-runs"] == ""
+    assert by_file[("pipeline", "lookup.csv")]["lookup-entity-runs"] == 2
+    assert by_file[("pipeline", "lookup.csv")]["entity-organisation-ranges"] == ""
+    assert by_file[("pipeline", "lookup.csv")]["growth-rows-per-day"] == 2.0
+    assert by_file[("pipeline", "entity-organisation.csv")]["entity-organisation-ranges"] == 1
+    assert {r["parse-workers"] for r in stats} == {1}
+
+    (group,) = config_stats.group_stats(stats)
+    assert group["name"] == "tree"
+    assert group["rows"] == 7
+    assert group["lookup-entity-runs"] == 2
+    assert group["entity-organisation-ranges"] == 1
+    assert group["parse-workers"] == 1
+    assert group["bytes"] == sum(r["bytes"] for r in stats)
+
+    out = io.StringIO()
+    config_stats.write_stats(stats, "json", out)
+    assert json.loads(out.getvalue()) == stats
+
+
+def test_parallel_parse_times_are_labelled_with_their_workers(tmp_path):
+    for name in ["tree", "park"]:
+        _write_csv(tmp_path / "collection" / name / "endpoint.csv", ["endpoint"], [["a"]])
+
+    stats = config_stats.collect_stats(tmp_path, days=30, workers=2)
+
+    assert [r["parse-workers"] for r in stats] == [2, 2]
+    assert [r["parse-workers"] for r in config_stats.group_stats(stats)] == [2, 2]
@@ -0,0 +1,60 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / ".github/scripts"))
+
+import dataset_snapshot
+
+URL = "https://files.planning.data.gov.uk/dataset/local-plan.csv"
+
+
+def _serve(monkeypatch, tmp_path, content):
+    source = tmp_path / "download" / "local-plan.csv"
+    source.parent.mkdir(exist_ok=True)
+    source.write_text(content, encoding="utf-8")
+    monkeypatch.setattr(dataset_snapshot, "download_with_cache", lambda url, cache_dir, filename: source)
+    return source
+
+
+def test_load_rows_projects_and_types_columns(monkeypatch, tmp_path):
+    _serve(monkeypatch, tmp_path, "entity,name,geometry,quality\n1,Plan A,POLYGON(...),some\n2,Plan B,,authoritative\n")
+
+    rows = dataset_snapshot.load_rows(URL, ["entity", "quality", "plan"], types={"entity": int},
+                                      cache_dir=tmp_path / "cache")
+
+    assert rows == [
+        {"entity": 1, "quality": "some", "plan": ""},
+        {"entity": 2, "quality": "authoritative", "plan": ""},
+    ]
+    snapshot_dir = tmp_path / "cache" / "columns" / "local-plan"
+    assert (snapshot_dir / dataset_snapshot._column_filename("geometry")).exists()
+
+
+def test_snapshot_is_rebuilt_only_when_download_changes(monkeypatch, tmp_path):
+    source = _serve(monkeypatch, tmp_path, "entity,quality\n1,some\n")
+    cache_dir = tmp_path / "cache"
+    dataset_snapshot.load_rows(URL, ["entity"], cache_dir=cache_dir)
+
+    built = []
+    original = dataset_snapshot.build_snapshot
+    monkeypatch.setattr(dataset_snapshot, "build_snapshot", lambda *a: built.append(a) or original(*a))
+
+    assert dataset_snapshot.load_columns(URL, ["quality"], cache_dir=cache_dir) == {"quality": ["some"]}
+    assert built == []
+
+    source.write_text("entity,quality\n1,some\n2,authoritative\n", encoding="utf-8")
+    assert dataset_snapshot.load_columns(URL, ["quality"], cache_dir=cache_dir) == {"quality": ["some", "authoritative"]}
+    assert len(built) == 1
+
+
+def test_column_names_cannot_clash_with_each_other_or_the_snapshot_metadata(monkeypatch, tmp_path):
+    _serve(monkeypatch, tmp_path, "snapshot,a/b,a_b,entity\nx,1,2,3\n\"y\",4,5,6\n")
+
+    columns = dataset_snapshot.load_columns(URL, ["snapshot", "a/b", "a_b", "entity"], cache_dir=tmp_path / "cache")
+
+    assert columns == {"snapshot": ["x", "y"], "a/b": ["1", "4"], "a_b": ["2", "5"], "entity": ["3", "6"]}
+    # The metadata survives, so a second load doesn't rebuild
+    built = []
+    monkeypatch.setattr(dataset_snapshot, "build_snapshot", lambda *a: built.append(a))
+    assert dataset_snapshot.load_columns(URL, ["snapshot"], cache_dir=tmp_path / "cache") == {"snapshot": ["x", "y"]}
+    assert built == []
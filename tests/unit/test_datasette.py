@@ -0,0 +1,58 @@
+import io
+import json
+import sqlite3
+import sys
+import urllib.parse
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / ".github/scripts"))
+
+import datasette
+from authoritative_retirement import fetch_endpoint_history
+from datasette import iter_datasette_query, sql_in_list
+
+
+@pytest.fixture
+def performance_db(monkeypatch):
+    """Serve Datasette queries from an in-memory reporting_historic_endpoints table."""
+    connection = sqlite3.connect(":memory:")
+    connection.row_factory = sqlite3.Row
+    connection.execute(
+        "CREATE TABLE reporting_historic_endpoints "
+        "(pipeline, endpoint, endpoint_url, organisation, endpoint_end_date)"
+    )
+
+    def urlopen(url):
+        sql = urllib.parse.parse_qs(urllib.parse.urlsplit(url).query)["sql"][0]
+        rows = [dict(row) for row in connection.execute(sql)]
+        return io.BytesIO(json.dumps(rows).encode("utf-8"))
+
+    monkeypatch.setattr(datasette.urllib.request, "urlopen", urlopen)
+    return connection
+
+
+def test_endpoint_history_pages_return_every_row_once(performance_db):
+    # Many rows share (pipeline, endpoint), so pages must be ordered by more than that
+    rows = [
+        ("conservation-area", f"endpoint-{i % 3}", f"https://example.test/{i}.csv", f"local-authority:{i}", "")
+        for i in range(25)
+    ]
+    performance_db.executemany("INSERT INTO reporting_historic_endpoints VALUES (?, ?, ?, ?, ?)", rows)
+
+    def query(database, sql):
+        return iter_datasette_query(database, sql, page_size=4)
+
+    history = list(fetch_endpoint_history({"conservation-area"}, query=query))
+
+    assert sorted(row["endpoint_url"] for row in history) == sorted(row[2] for row in rows)
+
+
+def test_paged_queries_need_an_order():
+    with pytest.raises(ValueError, match="ORDER BY"):
+        next(iter_datasette_query("performance", "SELECT endpoint FROM endpoint"))
+
+
+def test_sql_in_list_escapes_quotes():
+    assert sql_in_list(["a", "o'b"]) == "'a', 'o''b'"
@@ -0,0 +1,119 @@
+import csv
+import importlib.util
+import sys
+from pathlib import Path
+
+from rapidfuzz import fuzz
+
+ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT / ".github/scripts"))
+
+
+def _load_script(filename):
+    spec = importlib.util.spec_from_file_location(filename.replace("-", "_")[:-3], ROOT / ".github/scripts" / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+dedup = _load_script("deduplicate-ca-geogs.py")
+
+
+HE = "government-organisation:PB1164"
+CHECKS_HEADER = ["message", "dataset", "entity_a", "entity_a_name", "geometry_a", "lookup_org_a",
+                 "entity_b", "entity_b_name", "geometry_b", "lookup_org_b", "in_odp"]
+
+
+def _check(message, entity_a, entity_b, dataset="conservation-area", org_a=HE, org_b="local-authority:ABC",
+           in_odp="True", name_a="Old Town", name_b="Old Town Conservation Area"):
+    return [message, dataset, entity_a, name_a, "POLYGON((...))", org_a, entity_b, name_b, "POLYGON((...))", org_b, in_odp]
+
+
+def _baseline_routing(path):
+    """The rows the script's extract_* helpers selected before routing moved into the parse."""
+    with open(path, encoding="utf-8", newline="") as f:
+        rows = [{k: v for k, v in row.items() if k in dedup.NEEDED_COLUMNS} for row in csv.DictReader(f)]
+    in_scope = [row for row in rows if row["dataset"] == "conservation-area"
+                and row.get("lookup_org_a") == HE and row.get("lookup_org_b") != HE]
+    complete = [row for row in in_scope if row["message"] == "complete_match"]
+    single = [row for row in in_scope if row["message"] == "single_match" and row.get("in_odp", "").lower() == "true"]
+    return complete, single
+
+
+def _match(old_entity, entity):
+    return {"old-entity": old_entity, "status": "301", "entity": entity}
+
+
+def test_any_existing_old_entity_row_blocks_a_new_match():
+    old_entity = [
+        {"old-entity": "1", "status": "301", "entity": "2"},
+        {"old-entity": "3", "status": "410", "entity": ""},
+        {"old-entity": "4", "status": "", "entity": ""},
+        {"old-entity": "5", "status": "200", "entity": "9"},
+    ]
+    new_matches = [_match("1", "7"), _match("3", "7"), _match("4", "7"), _match("5", "7"),
+                   _match("2", "7"), _match("6", "7"), _match("6", "8"), _match("7", "6")]
+
+    filtered = dedup.filter_conflicting_matches(old_entity, new_matches)
+
+    assert filtered == [_match("6", "7")]
+
+
+def test_batched_scores_match_per_pair_scores_on_borderline_pairs():
+    # Pairs scoring exactly the threshold, and just above it with scores float32
+    # can't hold exactly (85.106..., 85.714..., 86.956...), plus names needing
+    # normalisation
+    names = [
+        ("village hill village", "village lane village hill"),
+        ("church park conservation hill", "conservation green hill"),
+        ("Lane Conservation Village", "marys lane conservation"),
+        ("conservation street conservation", "village street conservation"),
+        ("Old Village St", "town village street"),
+        ("old street st", "street street st"),
+        ("", "anything"),
+        (123, "123"),
+    ]
+    names_a, names_b = zip(*names)
+
+    scores = dedup.score_name_pairs(list(names_a), list(names_b))
+
+    expected = [fuzz.partial_ratio(str(a).lower(), str(b).lower()) for a, b in names]
+    assert [score > dedup.SIMILARITY_THRESHOLD for score in scores] == [
+        score > dedup.SIMILARITY_THRESHOLD for score in expected
+    ]
+    assert scores == [score if score >= dedup.SIMILARITY_THRESHOLD else 0 for score in expected]
+    assert any(score == dedup.SIMILARITY_THRESHOLD for score in expected)
+    assert any(dedup.SIMILARITY_THRESHOLD < score < 90 for score in expected)
+
+
+def test_routing_while_parsing_selects_the_rows_the_per_row_filters_did(tmp_path):
+    path = tmp_path / "duplicate_entity_expectation.csv"
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(CHECKS_HEADER)
+        writer.writerows([
+            _check("complete_match", "1", "2"),
+            _check("complete_match", "3", "4", in_odp="False"),
+            _check("complete_match", "5", "6", org_b=HE),
+            _check("complete_match", "7", "8", org_a="local-authority:XYZ"),
+            _check("complete_match", "9", "10", dataset="tree"),
+            _check("single_match", "11", "12"),
+            _check("single_match", "13", "14", in_odp="TRUE"),
+            _check("single_match", "15", "16", in_odp="False"),
+            _check("single_match", "17", "18", in_odp=""),
+            _check("single_match", "19", "20", org_b=HE),
+            _check("partial_match", "21", "22"),
+            _check("complete_match", "23", "24", org_b=""),
+        ])
+
+    complete, single = dedup.route_checks_rows(dedup.iter_candidate_rows(path))
+
+    assert (complete, single) == _baseline_routing(path)
+    assert [row["entity_a"] for row in complete] == ["1", "3", "23"]
+    assert [row["entity_a"] for row in single] == ["11", "13"]
+    assert [(m["old-entity"], m["entity"]) for m in dedup.extract_complete_matches(complete)] == [
+        ("1", "2"), ("3", "4"), ("23", "24"),
+    ]
+    assert [(m["old-entity"], m["entity"]) for m in dedup.extract_single_matches(single)] == [
+        ("11", "12"), ("13", "14"),
+    ]
@@ -0,0 +1,61 @@
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / ".github/scripts"))
+
+import evening_pipeline  # noqa: E402
+from config_repository import ConfigRepository  # noqa: E402
+from evening_pipeline import Stage  # noqa: E402
+
+
+def test_only_stages_sharing_files_are_ordered():
+    dependencies = evening_pipeline.stage_dependencies(evening_pipeline.STAGES)
+    assert dependencies == {
+        "deduplicate-ca-geogs": set(),
+        "retire-mhclg-ca-data": set(),
+        "retire-mhclg-plan-data": set(),
+        "redirect-mhclg-plan-duplicates": {"retire-mhclg-plan-data"},
+    }
+    stages = [evening_pipeline.batch_assign_stage("odp")] + evening_pipeline.STAGES
+    assert all("batch-assign" in waits for name, waits in evening_pipeline.stage_dependencies(stages).items()
+               if name != "batch-assign")
+
+
+def test_stages_share_the_repository_and_failed_stages_are_rolled_back(tmp_path):
+    for pipeline in ("tree", "article-4-direction"):
+        (tmp_path / "pipeline" / pipeline).mkdir(parents=True)
+        (tmp_path / "pipeline" / pipeline / "old-entity.csv").write_text("old-entity,status,entity\r\n3,301,30\r\n")
+    repo = ConfigRepository(tmp_path)
+    both_started = threading.Barrier(2, timeout=5)
+
+    def redirect(pipeline, old_entity):
+        def run(repo):
+            both_started.wait()
+            repo.old_entity(pipeline).append({"old-entity": old_entity, "status": "301", "entity": "10"})
+        return run
+
+    def fail_after_append(repo):
+        repo.old_entity("tree").append({"old-entity": "2", "status": "410"})
+        raise ValueError("stage failed")
+
+    stages = [
+        # The first two touch different files, so they run at the same time (or the barrier times out)
+        Stage("tree", redirect("tree", "1"), writes=("pipeline/tree/old-entity.csv",)),
+        Stage("article-4-direction", redirect("article-4-direction", "5"),
+              writes=("pipeline/article-4-direction/old-entity.csv",)),
+        Stage("failing", fail_after_append, writes=("pipeline/tree/old-entity.csv",)),
+    ]
+    results = evening_pipeline.run_stages(stages, repo)
+    assert results["tree"][0] is None and results["article-4-direction"][0] is None
+    assert isinstance(results["failing"][0], ValueError)
+
+    assert len(evening_pipeline.standardise_modified(repo)) == 2
+    repo.flush()
+    header = "old-entity,status,entity,notes,end-date,entry-date,start-date"
+    assert (tmp_path / "pipeline" / "tree" / "old-entity.csv").read_bytes().decode() == (
+        f"{header}\r\n1,301,10,,,,\r\n3,301,30,,,,\r\n"
+    )
+    assert (tmp_path / "pipeline" / "article-4-direction" / "old-entity.csv").read_bytes().decode() == (
+        f"{header}\r\n3,301,30,,,,\r\n5,301,10,,,,\r\n"
+    )
@@ -0,0 +1,42 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / ".github/scripts"))
+
+from fingerprint_store import FingerprintStore, ResourceFingerprints, fingerprint_hash
+
+
+def _fingerprints(entity):
+    return ResourceFingerprints(
+        {entity},
+        {"all-fields": [(entity, fingerprint_hash("organisation::org1"))], "reference-organisation": []},
+    )
+
+
+def test_fingerprints_round_trip_and_only_the_latest_are_kept(tmp_path):
+    store = FingerprintStore(tmp_path / "fingerprints.sqlite3", keep=2)
+    for resource, entity in [("r1", "1"), ("r2", "2"), ("r3", "3")]:
+        store.put("endpoint", resource, _fingerprints(entity))
+    store.put("other-endpoint", "r1", _fingerprints("9"))
+    store.close()
+
+    store = FingerprintStore(tmp_path / "fingerprints.sqlite3", keep=2)
+    assert store.get("endpoint", "r1") is None
+    assert store.get("endpoint", "r3") == ResourceFingerprints(
+        {"3"}, {"all-fields": [("3", fingerprint_hash("organisation::org1"))]}
+    )
+    assert store.get("other-endpoint", "r1").entities == {"9"}
+    assert store.summary() == "Fingerprint store: 2 hit(s), 1 miss(es)"
+
+
+def test_store_from_another_schema_version_is_discarded(tmp_path):
+    path = tmp_path / "fingerprints.sqlite3"
+    store = FingerprintStore(path)
+    store.put("endpoint", "r1", _fingerprints("1"))
+    store.close()
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA user_version = 99")
+    connection.close()
+
+    assert FingerprintStore(path).get("endpoint", "r1") is None
@@ -0,0 +1,36 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent.parent
+
+# Cumulative import time allowed for each entry point, and the modules it
+# mustn't import until a code path needs them
+IMPORT_BUDGET_SECONDS = 0.5
+HEAVY_MODULES = {"pandas", "numpy", "requests", "tqdm", "digital_land"}
+
+
+def _import_times(module):
+    """{module: cumulative import seconds} for a fresh `import module`, from python -X importtime."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c",
+         f"import sys; sys.path[:0] = ['.', '.github/scripts']; import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative) / 1_000_000
+    return times
+
+
+@pytest.mark.parametrize("module", ["bin.add_data", "batch_assign_entities"])
+def test_entry_point_starts_without_heavy_imports(module):
+    times = _import_times(module)
+
+    assert not {name.split(".")[0] for name in times} & HEAVY_MODULES
+    assert times[module] < IMPORT_BUDGET_SECONDS
@@ -0,0 +1,82 @@
+import csv
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / ".github/scripts"))
+
+import lookup_index
+from config_repository import ConfigRepository
+from lookup_index import LookupIndex
+
+HEADER = "prefix,resource,endpoint,entry-number,organisation,reference,entity,entry-date,start-date,end-date\r\n"
+
+
+def _write_lookup(path, rows):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes((HEADER + "".join(rows)).encode("utf-8"))
+    return path
+
+
+def _read(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def test_rows_and_entities_are_read_from_the_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(lookup_index, "CHECKPOINT_ROWS", 3)
+    rows = [f"monument,,,,org:A,M{i},{1000 + i},,,\r\n" for i in range(10)]
+    rows += ['notice,,,,org:B,"N, 1",2000,,,\r\n', 'notice,,,,org:B,"multi\r\nline",2001,,,\r\n']
+    path = _write_lookup(tmp_path / "pipeline" / "he" / "lookup.csv", rows)
+    expected = _read(path)
+
+    with LookupIndex(path, cache_dir=tmp_path / "index") as index:
+        assert index.prefixes() == ["monument", "notice"]
+        assert index.rows("notice") == expected[10:]
+        assert index.rows("monument") == expected[:10]
+        assert index.rows("missing") == []
+        assert [index.find_entity(1000 + i) for i in range(10)] == expected[:10]
+        assert index.find_entity(2001)["reference"] == "multi\r\nline"
+        assert index.find_entity(999) is None
+        (run,) = index.index["prefixes"]["monument"]
+        assert [entity for entity, _ in run["checkpoints"]] == [1000, 1003, 1006, 1009]
+
+
+def test_index_is_rebuilt_when_the_lookup_changes(tmp_path):
+    path = _write_lookup(tmp_path / "pipeline" / "he" / "lookup.csv", ["a,,,,,r1,1,,,\r\n"])
+    with LookupIndex(path, cache_dir=tmp_path / "index") as index:
+        assert index.count("a") == 1
+
+    # Unsorted: a second run of prefix a
+    _write_lookup(path, ["a,,,,,r1,1,,,\r\n", "b,,,,,r2,2,,,\r\n", "a,,,,,r3,3,,,\r\n"])
+    with LookupIndex(path, cache_dir=tmp_path / "index") as index:
+        assert [row["reference"] for row in index.rows("a")] == ["r1", "r3"]
+        assert index.find_entity(3)["reference"] == "r3"
+
+
+def test_index_is_kept_per_path_and_rebuilt_when_unreadable(tmp_path):
+    first = _write_lookup(tmp_path / "one" / "pipeline" / "he" / "lookup.csv", ["a,,,,,r1,1,,,\r\n"])
+    second = _write_lookup(tmp_path / "two" / "pipeline" / "he" / "lookup.csv", ["b,,,,,r2,2,,,\r\n"])
+    with LookupIndex(first, cache_dir=tmp_path / "index") as index:
+        first_index_path = index.index_path
+    with LookupIndex(second, cache_dir=tmp_path / "index") as index:
+        second_index_path = index.index_path
+        assert index.prefixes() == ["b"]
+    assert second_index_path != first_index_path
+
+    # A truncated index is rebuilt, leaving no temporary files behind
+    first_index_path.write_text('{"version": 1, "pref', encoding="utf-8")
+    with LookupIndex(first, cache_dir=tmp_path / "index") as index:
+        assert index.prefixes() == ["a"]
+    assert sorted((tmp_path / "index").iterdir()) == sorted([first_index_path, second_index_path])
+
+
+def test_repository_reads_a_prefix_through_the_index(tmp_path):
+    _write_lookup(tmp_path / "pipeline" / "he" / "lookup.csv", ["a,,,,,r1,1,,,\r\n", "b,,,,,r2,2,,,\r\n"])
+    repo = ConfigRepository(tmp_path)
+
+    assert [row["reference"] for row in repo.lookup_prefix("he", "b")] == ["r2"]
+    assert repo.lookup("he")._rows is None
+    assert list((tmp_path / "var" / "cache" / "lookup-index").glob("he-*.json"))
+
+    repo.lookup("he").append({"prefix": "b", "reference": "r3", "entity": 3})
+    assert [row["reference"] for row in repo.lookup_prefix("he", "b")] == ["r2", "r3"]
@@ -0,0 +1,98 @@
+import csv
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / ".github/scripts"))
+
+from config_repository import ConfigRepository
+import lookup_table
+from lookup_table import MISSING, LookupTable
+
+LOOKUP = (
+    b"prefix,resource,endpoint,entry-number,organisation,reference,entity,entry-date,start-date,end-date\r\n"
+    b"local-plan,,,,local-authority:ABC,plan-1,100,,,\r\n"
+    b"local-plan,,,2,local-authority:DEF,007,101,2024-01-01,,\r\n"
+    b"local-plan,,,,local-authority:ABC,plan-3,102,,,\r\n"
+)
+
+
+def _write_lookup(tmp_path):
+    path = tmp_path / "pipeline" / "local-plan" / "lookup.csv"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(LOOKUP)
+    return path
+
+
+def test_rows_round_trip_as_the_csv_strings(tmp_path):
+    path = _write_lookup(tmp_path)
+    with open(path, newline="", encoding="utf-8") as f:
+        expected = list(csv.DictReader(f))
+
+    lookup = LookupTable.from_csv(path)
+
+    assert [dict(row) for row in lookup] == expected
+    assert lookup[-1]["reference"] == "plan-3"
+    # Whole-number columns are stored as ints, others (incl. leading zeros) as codes
+    assert list(lookup.int_column("entity")) == [100, 101, 102]
+    assert lookup.int_column("reference") is None
+    assert lookup.column("entry-number") == ["", "2", ""]
+
+
+def test_where_and_distinct(tmp_path):
+    lookup = LookupTable.from_csv(_write_lookup(tmp_path))
+
+    assert [row["entity"] for row in lookup.where("organisation", "local-authority:ABC")] == ["100", "102"]
+    assert [row["entity"] for row in lookup.where("reference", "007")] == ["101"]
+    assert lookup.where("organisation", "local-authority:XYZ") == []
+    assert lookup.distinct("organisation") == {"local-authority:ABC", "local-authority:DEF"}
+
+
+def test_repository_caches_lookup_table_until_file_changes(tmp_path):
+    path = _write_lookup(tmp_path)
+    repo = ConfigRepository(tmp_path)
+
+    first = repo.lookup_table("local-plan")
+    assert repo.lookup_table("local-plan") is first
+
+    with open(path, "ab") as f:
+        f.write(b"local-plan,,,,local-authority:GHI,plan-4,103,,,\r\n")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert len(repo.lookup_table("local-plan")) == 4
+
+    # Unsaved rows are visible without flushing
+    repo.lookup("local-plan").append({"prefix": "local-plan", "reference": "plan-5", "entity": 104})
+    assert repo.lookup_table("local-plan")[-1]["entity"] == "104"
+
+
+def test_blank_and_non_ascii_numbers(tmp_path):
+    path = tmp_path / "lookup.csv"
+    path.write_bytes(
+        b"prefix,reference,entity,entry-number\r\n"
+        b"local-plan,plan-1,100,1\r\n"
+        b"local-plan,plan-2,,\xc2\xb2\r\n"
+    )
+
+    lookup = LookupTable.from_csv(path)
+
+    # A blank entity keeps the column numeric, stored as MISSING
+    assert list(lookup.int_column("entity")) == [100, MISSING]
+    assert lookup[1]["entity"] == ""
+    # '²' passes str.isdigit() but isn't a number, so the column holds strings
+    assert lookup.int_column("entry-number") is None
+    assert lookup.column("entry-number") == ["1", "²"]
+
+
+def test_blank_lines_are_skipped_as_dict_reader_does(tmp_path, monkeypatch):
+    path = tmp_path / "lookup.csv"
+    path.write_bytes(b"prefix,entity\r\nlocal-plan,1\r\n\r\nlocal-plan,2\r\n\r\n")
+    with open(path, newline="", encoding="utf-8") as f:
+        expected = list(csv.DictReader(f))
+    # A chunk made up only of blank lines doesn't end the read early
+    monkeypatch.setattr(lookup_table, "CHUNK_ROWS", 1)
+
+    lookup = LookupTable.from_csv(path)
+
+    assert [dict(row) for row in lookup] == expected
+    assert list(lookup.int_column("entity")) == [1, 2]
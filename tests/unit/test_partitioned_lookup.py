@@ -0,0 +1,64 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / ".github/scripts"))
+
+import partitioned_lookup  # noqa: E402
+
+
+def _row(entity, reference=None, organisation="government-organisation:D69"):
+    return {
+        "prefix": "title-boundary",
+        "organisation": organisation,
+        "reference": reference or str(entity),
+        "entity": str(entity),
+    }
+
+
+def test_split_and_append_keep_shards_sorted_and_disjoint(tmp_path):
+    rows = [_row(12000000000 + i) for i in reversed(range(300))]
+    partition = partitioned_lookup.PartitionedLookup(tmp_path / "lookup", max_shard_bytes=2000)
+    partition.split(iter(rows), chunk_rows=50)
+
+    assert len(partition) == 300
+    assert len(partition.shards) > 1
+    assert partition.validate() == []
+
+    partition.append(iter([_row(12000000500), _row(12000000010, reference="again")]))
+    partition = partitioned_lookup.PartitionedLookup(tmp_path / "lookup", max_shard_bytes=2000)
+    entities = [int(row["entity"]) for row in partition.iter_rows()]
+    assert len(entities) == 302
+    assert entities == sorted(entities)
+    assert partition.validate() == []
+
+    partition.join(tmp_path / "lookup.csv")
+    lines = (tmp_path / "lookup.csv").read_bytes().split(b"\r\n")
+    assert lines[0].decode() == ",".join(partitioned_lookup.FIELDNAMES)
+    assert len([line for line in lines[1:] if line]) == 302
+
+
+def test_validate_reports_tampering_and_out_of_range_entities(tmp_path):
+    partition = partitioned_lookup.PartitionedLookup(tmp_path / "lookup")
+    partition.split(iter([_row(12000000001), _row(12000000002), _row(99)]))
+    entity_organisation = tmp_path / "entity-organisation.csv"
+    entity_organisation.write_text(
+        "dataset,entity-minimum,entity-maximum,organisation\r\n"
+        "title-boundary,12000000000,12999999999,government-organisation:D69\r\n"
+    )
+
+    problems = partition.validate(entity_organisation)
+    assert problems == ["lookup-00000.csv:2: entity 99 is outside government-organisation:D69's entity-organisation ranges"]
+
+    shard = tmp_path / "lookup" / "lookup-00000.csv"
+    shard.write_bytes(shard.read_bytes() + b"title-boundary,,,,government-organisation:D69,x,1,,,\r\n")
+    problems = partition.validate()
+    assert any("sha256" in problem for problem in problems)
+    assert any("entity 1 is out of order" in problem for problem in problems)
+    assert any("4 rows" in problem for problem in problems)
+
+
+def test_external_sort_merges_spilled_chunks():
+    rows = [_row(entity) for entity in [5, 3, 9, 1, 7, 2, 8]]
+    assert [row["entity"] for row in partitioned_lookup.external_sort(iter(rows), chunk_rows=2)] == [
+        "1", "2", "3", "5", "7", "8", "9",
+    ]
@@ -0,0 +1,106 @@
+import gzip
+import json
+
+import pytest
+
+import bin.publish_config as publish_config
+
+
+class _MissingKey(Exception):
+    def __init__(self):
+        super().__init__("NoSuchKey")
+        self.response = {"Error": {"Code": "NoSuchKey"}}
+
+
+class _Body:
+    def __init__(self, data):
+        self.data = data
+
+    def read(self):
+        return self.data
+
+
+class FakeS3:
+    """In-memory stand-in for the parts of the boto3 S3 client the publisher uses."""
+
+    def __init__(self):
+        self.objects = {}
+        self.puts = []
+
+    def get_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise _MissingKey()
+        return {"Body": _Body(self.objects[(Bucket, Key)])}
+
+    def put_object(self, Bucket, Key, Body, ContentType=None):
+        self.objects[(Bucket, Key)] = Body
+        self.puts.append(Key)
+
+    def delete_objects(self, Bucket, Delete):
+        for item in Delete["Objects"]:
+            self.objects.pop((Bucket, item["Key"]), None)
+
+
+@pytest.fixture
+def tree(tmp_path):
+    (tmp_path / "collection" / "tree").mkdir(parents=True)
+    (tmp_path / "pipeline" / "tree").mkdir(parents=True)
+    (tmp_path / "collection" / "tree" / "endpoint.csv").write_text("endpoint\r\ne1\r\n")
+    (tmp_path / "pipeline" / "tree" / "lookup.csv").write_text("prefix,entity\r\ntree,1\r\n")
+    return tmp_path
+
+
+def test_only_changed_files_are_uploaded(tree):
+    client = FakeS3()
+    destination = "s3://bucket/config/"
+
+    first = publish_config.publish(client, destination, root=tree, compress=("gzip",))
+    assert sorted(first["uploaded"]) == ["collection/tree/endpoint.csv", "pipeline/tree/lookup.csv"]
+    assert gzip.decompress(client.objects[("bucket", "config/pipeline/tree/lookup.csv.gz")]) == b"prefix,entity\r\ntree,1\r\n"
+    manifest = json.loads(client.objects[("bucket", "config/manifest.json")])
+    assert manifest["files"]["pipeline/tree/lookup.csv"]["variants"] == {"gzip": "pipeline/tree/lookup.csv.gz"}
+
+    # Nothing changed: nothing is written, not even the manifest
+    client.puts.clear()
+    assert publish_config.publish(client, destination, root=tree, compress=("gzip",))["uploaded"] == []
+    assert client.puts == []
+
+    (tree / "pipeline" / "tree" / "lookup.csv").write_text("prefix,entity\r\ntree,1\r\ntree,2\r\n")
+    assert publish_config.publish(client, destination, root=tree, compress=("gzip",), dry_run=True)["uploaded"] == [
+        "pipeline/tree/lookup.csv"
+    ]
+    assert client.puts == []
+    publish_config.publish(client, destination, root=tree, compress=("gzip",))
+    assert client.puts == ["config/pipeline/tree/lookup.csv", "config/pipeline/tree/lookup.csv.gz", "config/manifest.json"]
+
+
+def test_removed_files_are_only_deleted_when_asked(tree):
+    client = FakeS3()
+    publish_config.publish(client, "s3://bucket/config", root=tree)
+    (tree / "collection" / "tree" / "endpoint.csv").unlink()
+
+    result = publish_config.publish(client, "s3://bucket/config", root=tree)
+    assert result["removed"] == []
+    assert ("bucket", "config/collection/tree/endpoint.csv") in client.objects
+
+    result = publish_config.publish(client, "s3://bucket/config", root=tree, delete=True)
+    assert result["removed"] == ["collection/tree/endpoint.csv"]
+    assert ("bucket", "config/collection/tree/endpoint.csv") not in client.objects
+    manifest = json.loads(client.objects[("bucket", "config/manifest.json")])
+    assert list(manifest["files"]) == ["pipeline/tree/lookup.csv"]
+
+
+def test_skip_unchanged_does_nothing_until_a_collection_changes(tree):
+    client = FakeS3()
+    manifest = publish_config.StageManifest(tree)
+    publish_config.publish(client, "s3://bucket/config/", root=tree, stage_manifest=manifest)
+
+    client.puts.clear()
+    client.get_object = None  # any S3 call now fails
+    assert publish_config.publish(client, "s3://bucket/config/", root=tree, stage_manifest=manifest)["uploaded"] == []
+    assert client.puts == []
+
+    del client.get_object
+    (tree / "pipeline" / "tree" / "lookup.csv").write_text("prefix,entity\r\ntree,1\r\ntree,2\r\n")
+    result = publish_config.publish(client, "s3://bucket/config/", root=tree, stage_manifest=manifest)
+    assert result["uploaded"] == ["pipeline/tree/lookup.csv"]
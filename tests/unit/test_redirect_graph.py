@@ -0,0 +1,71 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / ".github/scripts"))
+
+import redirect_graph
+from redirect_graph import RedirectGraph
+
+
+def _row(old_entity, status, entity=""):
+    return {"old-entity": old_entity, "status": status, "entity": entity}
+
+
+def test_find_resolves_chains_to_final_destination():
+    graph = RedirectGraph.from_rows([
+        _row("1", "301", "2"),
+        _row("2", "301", "3"),
+        _row("3", "301", "4"),
+        _row("5", "301", "4"),
+    ])
+
+    assert graph.resolve_all() == {"1": "4", "2": "4", "3": "4", "5": "4"}
+    assert sorted(graph.chained_sources()) == ["1", "2"]
+    assert graph.is_target("4")
+    assert not graph.is_target("1")
+
+
+def test_cycles_and_duplicates_are_rejected():
+    graph = RedirectGraph.from_rows([
+        _row("1", "301", "2"),
+        _row("2", "301", "3"),
+        _row("3", "301", "1"),
+        _row("1", "410"),
+        _row("7", "301", "7"),
+    ])
+
+    assert graph.cycles == [("3", "1"), ("7", "7")]
+    assert graph.duplicates == [("1", "410", "")]
+    assert graph.find("1") == "3"
+
+
+def test_conflicts_report_redirects_into_gone_entities():
+    graph = RedirectGraph.from_rows([
+        _row("1", "301", "2"),
+        _row("2", "301", "3"),
+        _row("3", "410"),
+    ])
+
+    assert sorted(graph.conflicts()) == [("1", "3"), ("2", "3")]
+
+
+def test_main_returns_non_zero_on_problems(tmp_path):
+    path = tmp_path / "old-entity.csv"
+    path.write_text("old-entity,status,entity\n1,301,2\n2,301,1\n", encoding="utf-8")
+
+    assert RedirectGraph.from_csv(path).cycles == [("2", "1")]
+
+    assert redirect_graph.main([path]) == 1
+
+
+def test_all_sources_include_rows_of_any_status():
+    graph = RedirectGraph.from_rows([
+        _row("1", "301", "2"),
+        _row("3", "410"),
+        _row("4", "200", "5"),
+        _row("6", "", ""),
+        _row("1", "410"),
+    ])
+
+    assert graph.all_sources == {"1", "3", "4", "6"}
+    assert not graph.is_source("4")
@@ -0,0 +1,90 @@
+import importlib.util
+import logging
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT / ".github/scripts"))
+
+
+def _load_script(filename):
+    spec = importlib.util.spec_from_file_location(filename.replace("-", "_")[:-3], ROOT / ".github/scripts" / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+from config_repository import Table  # noqa: E402
+
+duplicates = _load_script("redirect-mhclg-plan-duplicates.py")
+
+
+def _row(entity, org_entity="100", quality="authoritative", **fields):
+    return {"entity": entity, "quality": quality, "organisation-entity": org_entity, **fields}
+
+
+def _index(rows, **kwargs):
+    return duplicates.PlanMatchIndex({row["entity"]: row for row in rows}, **kwargs)
+
+
+def test_by_url_and_by_label_only_index_authoritative_rows_of_included_orgs():
+    index = _index([
+        _row(1, **{"document-url": "https://a.test/plan.pdf", "name": "Local Plan"}),
+        _row(2, **{"document-url": "https://a.test/plan.pdf", "name": "Other Plan"}),
+        _row(3, **{"description": " local plan "}),
+        _row(4, quality="some", **{"document-url": "https://a.test/plan.pdf", "name": "Local Plan"}),
+        _row(5, org_entity="200", **{"document-url": "https://a.test/plan.pdf"}),
+        _row(6, org_entity="", name="Local Plan"),
+        _row(7, name="Local Plan"),
+    ], entity_org_from_lookup={7: "government-organisation:D1342"}, exclude_orgs={"government-organisation:D1342"})
+
+    assert index.by_url[("100", "https://a.test/plan.pdf")] == [1, 2]
+    assert index.by_url[("200", "https://a.test/plan.pdf")] == [5]
+    assert index.by_label[("100", "local plan")] == [1, 3]
+    assert index.org_entities == {"100", "200"}
+    assert index.document_matches("100", "https://a.test/plan.pdf", "local plan") == {
+        1: "url+name", 2: "url", 3: "name",
+    }
+    assert index.document_matches("100", "", "") == {}
+    assert index.document_matches("300", "https://a.test/plan.pdf", "local plan") == {}
+
+
+def test_by_event_date_matches_exact_dates_and_events_lists_every_date_in_order():
+    index = _index([
+        _row(1, **{"plan-event": "adoption", "event-date": "2024-05-01"}),
+        _row(2, **{"plan-event": "adoption", "predicted-date": "2024-05"}),
+        _row(3, **{"plan-event": "adoption", "actual-date": "2023"}),
+        _row(4, **{"plan-event": "adoption", "event-date": "2024-05-01"}),
+        _row(5, **{"plan-event": "consultation", "event-date": "2024-05-01"}),
+        _row(6, **{"plan-event": "adoption"}),
+    ])
+
+    assert index.by_event_date[("100", "adoption", "2024-05-01")] == [1, 4]
+    assert index.event_matches("100", "adoption", "2024-05-01") == [1, 4]
+    assert index.event_matches("100", "adoption", "2024-05") == [2]
+    assert index.event_matches("100", "adoption", "2024-05-02") == []
+    assert index.events("100", "adoption") == [
+        (6, ""), (3, "2023"), (2, "2024-05"), (1, "2024-05-01"), (4, "2024-05-01"),
+    ]
+    assert index.events("100", "submission") == []
+
+
+def test_save_redirected_entities_only_reports_problems_with_new_records(tmp_path, caplog):
+    path = tmp_path / "old-entity.csv"
+    path.write_text(
+        "old-entity,status,entity,notes,end-date,entry-date,start-date\r\n"
+        "1,301,2,,,,\r\n"
+        "1,410,,,,,\r\n"
+        "2,301,1,,,,\r\n"
+        "5,301,6,,,,\r\n",
+        encoding="utf-8",
+    )
+    old_entity = Table(path)
+
+    with caplog.at_level(logging.WARNING):
+        added = duplicates.save_redirected_entities([(5, 7, "dup"), (6, 5, "loop"), (8, 9, "new")], old_entity)
+
+    assert added == [(8, 9, "new")]
+    warnings = [record.getMessage() for record in caplog.records]
+    assert "⚠ 1 entities are already in old-entity.csv (skipping)" in warnings
+    assert [w for w in warnings if "redirect loop" in w] == ["⚠ Skipping 6 → 5: would create a redirect loop"]
@@ -0,0 +1,141 @@
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT / ".github/scripts"))
+
+from lookup_table import LookupTable
+from tests.unit import plan_retirement_reference as reference
+
+
+def _load_script(filename):
+    spec = importlib.util.spec_from_file_location(filename.replace("-", "_")[:-3], ROOT / ".github/scripts" / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+plan = _load_script("retire-mhclg-plan-data.py")
+
+MHCLG = reference.MHCLG_ORG
+LOOKUP_FIELDS = ["prefix", "organisation", "reference", "entity"]
+GROUPS = {"local-planning-group:G": ["local-authority:C1"], "local-planning-group:H": ["local-authority:C3"]}
+ORG_NAMES = {
+    "local-authority:B": "Borough of Test",
+    "local-planning-group:H": "Joint Plan Group",
+    "local-authority:C3": "Third Council",
+}
+
+
+def _lookup(prefix, organisation, entity, reference=""):
+    return {"prefix": prefix, "organisation": organisation, "reference": reference, "entity": str(entity)}
+
+
+def _range(dataset, organisation, minimum, maximum):
+    return {"dataset": dataset, "organisation": organisation,
+            "entity-minimum": str(minimum), "entity-maximum": str(maximum)}
+
+
+def _template(organisation, start):
+    """23 MHCLG plan-timetable lookup rows, and their entity-organisation range under `organisation`."""
+    rows = [_lookup("plan-timetable", MHCLG, entity, f"pt-{entity}") for entity in range(start, start + 23)]
+    return rows, _range("plan-timetable", organisation, start, start + 22)
+
+
+def _fixture():
+    lookup_rows, entity_org_rows = [], []
+    # Templates at the start of the first block, the end of the first block (just
+    # before the real-data gap) and the start of the second block
+    for organisation, start in [("local-authority:A", 5101702), ("local-authority:E", 5102677),
+                                ("local-authority:C1", 5103454)]:
+        rows, template = _template(organisation, start)
+        lookup_rows += rows
+        entity_org_rows.append(template)
+    # Real minerals and waste data in the gap between the blocks is never retired
+    rows, gap = _template("local-authority:K", 5102700)
+    lookup_rows += rows
+    entity_org_rows.append(gap)
+
+    lookup_rows += [
+        # An LPA with several timetable events
+        _lookup("plan-timetable", "local-authority:A", 6000000, "a-1"),
+        _lookup("plan-timetable", "local-authority:A", 6000001, "a-2"),
+        _lookup("plan-timetable", "local-authority:A", 6000002, "a-3"),
+        _lookup("plan-timetable", "local-authority:E", 6000010, "e-1"),
+        _lookup("plan-timetable", "local-authority:K", 6000020, "k-1"),
+        # A joint group whose constituent has the template
+        _lookup("plan-timetable", "local-planning-group:G", 6000030, "g-1"),
+        # An LPA with no entity-organisation ranges at all
+        _lookup("plan-timetable", "local-authority:N", 6000040, "n-1"),
+        # An in-place update of MHCLG data, on the last entity of the second block
+        _lookup("plan-timetable", "local-authority:U", 5109686, "u-1"),
+        # local-plan templates on the first and last entities of the block
+        _lookup("local-plan", MHCLG, 4220656, "borough-of-test-new-local-plan"),
+        _lookup("local-plan", MHCLG, 4220966, "third-council-new-local-plan"),
+        _lookup("local-plan", MHCLG, 4220700, "somewhere-else-new-local-plan"),
+        _lookup("local-plan", "local-authority:B", 4300000, "b-plan"),
+        _lookup("local-plan", "local-planning-group:H", 4300001, "h-plan"),
+    ]
+    entity_org_rows += [
+        _range("plan-timetable", "local-authority:A", 6000000, 6000002),
+        _range("plan-timetable", "local-authority:E", 6000010, 6000010),
+        _range("plan-timetable", "local-authority:K", 6000020, 6000020),
+        _range("local-plan", "local-authority:B", 4220656, 4220656),
+        _range("local-plan", "local-authority:C3", 4220900, 4220966),
+    ]
+    return lookup_rows, entity_org_rows
+
+
+def _vectorised(lookup_rows, entity_org_rows, org_names):
+    tables = plan.PlanTables(LookupTable.from_rows(lookup_rows, LOOKUP_FIELDS), entity_org_rows)
+    return (
+        plan.retire_plan_timetable_data(tables, GROUPS),
+        plan.retire_local_plan_data(tables, org_names, GROUPS),
+    )
+
+
+def _per_row(lookup_rows, entity_org_rows, org_names):
+    return (
+        reference.retire_plan_timetable_data(lookup_rows, entity_org_rows, GROUPS, plan.constituent_orgs),
+        reference.retire_local_plan_data(lookup_rows, entity_org_rows, org_names, GROUPS,
+                                         plan.constituent_orgs, plan.authority_to_slug),
+    )
+
+
+def test_vectorised_retirement_matches_per_row_rules():
+    lookup_rows, entity_org_rows = _fixture()
+
+    expected = _per_row(lookup_rows, entity_org_rows, ORG_NAMES)
+    (timetable, timetable_orgs), (local_plan, local_plan_orgs) = _vectorised(lookup_rows, entity_org_rows, ORG_NAMES)
+
+    assert ((timetable, timetable_orgs), (local_plan, local_plan_orgs)) == expected
+    assert timetable_orgs == {"local-authority:A", "local-authority:E", "local-planning-group:G"}
+    assert len(timetable) == 3 * 23
+    assert not set(timetable) & set(range(5102700, 5102723))
+    assert local_plan == {
+        4220656: ("local-authority:B", "local-plan"),
+        4220966: ("local-planning-group:H", "local-plan"),
+    }
+
+
+def test_org_without_a_name_fails_both_ways():
+    lookup_rows, entity_org_rows = _fixture()
+    org_names = {org: name for org, name in ORG_NAMES.items() if org != "local-authority:B"}
+
+    with pytest.raises(ValueError):
+        _per_row(lookup_rows, entity_org_rows, org_names)
+    with pytest.raises(ValueError, match="Could not resolve organisation names"):
+        _vectorised(lookup_rows, entity_org_rows, org_names)
+
+
+def test_blank_entity_fails_both_ways():
+    lookup_rows, entity_org_rows = _fixture()
+    lookup_rows.append(_lookup("plan-timetable", "local-authority:A", "", "a-4"))
+
+    with pytest.raises(ValueError):
+        _per_row(lookup_rows, entity_org_rows, ORG_NAMES)
+    with pytest.raises(ValueError, match="no entity"):
+        _vectorised(lookup_rows, entity_org_rows, ORG_NAMES)
@@ -0,0 +1,39 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / ".github/scripts"))
+
+from stage_manifest import StageManifest  # noqa: E402
+
+
+def _tree(root):
+    for collection in ("tree", "article-4-direction"):
+        (root / "collection" / collection).mkdir(parents=True)
+        (root / "pipeline" / collection).mkdir(parents=True)
+        (root / "pipeline" / collection / "lookup.csv").write_text("prefix,entity\r\n")
+    code = root / "stage.py"
+    code.write_text("# stage\n")
+    return code
+
+
+def test_only_collections_changed_since_the_last_run_need_processing(tmp_path):
+    code = _tree(tmp_path)
+    manifest = StageManifest(tmp_path)
+    assert manifest.changed("standardise", code=[code]) == ["article-4-direction", "tree"]
+
+    for collection in manifest.collections():
+        manifest.record("standardise", collection, code=[code])
+    manifest.save()
+
+    manifest = StageManifest(tmp_path)
+    assert manifest.changed("standardise", code=[code]) == []
+    assert manifest.changed("fix-dates", code=[code]) == ["article-4-direction", "tree"]
+
+    (tmp_path / "collection" / "tree" / "endpoint.csv").write_text("endpoint\r\n")
+    assert manifest.changed("standardise", code=[code]) == ["tree"]
+
+    # Changing a stage's code means every collection needs processing again
+    code.write_text("# stage, changed\n")
+    assert manifest.changed("standardise", code=[code]) == ["article-4-direction", "tree"]
+    manifest.record("standardise", "tree", code=[code])
+    assert manifest.changed("standardise", code=[code]) == ["article-4-direction"]
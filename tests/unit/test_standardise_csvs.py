@@ -0,0 +1,44 @@
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / ".github/scripts"))
+
+from create_collection import COLUMN_MAPPINGS  # noqa: E402
+from standardise_csvs import SORT_MAPPINGS, standardise_csv  # noqa: E402
+
+LOOKUP_COLUMNS = COLUMN_MAPPINGS["pipeline"]["lookup.csv"]
+LOOKUP_SORT = SORT_MAPPINGS["pipeline"]["lookup.csv"]
+
+
+def _write_lookup(path):
+    random.seed(4)
+    lines = ["entity,prefix,reference"]
+    for i in range(500):
+        # Duplicate sort keys and blank entities check the merge is stable and blanks go last
+        entity = "" if i % 37 == 0 else str(random.randint(1, 60))
+        lines.append(f"{entity},{random.choice(['tree', 'Tree', 'area'])},ref-{i}")
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def test_external_sort_matches_in_memory_sort(tmp_path):
+    in_memory = tmp_path / "in-memory.csv"
+    external = tmp_path / "external.csv"
+    _write_lookup(in_memory)
+    _write_lookup(external)
+
+    assert standardise_csv(str(in_memory), LOOKUP_COLUMNS, LOOKUP_SORT) is None
+    assert standardise_csv(str(external), LOOKUP_COLUMNS, LOOKUP_SORT, external_sort_bytes=0, run_rows=32) is None
+
+    assert external.read_bytes() == in_memory.read_bytes()
+    assert external.read_bytes().startswith(LOOKUP_COLUMNS.encode() + b"\r\n")
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["external.csv", "in-memory.csv"]
+
+
+def test_external_sort_leaves_invalid_files_untouched(tmp_path):
+    path = tmp_path / "lookup.csv"
+    path.write_text("prefix,entity\ntree,2\ntree,1,extra\n", encoding="utf-8")
+
+    result = standardise_csv(str(path), LOOKUP_COLUMNS, LOOKUP_SORT, external_sort_bytes=0, run_rows=1)
+    assert "more values than columns" in result
+    assert path.read_text(encoding="utf-8") == "prefix,entity\ntree,2\ntree,1,extra\n"
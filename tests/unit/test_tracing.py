@@ -0,0 +1,83 @@
+import json
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / ".github/scripts"))
+
+import tracing
+
+
+def test_spans_are_aggregated_and_written_as_jsonl(tmp_path):
+    trace_file = tmp_path / "trace.jsonl"
+    tracing.configure(trace_file)
+    try:
+        for resource in ("r1", "r2"):
+            with tracing.span("resource", resource=resource):
+                with tracing.span("lookup_read") as s:
+                    s.count(rows=10)
+        with pytest.raises(ValueError):
+            with tracing.span("resource", resource="r3"):
+                raise ValueError("boom")
+        tracing.count(failed_downloads=1)
+
+        totals = tracing.totals()
+        assert totals["resource"]["calls"] == 3
+        assert totals["resource"]["errors"] == 1
+        assert totals["lookup_read"]["counts"] == {"rows": 20}
+
+        records = [json.loads(line) for line in trace_file.read_text().splitlines()]
+        assert [r["span"] for r in records] == ["lookup_read", "resource", "lookup_read", "resource", "resource"]
+        assert records[0]["parent"] == "resource"
+        assert records[0]["counts"] == {"rows": 10}
+        assert records[1]["attrs"] == {"resource": "r1"}
+        assert records[-1]["error"] == "ValueError"
+
+        summary = tracing.summary()
+        assert "lookup_read" in summary and "rows=20" in summary
+        assert "failed_downloads: 1" in summary
+    finally:
+        tracing.configure(None)
+
+
+def test_nothing_is_written_without_a_trace_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    tracing.configure(None)
+    with tracing.span("stage"):
+        pass
+    assert tracing.totals()["stage"]["calls"] == 1
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_spans_nest_per_thread_and_share_one_trace_file(tmp_path, monkeypatch):
+    trace_file = tmp_path / "trace.jsonl"
+    tracing.configure(trace_file)
+    opened = []
+    monkeypatch.setattr("builtins.open", lambda *a, **k: opened.append(a))
+    started = threading.Barrier(4)
+
+    def work(resource):
+        with tracing.span("resource", resource=resource):
+            started.wait()
+            with tracing.span("download"):
+                pass
+
+    try:
+        threads = [threading.Thread(target=work, args=(f"r{n}",)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        monkeypatch.undo()
+        tracing.close()
+
+        records = [json.loads(line) for line in trace_file.read_text().splitlines()]
+        assert opened == []
+        assert len(records) == 8
+        assert {r["parent"] for r in records if r["span"] == "download"} == {"resource"}
+        assert {r["parent"] for r in records if r["span"] == "resource"} == {None}
+        assert tracing.totals()["download"]["calls"] == 4
+    finally:
+        tracing.configure(None)